@@ -0,0 +1,75 @@
+'''
+Measures how many tweets per second the compose path can store, comparing the old
+commit-per-statement writes against Database.compose_tweet's single transaction, with
+synchronous=FULL and synchronous=NORMAL. Run from the repository root with:
+
+    python -m benchmarks.compose [tweet_count]
+'''
+import os
+import sys
+import tempfile
+import time
+
+from tui.core import Database
+import tui.utils.StringUtils as StringUtils
+
+TWEET_TEXT = "Great game tonight #oilers #hockey #edmonton #nhl #playoffs"
+
+
+def compose_per_statement(db, tid, writer, tdate, text):
+    '''
+    The write path before batching: one commit for the tweet, then one for each hashtag
+    existence check and insert and one for each mention
+    '''
+
+    db.connection.execute("INSERT INTO tweets (tid,writer,tdate,text,replyto) VALUES (?,?,?,?,?);", (tid, writer, tdate, text, None))
+    db.connection.commit()
+
+    for term in StringUtils.get_hashtags(text):
+        db.cursor.execute("SELECT COUNT(*) FROM hashtags WHERE term = ?;", (term,))
+        if db.cursor.fetchone()[0] == 0:
+            db.connection.execute("INSERT INTO hashtags (term) VALUES (?);", (term,))
+            db.connection.commit()
+
+        db.connection.execute("INSERT INTO mentions (tid,term) VALUES (?,?);", (tid, term))
+        db.connection.commit()
+
+
+def run(synchronous, batched, tweet_count):
+    '''
+    Returns tweets per second for one configuration, on a fresh database file
+    '''
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = Database()
+        db.connect(os.path.join(tmp_dir, "compose.db"))
+        db.connection.execute(f"PRAGMA synchronous = {synchronous};")
+        db.create_user("pwd", "Writer", "w@example.com", "Edmonton", -7)
+
+        start = time.perf_counter()
+        for tid in range(tweet_count):
+            if batched:
+                db.compose_tweet(1, "2023-11-06", TWEET_TEXT)
+            else:
+                compose_per_statement(db, tid, 1, "2023-11-06", TWEET_TEXT)
+        elapsed = time.perf_counter() - start
+
+        db.close()
+
+    return tweet_count / elapsed
+
+
+def main():
+    tweet_count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+    print(f"{tweet_count} tweets with {len(StringUtils.get_hashtags(TWEET_TEXT))} hashtags each\n")
+    print(f"{'synchronous':<12} | {'per statement (tweets/s)':>24} | {'one transaction (tweets/s)':>26} | speedup")
+
+    for synchronous in ["FULL", "NORMAL"]:
+        before = run(synchronous, False, tweet_count)
+        after = run(synchronous, True, tweet_count)
+        print(f"{synchronous:<12} | {before:>24.0f} | {after:>26.0f} | {after / before:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+'''
+Stress test of the connection pool: reader threads render home feeds through their own
+Database on a shared ConnectionPool while a writer thread composes tweets as fast as
+it can, and reports reads and writes per second for each reader thread count, with
+and without the writer running. Run from the repository root with:
+
+    python -m benchmarks.concurrency [--threads 1 2 4 8] [--seconds 3] [--tweets 10000]
+
+It works on a copy of the generated database so the writes do not pile up in it.
+Reads can only scale past one thread on a machine with more than one core, as sqlite
+releases the GIL while it steps through a query.
+'''
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from tui.core import Database, FrameManager, ScriptedIO
+from tui.core.ConnectionPool import ConnectionPool
+from tui.core.models import UserCredential
+from benchmarks.frames import open_database
+import tui.frames as frames
+
+
+def read_feeds(pool, path, user_count, seed, stop, counts):
+    '''
+    Renders random users' home feeds until stop is set, counting renders
+    '''
+
+    rng = random.Random(seed)
+    db = Database()
+    db.connect(path, pool)
+    frame_mgr = FrameManager(db, ScriptedIO((), capture=False))
+
+    renders = 0
+    while not stop.is_set():
+        db.user = UserCredential(rng.randint(1, user_count), "", "", "", "", 0)
+        frames.LoggedInFrame(frame_mgr).render()
+        renders += 1
+
+    db.release()
+    counts.append(renders)
+
+
+def write_tweets(pool, path, user_count, stop, counts):
+    '''
+    Composes tweets until stop is set, counting them
+    '''
+
+    rng = random.Random(0)
+    db = Database()
+    db.connect(path, pool)
+
+    tweets = 0
+    while not stop.is_set():
+        db.compose_tweet(rng.randint(1, user_count), "2026-01-01", "Stress testing the writer #wal #benchmark")
+        tweets += 1
+
+    db.release()
+    counts.append(tweets)
+
+
+def run(path, threads, seconds, with_writer):
+    '''
+    Runs the reader threads, and the writer if asked, for the given time.
+    Returns reads per second and writes per second.
+    '''
+
+    pool = ConnectionPool(path, readers=threads + 1)
+    user_count = pool.writer.execute("SELECT MAX(usr) FROM users;").fetchone()[0]
+
+    stop = threading.Event()
+    reads, writes = [], []
+    workers = [
+        threading.Thread(target=read_feeds, args=(pool, path, user_count, seed, stop, reads))
+        for seed in range(threads)
+    ]
+    if with_writer:
+        workers.append(threading.Thread(target=write_tweets, args=(pool, path, user_count, stop, writes)))
+
+    for worker in workers:
+        worker.start()
+    time.sleep(seconds)
+    stop.set()
+    for worker in workers:
+        worker.join()
+
+    pool.close()
+    return sum(reads) / seconds, sum(writes) / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reader scaling under concurrent writes")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8], help="reader thread counts")
+    parser.add_argument("--seconds", type=float, default=3)
+    parser.add_argument("--tweets", type=int, default=10000, help="tweet count of the generated database")
+    parser.add_argument("--db-dir", default="benchmarks/data", help="where generated databases are kept")
+    args = parser.parse_args()
+
+    os.makedirs(args.db_dir, exist_ok=True)
+    source = open_database(args.db_dir, args.tweets)
+    source_path = source.connection.execute("PRAGMA database_list;").fetchone()[2]
+    source.close()
+
+    print(f"{os.cpu_count()} CPU(s), sqlite {sqlite3.sqlite_version}\n")
+    print(f"{'readers':>8} | {'reads/s alone':>14} | {'reads/s with writer':>20} | {'writes/s':>9}")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for threads in args.threads:
+            results = []
+            for with_writer in [False, True]:
+                path = os.path.join(tmp_dir, f"stress-{threads}-{with_writer}.db")
+                shutil.copyfile(source_path, path)
+                results.append(run(path, threads, args.seconds, with_writer))
+
+            (reads_alone, _), (reads_shared, writes) = results
+            print(f"{threads:>8} | {reads_alone:>14.0f} | {reads_shared:>20.0f} | {writes:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
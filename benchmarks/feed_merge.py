@@ -0,0 +1,117 @@
+'''
+Times the first and a later page of a home timeline built three ways: the original
+single query joining follows to tweets and retweets, the materialized timeline table,
+and the k-way merge of the followees' index streams. One user follows fan_in users who
+each wrote tweets_each tweets and retweeted a tenth as many, so the merge's cost can be
+seen to follow the fan-in rather than the amount of data. Run from the repository root
+with:
+
+    python -m benchmarks.feed_merge [--fan-in 10 100 500] [--tweets-each 10 100 1000]
+'''
+import argparse
+import os
+import tempfile
+import time
+
+from tui.core import Database, MERGE_FEED, TIMELINE_FEED
+from tui.core.BulkImport import BulkImporter
+
+REPEATS = 5
+PAGES = [1, 10]
+
+# The original home page query, read with OFFSET, only timed on databases with at most this
+# many tweets as it touches every retweet of every candidate tweet
+JOIN_MAX_TWEETS = 20000
+JOIN_QUERY = '''
+    SELECT DISTINCT t.tid, t.text, t.tdate, t.writer
+    FROM tweets t
+    JOIN follows f on f.flwer = ?
+    LEFT JOIN retweets r ON t.tid = r.tid
+    WHERE t.writer = f.flwee
+    OR f.flwee = r.usr
+    ORDER BY COALESCE(r.rdate, t.tdate) DESC
+    LIMIT ?, 6
+'''
+
+
+def tables(fan_in, tweets_each):
+    '''
+    Yields the (table, rows) of a database where user 0 follows users 1 to fan_in
+    '''
+
+    yield "users", ((usr, f"pwd{usr}", f"User {usr}", f"u{usr}@example.com", "Edmonton", -7) for usr in range(fan_in + 1))
+    yield "follows", ((0, usr, "2023-12-23") for usr in range(1, fan_in + 1))
+
+    # Tweets spread over the years so followees interleave, each writer's oldest first
+    tweet_count = fan_in * tweets_each
+    yield "tweets", ((tid, tid % fan_in + 1, f"{2000 + tid * 20 // tweet_count}-{tid % 12 + 1:02}-{tid % 28 + 1:02}",
+                      f"tweet number {tid}", None) for tid in range(tweet_count))
+
+    # Every followee retweets some of the tweets of the next followee, a day later
+    yield "retweets", ((usr, tid, f"{2000 + tid * 20 // tweet_count}-{tid % 12 + 1:02}-{tid % 28 + 2:02}")
+                       for tid in range(0, tweet_count, 10) for usr in [(tid + 1) % fan_in + 1])
+
+
+def best_of(fn):
+    '''
+    Returns the fastest of REPEATS runs of fn in milliseconds
+    '''
+
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def page_keys(db, pages):
+    '''
+    Returns the (date, tid) key each page starts after, read through the timeline table
+    '''
+
+    keys = [("9999-12-31", 2 ** 63 - 1)]
+    while len(keys) < max(pages):
+        rows = db.home_feed(0, keys[-1])
+        if len(rows) < 6:
+            break
+        keys.append((rows[4][4], rows[4][0]))
+    return {page: keys[page - 1] for page in pages if page <= len(keys)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Home timeline latency by strategy")
+    parser.add_argument("--fan-in", type=int, nargs="+", default=[10, 100, 500], help="users followed")
+    parser.add_argument("--tweets-each", type=int, nargs="+", default=[10, 100, 1000], help="tweets per followed user")
+    args = parser.parse_args()
+
+    print(f"{'fan-in':>7} {'tweets':>8} {'page':>5} | {'join (ms)':>10} | {'timeline (ms)':>13} | {'merge (ms)':>10}")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for fan_in in args.fan_in:
+            for tweets_each in args.tweets_each:
+                db = Database()
+                db.connect(os.path.join(tmp_dir, f"feed-{fan_in}-{tweets_each}.db"))
+                with BulkImporter(db, log=lambda message: None) as importer:
+                    for table, rows in tables(fan_in, tweets_each):
+                        importer.load(table, rows)
+
+                for page, after in page_keys(db, PAGES).items():
+                    if fan_in * tweets_each <= JOIN_MAX_TWEETS:
+                        join_ms = best_of(lambda: db.cursor.execute(JOIN_QUERY, (0, (page - 1) * 5)).fetchall())
+                        join = f"{join_ms:>10.3f}"
+                    else:
+                        join = f"{'-':>10}"
+
+                    db.feed = TIMELINE_FEED
+                    timeline_ms = best_of(lambda: db.home_feed(0, after))
+                    db.feed = MERGE_FEED
+                    merge_ms = best_of(lambda: db.home_feed(0, after))
+
+                    print(f"{fan_in:>7} {fan_in * tweets_each:>8} {page:>5} | {join} | {timeline_ms:>13.3f} | {merge_ms:>10.3f}")
+
+                db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+'''
+Measures the in-memory follow graph. A large synthetic graph is laid out to show the
+bytes every follow costs, then following checks, follower pages and followee lists of
+the generated database are read from the graph and from the follows table. Run from the
+repository root with:
+
+    python -m benchmarks.follow_graph [--users 500000] [--follows 5000000] [--tweets 10000]
+'''
+import argparse
+import array
+import itertools
+import os
+import random
+import time
+
+import tui.core.Queries as Queries
+from tui.core.FollowGraph import FollowGraph
+from tui.core.RowCache import RowCache
+from benchmarks.frames import open_database, percentile
+
+# Users whose followers and followees are read per lookup kind
+SAMPLES = 2000
+
+
+def synthetic_graph(users, follows, seed):
+    '''
+    Returns a loaded FollowGraph of roughly follows follows between users users, a few
+    of them followed by many and most by a few
+    '''
+
+    rng = random.Random(seed)
+    weights = list(itertools.accumulate(1 / (rank + 1) ** 0.8 for rank in range(users)))
+
+    # Every user follows about the same number of others, picked by popularity
+    following_counts = array.array("q", bytes(8 * users))
+    following = array.array("i")
+    per_user = follows // users
+    for usr in range(users):
+        followees = sorted(set(rng.choices(range(users), cum_weights=weights, k=per_user)) - {usr})
+        following_counts[usr] = len(followees)
+        following.extend(followees)
+
+    # The other direction is the same follows counted and placed by followee
+    follower_counts = array.array("q", bytes(8 * users))
+    for flwee in following:
+        follower_counts[flwee] += 1
+    positions = array.array("q", [0])
+    positions.extend(itertools.accumulate(follower_counts))
+    followers = array.array("i", bytes(4 * len(following)))
+
+    # Followers come out in usr order as the follows are walked by flwer
+    starts = positions[:-1]
+    index = 0
+    for flwer, count in enumerate(following_counts):
+        for flwee in following[index:index + count]:
+            followers[starts[flwee]] = flwer
+            starts[flwee] += 1
+        index += count
+
+    graph = FollowGraph()
+    graph.following.build(following_counts, [following])
+    graph.followers.build(follower_counts, [followers])
+    graph.loaded = True
+    return graph
+
+
+def run_synthetic(args):
+    start = time.perf_counter()
+    graph = synthetic_graph(args.users, args.follows, args.seed)
+    print(f"laid out a synthetic graph in {time.perf_counter() - start:.1f}s")
+
+    stats = graph.stats()
+    per_follow = stats["bytes"] / stats["follows"]
+    print(f"{stats['users']} users, {stats['follows']} follows, {stats['bytes'] / 2 ** 20:.1f} MiB, "
+          f"{per_follow:.2f} bytes per follow with the users' offsets included")
+    print(f"100M follows between 10M users: {(8 * 100e6 + 16 * 10e6) / 2 ** 30:.2f} GiB\n")
+
+    rng = random.Random(args.seed)
+    probes = [(rng.randrange(args.users), rng.randrange(args.users)) for _ in range(100000)]
+    start = time.perf_counter()
+    for flwer, flwee in probes:
+        graph.is_following(flwer, flwee)
+    print(f"following checks: {(time.perf_counter() - start) / len(probes) * 1e6:.2f} us each")
+
+    start = time.perf_counter()
+    for flwer, flwee in probes[:20000]:
+        graph.add(flwer, flwee)
+    stats = graph.stats()
+    print(f"appended follows: {(time.perf_counter() - start) / 20000 * 1e6:.2f} us each, "
+          f"{stats['appended']} waiting to be merged, {stats['bytes'] / 2 ** 20:.1f} MiB\n")
+
+
+def time_lookups(lookup, users):
+    timings = []
+    for usr in users:
+        start = time.perf_counter()
+        lookup(usr)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def run_database(args):
+    os.makedirs(args.db_dir, exist_ok=True)
+    db = open_database(args.db_dir, args.tweets)
+    db.cache = RowCache(0)  # every SQL lookup reaches sqlite, as the graph lookups never touch it
+    cursor = db.cursor
+
+    graph = FollowGraph()
+    start = time.perf_counter()
+    graph.load(cursor)
+    stats = graph.stats()
+    print(f"loaded {stats['follows']} follows from the follows table in {(time.perf_counter() - start) * 1000:.1f} ms, "
+          f"{stats['bytes'] / 1024:.0f} KiB\n")
+
+    rng = random.Random(args.seed)
+    users = [usr for (usr,) in cursor.execute("SELECT usr FROM users;")]
+    sample = [rng.choice(users) for _ in range(SAMPLES)]
+    pairs = dict(zip(sample, (rng.choice(users) for _ in sample)))
+
+    lookups = {
+        "following check": (
+            lambda usr: cursor.execute(Queries.IS_FOLLOWING, (usr, pairs[usr])).fetchone(),
+            lambda usr: graph.is_following(usr, pairs[usr]),
+        ),
+        "followers page": (
+            lambda usr: cursor.execute(Queries.FOLLOWERS, (usr, -1)).fetchmany(11),
+            lambda usr: db.followers(usr, -1, 11),
+        ),
+        "followees": (
+            lambda usr: cursor.execute(Queries.FOLLOWEES, (usr,)).fetchall(),
+            lambda usr: graph.followees(usr),
+        ),
+    }
+
+    db.graph = graph
+    print(f"{'lookup':<16} {'sql p50 ms':>11} {'graph p50 ms':>13} {'sql p99 ms':>11} {'graph p99 ms':>13}")
+    for name, (sql, in_memory) in lookups.items():
+        sql_timings = time_lookups(sql, sample)
+        graph_timings = time_lookups(in_memory, sample)
+        print(f"{name:<16} {percentile(sql_timings, 0.5):>11.4f} {percentile(graph_timings, 0.5):>13.4f} "
+              f"{percentile(sql_timings, 0.99):>11.4f} {percentile(graph_timings, 0.99):>13.4f}")
+
+    db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-memory follow graph benchmark")
+    parser.add_argument("--users", type=int, default=500000, help="users of the synthetic graph")
+    parser.add_argument("--follows", type=int, default=5000000, help="follows of the synthetic graph")
+    parser.add_argument("--tweets", type=int, default=10000, help="tweet count of the generated database")
+    parser.add_argument("--db-dir", default="benchmarks/data", help="where generated databases are kept")
+    parser.add_argument("--seed", type=int, default=291)
+    args = parser.parse_args()
+
+    run_synthetic(args)
+    run_database(args)
+
+
+if __name__ == "__main__":
+    main()
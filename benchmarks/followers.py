@@ -0,0 +1,114 @@
+'''
+Compares listing every follower of a user, printed a line at a time, against the paged
+Display Followers frame, which reads one page of rows and writes the screen to the
+terminal in one go. Output goes to a line buffered sink like an interactive terminal's
+stdout, which counts how many writes reach it. Run from the repository root with:
+
+    python -m benchmarks.followers [follower_count]
+'''
+import io
+import os
+import sys
+import tempfile
+import time
+
+from tui.core import Database, FrameManager, TerminalIO
+from tui.core.models import UserCredential
+import tui.frames as frames
+
+REPEATS = 5
+
+# How followers were listed before paging, every row at once
+ALL_FOLLOWERS_QUERY = '''
+    SELECT flwer
+    FROM follows
+    WHERE flwee = ?
+'''
+
+
+class Sink(io.RawIOBase):
+    '''
+    Discards everything written to it, counting the writes like a terminal would see them
+    '''
+
+    def __init__(self):
+        self.writes = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.writes += 1
+        return len(data)
+
+
+def populate(db, follower_count):
+    '''
+    Fills the database with user 0 followed by follower_count users
+
+    :param db: A connected Database
+    :param follower_count: Number of followers to write
+    '''
+
+    users = ((usr, f"pwd{usr}", f"User {usr}", f"u{usr}@example.com", "Edmonton", -7) for usr in range(follower_count + 1))
+    db.connection.executemany("INSERT INTO users (usr, pwd, name, email, city, timezone) VALUES (?,?,?,?,?,?);", users)
+
+    follows = ((usr, 0, "2023-12-23") for usr in range(1, follower_count + 1))
+    db.connection.executemany("INSERT INTO follows (flwer, flwee, start_date) VALUES (?,?,?);", follows)
+    db.connection.commit()
+
+
+def best_of(fn):
+    '''
+    Returns the fastest of REPEATS runs of fn in milliseconds and the terminal writes it made
+    '''
+
+    timings = []
+    for _ in range(REPEATS):
+        sink = Sink()
+        sys.stdout = io.TextIOWrapper(sink, line_buffering=True)
+        try:
+            start = time.perf_counter()
+            fn()
+            sys.stdout.flush()
+            timings.append((time.perf_counter() - start) * 1000)
+        finally:
+            sys.stdout = sys.__stdout__
+    return min(timings), sink.writes
+
+
+def main():
+    follower_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = Database()
+        db.connect(os.path.join(tmp_dir, "followers.db"))
+        populate(db, follower_count)
+        db.user = UserCredential(0, "", "", "", "", 0)
+
+        def list_all():
+            followers = db.cursor.execute(ALL_FOLLOWERS_QUERY, (0,)).fetchall()
+            print("\nAll followers:\n")
+            for index, follower in enumerate(followers, 1):
+                print(f"{index}) {follower[0]}")
+            print(f"{len(followers) + 1}) Back")
+
+        frame_mgr = FrameManager(db, TerminalIO())
+
+        def list_page():
+            frames.ListFollowersFrame(frame_mgr).render()
+            frame_mgr.io.flush()
+
+        all_ms, all_writes = best_of(list_all)
+        page_ms, page_writes = best_of(list_page)
+
+        print(f"{follower_count} followers, {frames.ListFollowersFrame.PAGE_SIZE} per page\n")
+        print(f"{'listing':<16} | {'ms':>10} | {'writes':>8}")
+        print(f"{'all, per line':<16} | {all_ms:>10.3f} | {all_writes:>8}")
+        print(f"{'paged, buffered':<16} | {page_ms:>10.3f} | {page_writes:>8}")
+
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+'''
+Times the queries behind every frame on generated databases of increasing size and
+stores p50/p99 latencies as JSON so runs on different commits can be compared.
+Run from the repository root with:
+
+    python -m benchmarks.frames [--scales 10000 1000000 10000000] [--db-dir DIR]
+                                [--output results.json] [--compare baseline.json]
+
+Generated databases are kept in --db-dir and reused by later runs, the 10M tweet one
+takes a while to build.
+'''
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import time
+
+from tui.core import Database, FrameManager, ScriptedIO
+from tui.core.BulkImport import BulkImporter
+from tui.core.models import UserCredential
+from tui.utils.DataGenerator import DataGenerator, FIRST_NAMES, CITIES
+import tui.frames as frames
+
+DEFAULT_SCALES = [10000, 1000000]
+
+# A run slower than the baseline by more than this factor is reported as a regression
+REGRESSION_FACTOR = 1.2
+
+
+def open_database(db_dir, tweet_count):
+    '''
+    Opens the generated database of a scale, generating it on first use
+    '''
+
+    path = os.path.join(db_dir, f"generated-{tweet_count}.db")
+    exists = os.path.exists(path)
+
+    db = Database()
+    db.connect(path)
+
+    if not exists:
+        print(f"Generating {tweet_count} tweets into {path}")
+        start = time.perf_counter()
+        with BulkImporter(db, log=None) as importer:
+            for table, rows in DataGenerator(tweet_count).tables():
+                importer.load(table, rows)
+        print(f"Generated in {time.perf_counter() - start:.1f}s")
+
+    return db
+
+
+def frame_cases(db, rng):
+    '''
+    Returns a function per frame that picks random inputs and builds the frame to render
+    '''
+
+    user_count = db.cursor.execute("SELECT MAX(usr) FROM users;").fetchone()[0]
+    tweet_count = db.cursor.execute("SELECT MAX(tid) FROM tweets;").fetchone()[0] + 1
+    generator = DataGenerator(tweet_count, user_count)
+
+    def random_user():
+        return rng.randint(1, user_count)
+
+    def search_keywords():
+        # One to three words or hashtags, biased towards common ones like real searches
+        keywords = []
+        for _ in range(rng.randint(1, 3)):
+            if rng.random() < 0.4:
+                keywords.append("#" + generator.hashtags[int(rng.expovariate(1 / 50)) % len(generator.hashtags)])
+            else:
+                keywords.append(generator.vocabulary[int(rng.expovariate(1 / 500)) % len(generator.vocabulary)])
+        return " ".join(keywords)
+
+    def user_keyword():
+        return rng.choice([rng.choice(FIRST_NAMES), rng.choice(CITIES)[:4], f"{rng.choice(FIRST_NAMES)} "])
+
+    return {
+        "LoggedInFrame": lambda fm: frames.LoggedInFrame(fm),
+        "SearchForTweetFrame": lambda fm: frames.SearchForTweetFrame(fm, search_keywords()),
+        "UserSearchFrame": lambda fm: frames.UserSearchFrame(fm, user_keyword()),
+        "UserProfileFrame": lambda fm: frames.UserProfileFrame(fm, random_user()),
+        "ViewTweetFrame": lambda fm: frames.ViewTweetFrame(fm, rng.randrange(tweet_count)),
+        "ListFollowersFrame": lambda fm: frames.ListFollowersFrame(fm),
+    }, random_user
+
+
+def percentile(timings, fraction):
+    '''
+    Nearest-rank percentile of a list of timings
+    '''
+
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_scale(db, samples, seed):
+    '''
+    Renders every frame samples times with random inputs and summarizes the latencies
+    '''
+
+    rng = random.Random(seed)
+    cases, random_user = frame_cases(db, rng)
+    frame_mgr = FrameManager(db, ScriptedIO((), capture=False))
+    results = {}
+
+    for name, build in cases.items():
+        timings = []
+
+        for _ in range(samples):
+            db.user = UserCredential(random_user(), "", "", "", "", 0)
+            frame = build(frame_mgr)
+
+            start = time.perf_counter()
+            frame.render()
+            timings.append((time.perf_counter() - start) * 1000)
+
+        results[name] = {
+            "samples": samples,
+            "mean_ms": statistics.fmean(timings),
+            "p50_ms": percentile(timings, 0.50),
+            "p99_ms": percentile(timings, 0.99),
+        }
+        print(f"  {name:<20} p50 {results[name]['p50_ms']:>9.3f} ms   p99 {results[name]['p99_ms']:>9.3f} ms")
+
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results, baseline):
+    '''
+    Prints how every p50/p99 moved against a baseline run, flagging regressions
+    '''
+
+    print(f"\nCompared with {baseline['commit']}:")
+    regressions = 0
+
+    for scale, frame_results in results["scales"].items():
+        for name, stats in frame_results.items():
+            old = baseline["scales"].get(scale, {}).get(name)
+            if not old:
+                continue
+
+            for metric in ["p50_ms", "p99_ms"]:
+                ratio = stats[metric] / old[metric] if old[metric] else float("inf")
+                flag = "  REGRESSION" if ratio > REGRESSION_FACTOR else ""
+                regressions += bool(flag)
+                print(f"  {scale:>9} {name:<20} {metric} {old[metric]:>9.3f} -> {stats[metric]:>9.3f} ms ({ratio:.2f}x){flag}")
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Frame query latency benchmark")
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES, help="tweet counts to benchmark")
+    parser.add_argument("--db-dir", default="benchmarks/data", help="where generated databases are kept")
+    parser.add_argument("--samples", type=int, default=200, help="renders per frame and scale")
+    parser.add_argument("--seed", type=int, default=291)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    args = parser.parse_args()
+
+    os.makedirs(args.db_dir, exist_ok=True)
+
+    results = {
+        "commit": git_commit(),
+        "sqlite_version": sqlite3.sqlite_version,
+        "python_version": platform.python_version(),
+        "scales": {},
+    }
+
+    for tweet_count in args.scales:
+        db = open_database(args.db_dir, tweet_count)
+        print(f"\n{tweet_count} tweets:")
+        results["scales"][str(tweet_count)] = run_scale(db, args.samples, args.seed)
+        db.close()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            if compare(results, json.load(f)):
+                raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+'''
+Measures what query instrumentation costs per query, comparing a primary key lookup
+through a plain cursor and an InstrumentedCursor, then runs the scripted sessions of
+benchmarks.sessions with metrics on and prints the queries that took the most time.
+Whole sessions vary by more than the overhead from run to run, so they are not used
+to measure it. Run from the repository root with:
+
+    python -m benchmarks.instrumentation [--sessions 1000] [--tweets 10000] [--output metrics.prom]
+'''
+import argparse
+import os
+import time
+
+from tui.core import Database
+from tui.core.Metrics import InstrumentedCursor, Metrics
+from benchmarks.frames import open_database
+from benchmarks.sessions import run
+
+REPEATS = 3
+LOOKUPS = 20000
+
+
+def lookup_seconds(cursor, user_count):
+    '''
+    Returns the mean seconds of a user lookup by primary key through cursor
+    '''
+
+    start = time.perf_counter()
+    for i in range(LOOKUPS):
+        cursor.execute("SELECT name FROM users WHERE usr = ?;", (i % user_count + 1,))
+        cursor.fetchone()
+    return (time.perf_counter() - start) / LOOKUPS
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query instrumentation overhead")
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--tweets", type=int, default=10000, help="tweet count of the generated database")
+    parser.add_argument("--db-dir", default="benchmarks/data", help="where generated databases are kept")
+    parser.add_argument("--output", help="write the metrics of the instrumented runs to this file")
+    parser.add_argument("--seed", type=int, default=291)
+    args = parser.parse_args()
+
+    os.makedirs(args.db_dir, exist_ok=True)
+    source = open_database(args.db_dir, args.tweets)
+    path = source.connection.execute("PRAGMA database_list;").fetchone()[2]
+    source.close()
+
+    db = Database()
+    db.connect(path)
+    user_count = db.cursor.execute("SELECT MAX(usr) FROM users;").fetchone()[0]
+    plain = db.reader.cursor()
+    instrumented = InstrumentedCursor(db.reader.cursor(), Metrics())
+
+    # Alternating the two keeps drift in machine load from favouring either
+    best = {"off": float("inf"), "on": float("inf")}
+    for _ in range(REPEATS):
+        best["off"] = min(best["off"], lookup_seconds(plain, user_count))
+        best["on"] = min(best["on"], lookup_seconds(instrumented, user_count))
+    db.close()
+
+    print(f"primary key lookup, metrics off: {best['off'] * 1e6:.2f} us")
+    print(f"primary key lookup, metrics on:  {best['on'] * 1e6:.2f} us ({(best['on'] - best['off']) * 1e6:+.2f} us per query)")
+
+    metrics = Metrics()
+    db = Database(metrics)
+    db.connect(path)
+    elapsed, _ = run(db, args.sessions, False, args.seed)
+    db.close()
+
+    queries = sum(stats["calls"] for stats in metrics.snapshot().values())
+    print(f"\n{args.sessions} instrumented sessions made {queries / args.sessions:.1f} queries each, "
+          f"{(best['on'] - best['off']) * queries / elapsed * 100:.2f}% of their time is instrumentation")
+
+    print(f"\n{'query':<60} {'calls':>7} {'rows':>8} {'total ms':>9} {'p50 ms':>7} {'p99 ms':>7}")
+    snapshot = metrics.snapshot()
+    for name, stats in sorted(snapshot.items(), key=lambda item: -item[1]["total_ms"])[:10]:
+        print(f"{name[:60]:<60} {stats['calls']:>7} {stats['rows']:>8} {stats['total_ms']:>9.1f} {stats['p50_ms']:>7.2f} {stats['p99_ms']:>7.2f}")
+
+    if args.output:
+        metrics.dump(args.output)
+        print(f"\nMetrics written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
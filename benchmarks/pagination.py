@@ -0,0 +1,177 @@
+'''
+Compares ways of paging a home timeline holding a million tweets and retweets from the
+accounts one user follows: LIMIT/OFFSET over the followees' tweets and retweets, a
+keyset applied after GROUP BY, the keyset seek into the materialized timeline table the
+home page reads, and the keyset seek into every followee's stream that the merged feed
+makes. Run from the repository root with:
+
+    python -m benchmarks.pagination [row_count]
+'''
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+import tui.core.FeedMerge as FeedMerge
+import tui.core.Queries as Queries
+from tui.core import Database
+from tui.core.BulkImport import BulkImporter
+
+PAGE_SIZE = 5
+PAGES = [1, 10, 200, 2000, 20000, 100000]
+REPEATS = 3
+
+# Accounts the reader follows, and the share of the feed that is retweets
+FOLLOWEES = 200
+RETWEET_SHARE = 0.05
+
+# The reader whose home timeline is paged
+READER = 0
+
+# Every tweet and retweet of the followees dated by its latest appearance, computed in full
+# and then skipped through with OFFSET
+OFFSET_QUERY = '''
+    SELECT t.tid, t.text, t.tdate, t.writer, MAX(s.sort_date) AS sort_date
+    FROM (
+        SELECT t.tid, t.tdate AS sort_date
+        FROM follows f JOIN tweets t ON t.writer = f.flwee
+        WHERE f.flwer = ?
+        UNION ALL
+        SELECT r.tid, r.rdate
+        FROM follows f JOIN retweets r ON r.usr = f.flwee
+        WHERE f.flwer = ?
+    ) s
+    JOIN tweets t ON t.tid = s.tid
+    GROUP BY t.tid
+    ORDER BY sort_date DESC, t.tid DESC
+    LIMIT ?, ?;
+'''
+
+# The same rows with the keyset applied in HAVING, so every page still groups the whole feed
+# before it can seek
+HAVING_QUERY = '''
+    SELECT t.tid, t.text, t.tdate, t.writer, MAX(s.sort_date) AS sort_date
+    FROM (
+        SELECT t.tid, t.tdate AS sort_date
+        FROM follows f JOIN tweets t ON t.writer = f.flwee
+        WHERE f.flwer = ?
+        UNION ALL
+        SELECT r.tid, r.rdate
+        FROM follows f JOIN retweets r ON r.usr = f.flwee
+        WHERE f.flwer = ?
+    ) s
+    JOIN tweets t ON t.tid = s.tid
+    GROUP BY t.tid
+    HAVING (sort_date, t.tid) < (?, ?)
+    ORDER BY sort_date DESC, t.tid DESC
+    LIMIT ?;
+'''
+
+# The (sort_ts, tid) key of the last row before a page, to start the keyset pages from
+PAGE_START = '''
+    SELECT sort_ts, tid FROM timeline WHERE owner = ?
+    ORDER BY sort_ts DESC, tid DESC
+    LIMIT 1 OFFSET ?;
+'''
+
+
+def populate(db, row_count, seed=291):
+    '''
+    Fills the database with a reader following FOLLOWEES accounts who between them wrote
+    and retweeted row_count tweets
+
+    :param db: A connected Database
+    :param row_count: Number of tweets and retweets in the reader's home timeline
+    '''
+
+    rng = random.Random(seed)
+    first_day = datetime.date(2000, 1, 1)
+    retweet_count = int(row_count * RETWEET_SHARE)
+    tweet_count = row_count - retweet_count
+
+    users = [(usr, "pwd", f"User {usr}", f"u{usr}@example.com", "Edmonton", -7) for usr in range(FOLLOWEES + 1)]
+    follows = [(READER, flwee, "2000-01-01") for flwee in range(1, FOLLOWEES + 1)]
+
+    # Several tweets share each day so the tid tie-breaker is exercised
+    tweets = ((tid, 1 + tid % FOLLOWEES, (first_day + datetime.timedelta(days=tid * 3650 // tweet_count)).isoformat(),
+               f"tweet number {tid}", None)
+              for tid in range(tweet_count))
+
+    # Retweets bump older tweets up the feed, some of them more than once
+    retweets = {}
+    while len(retweets) < retweet_count:
+        usr, tid = rng.randint(1, FOLLOWEES), rng.randrange(tweet_count)
+        day = tid * 3650 // tweet_count + rng.randint(1, 365)
+        retweets[(usr, tid)] = (first_day + datetime.timedelta(days=day)).isoformat()
+
+    with BulkImporter(db, log=None) as importer:
+        importer.load("users", users)
+        importer.load("follows", follows)
+        importer.load("tweets", tweets)
+        importer.load("retweets", ((usr, tid, rdate) for (usr, tid), rdate in retweets.items()))
+
+
+def best_of(fn):
+    '''
+    Returns the fastest of REPEATS runs of fn in milliseconds
+    '''
+
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def main():
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = Database()
+        db.connect(os.path.join(tmp_dir, "pagination.db"))
+        populate(db, row_count)
+        db.acquire()
+        cursor = db.cursor
+
+        feed_rows = cursor.execute("SELECT COUNT(*) FROM timeline WHERE owner = ?;", (READER,)).fetchone()[0]
+        print(f"{feed_rows} tweets on the home timeline of a user following {FOLLOWEES} accounts, {PAGE_SIZE} per page\n")
+        print(f"{'page':>8} | {'offset (ms)':>12} | {'having (ms)':>12} | {'timeline (ms)':>14} | {'merge (ms)':>11}")
+
+        for page in PAGES:
+            offset = (page - 1) * PAGE_SIZE
+            if offset >= feed_rows:
+                break
+
+            # The key a reader carries over from the previous page is the last row shown on it
+            if page == 1:
+                after = ("9999-12-31", 2 ** 63 - 1)
+            else:
+                after = cursor.execute(PAGE_START, (READER, offset - 1)).fetchone()
+
+            def offset_page():
+                return cursor.execute(OFFSET_QUERY, (READER, READER, offset, PAGE_SIZE + 1)).fetchall()
+
+            def having_page():
+                return cursor.execute(HAVING_QUERY, (READER, READER, *after, PAGE_SIZE + 1)).fetchall()
+
+            def timeline_page():
+                return cursor.execute(Queries.HOME_FEED, (READER, *after)).fetchall()
+
+            def merge_page():
+                return FeedMerge.merge_feed(cursor, READER, after)
+
+            # Every strategy must land on exactly the same tweets at the same dates
+            pages = [offset_page(), having_page(), timeline_page(), merge_page()]
+            assert all([(row[0], row[4]) for row in rows] == [(row[0], row[4]) for row in pages[0]] for rows in pages)
+
+            timings = [best_of(fn) for fn in (offset_page, having_page, timeline_page, merge_page)]
+            print(f"{page:>8} | {timings[0]:>12.3f} | {timings[1]:>12.3f} | {timings[2]:>14.3f} | {timings[3]:>11.3f}")
+
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+'''
+Measures how long Next Page takes to show up with and without prefetching. Scripted
+users page through their home feed and through tweet searches, pausing on every page
+as if reading it, and the time from picking Next Page to the next prompt is recorded.
+Searches use keywords too short for the full-text index, whose pages come from a scan
+of every tweet and gain the most from being fetched ahead. Run from the repository
+root with:
+
+    python -m benchmarks.prefetch [--sessions 30] [--pages 4] [--think-ms 50] [--tweets 10000]
+'''
+import argparse
+import os
+import random
+import time
+
+from tui.core import Database, FrameManager, ScriptedIO, select
+from tui.core.Prefetcher import Prefetcher
+from tui.frames import EntryFrame
+from tui.utils.DataGenerator import DataGenerator
+from benchmarks.frames import open_database, percentile
+
+
+def timed(script, think, latencies):
+    '''
+    Wraps scripted responses so every response waits think seconds before being given,
+    and the time from a labelled response to the following prompt is recorded.
+
+    :param script: List of (label or None, response) tuples
+    :param think: Seconds the user spends reading each screen
+    :param latencies: Dictionary of lists of seconds by label, appended to
+    '''
+
+    answered = [None, None]  # label and time of the last labelled response
+
+    def wrap(label, response):
+        def answer(screen):
+            if answered[0] is not None:
+                latencies.setdefault(answered[0], []).append(time.perf_counter() - answered[1])
+                answered[0] = None
+
+            time.sleep(think)
+            text = response(screen) if callable(response) else response
+            if label:
+                answered[:] = [label, time.perf_counter()]
+            return text
+
+        return answer
+
+    return [wrap(label, response) for label, response in script]
+
+
+def session_script(rng, user_count, vocabulary, pages):
+    '''
+    Returns the (label, response) steps of one session paging through its feed and a search
+    '''
+
+    usr = rng.randint(1, user_count)
+    keyword = rng.choice([word for word in vocabulary if len(word) == 2])
+    next_page = select("Next Page", "0")
+
+    return [
+        (None, "1"), (None, str(usr)), (None, f"pwd{usr}"),  # login
+        *[("feed", next_page) for _ in range(pages)],
+        (None, select("Log out")), (None, "1"), (None, str(usr)), (None, f"pwd{usr}"),  # back to the first page
+        (None, "2"), (None, keyword),  # search
+        *[("search", next_page) for _ in range(pages)],
+        (None, select("Back")), (None, select("Log out")), (None, "3"),
+    ]
+
+
+def run(path, scripts, think, threads):
+    '''
+    Runs the scripts with the given number of prefetch threads.
+
+    :return: A tuple of the latencies by label and the prefetcher's stats
+    '''
+
+    db = Database()
+    db.connect(path)
+    db.prefetcher.close()
+    db.prefetcher = Prefetcher(db.pool, threads)
+
+    latencies = {}
+    for script in scripts:
+        frame_mgr = FrameManager(db, ScriptedIO(timed(script, think, latencies), capture=False))
+        frame_mgr.run(EntryFrame(frame_mgr))
+
+    stats = db.prefetcher.stats()
+    db.close()
+    return latencies, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Next page latency with and without prefetching")
+    parser.add_argument("--sessions", type=int, default=30)
+    parser.add_argument("--pages", type=int, default=4, help="Next Page presses per feed and search")
+    parser.add_argument("--think-ms", type=float, default=50, help="time spent reading each screen")
+    parser.add_argument("--tweets", type=int, default=10000, help="tweet count of the generated database")
+    parser.add_argument("--db-dir", default="benchmarks/data", help="where generated databases are kept")
+    parser.add_argument("--seed", type=int, default=291)
+    args = parser.parse_args()
+
+    os.makedirs(args.db_dir, exist_ok=True)
+    db = open_database(args.db_dir, args.tweets)
+    path = db.connection.execute("PRAGMA database_list;").fetchone()[2]
+    user_count = db.cursor.execute("SELECT MAX(usr) FROM users;").fetchone()[0]
+    db.close()
+
+    rng = random.Random(args.seed)
+    vocabulary = DataGenerator(args.tweets, user_count).vocabulary[:200]
+    scripts = [session_script(rng, user_count, vocabulary, args.pages) for _ in range(args.sessions)]
+
+    print(f"{'prefetch':<9} {'page':<7} {'nexts':>6} {'p50 ms':>8} {'p99 ms':>8} {'mean ms':>8}")
+    for threads in [0, 1]:
+        latencies, stats = run(path, scripts, args.think_ms / 1000, threads)
+        for label, timings in latencies.items():
+            timings = [seconds * 1000 for seconds in timings]
+            print(f"{'on' if threads else 'off':<9} {label:<7} {len(timings):>6} {percentile(timings, 0.5):>8.3f} "
+                  f"{percentile(timings, 0.99):>8.3f} {sum(timings) / len(timings):>8.3f}")
+        if threads:
+            print(f"\nprefetches: {stats}")
+
+
+if __name__ == "__main__":
+    main()
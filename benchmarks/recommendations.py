@@ -0,0 +1,131 @@
+'''
+Compares four ways of finding a user's who to follow suggestions: one query per followee
+for its followers, a single GROUP BY statement over every two hop path, counting over the
+in-memory follow graph as manage.py recommend does, and reading the precomputed rows as
+the Who to Follow frame does. Users are sampled from those following the most accounts
+and from everyone. Also times a full refresh of the recommendations table. Run from the
+repository root with:
+
+    python -m benchmarks.recommendations [--samples 200] [--tweets 10000]
+'''
+import argparse
+import collections
+import os
+import random
+import tempfile
+import time
+
+import tui.core.Queries as Queries
+import tui.core.Recommendations as Recommendations
+import tui.core.TextSearch as TextSearch
+from tui.core import Database
+from tui.core.FollowGraph import FollowGraph
+from benchmarks.frames import open_database, percentile
+
+# Followers of one account, the statement the per followee approach runs for every followee
+FOLLOWERS_OF = "SELECT flwer FROM follows WHERE flwee = ?;"
+FOLLOWEES_OF = "SELECT flwee FROM follows WHERE flwer = ?;"
+
+# Every suggestion of a JSON array of users in one statement, with the followee pairs counted
+# and ranked by sqlite rather than in Python
+GROUP_BY_QUERY = '''
+    SELECT usr, rank, candidate, shared FROM (
+        SELECT usr, candidate, shared,
+        ROW_NUMBER() OVER (PARTITION BY usr ORDER BY shared DESC, candidate) AS rank
+        FROM (
+            SELECT u.flwer AS usr, c.flwer AS candidate, COUNT(*) AS shared
+            FROM follows u
+            JOIN user_stats s ON s.usr = u.flwee AND s.followers <= :hub_followers
+            JOIN follows c ON c.flwee = u.flwee AND c.flwer != u.flwer
+            WHERE u.flwer IN (SELECT value FROM json_each(:users))
+            GROUP BY u.flwer, c.flwer
+        )
+        WHERE NOT EXISTS (SELECT 1 FROM follows f WHERE f.flwer = usr AND f.flwee = candidate)
+    )
+    WHERE rank <= :per_user;
+'''
+
+
+def per_followee(cursor, usr):
+    '''
+    Counts followees in common with one query per followee, the approach the graph counting replaces
+    '''
+
+    followees = {flwee for (flwee,) in cursor.execute(FOLLOWEES_OF, (usr,))}
+    shared = collections.Counter()
+    for flwee in followees:
+        shared.update(flwer for (flwer,) in cursor.execute(FOLLOWERS_OF, (flwee,)) if flwer != usr)
+    ranked = sorted((-count, candidate) for candidate, count in shared.items() if candidate not in followees)
+    return ranked[:Recommendations.PER_USER]
+
+
+def group_by(cursor, usr):
+    return cursor.execute(GROUP_BY_QUERY, {
+        "users": TextSearch.json_list([usr]),
+        "hub_followers": Recommendations.HUB_FOLLOWERS,
+        "per_user": Recommendations.PER_USER,
+    }).fetchall()
+
+
+def precomputed(cursor, usr):
+    return cursor.execute(Queries.RECOMMENDATIONS, (usr,)).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Who to follow suggestions benchmark")
+    parser.add_argument("--samples", type=int, default=200, help="users timed per group")
+    parser.add_argument("--tweets", type=int, default=10000, help="tweet count of the generated database")
+    parser.add_argument("--db-dir", default="benchmarks/data", help="where generated databases are kept")
+    parser.add_argument("--seed", type=int, default=291)
+    args = parser.parse_args()
+
+    os.makedirs(args.db_dir, exist_ok=True)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # The refresh writes, so it runs on a copy of the generated database
+        source = open_database(args.db_dir, args.tweets)
+        path = os.path.join(tmp_dir, "recommendations.db")
+        source.snapshot_to(path)
+        source.close()
+
+        db = Database()
+        db.connect(path)
+
+        start = time.perf_counter()
+        users, suggestions = db.refresh_recommendations()
+        print(f"refresh of {users} users with the follow graph loaded for it: {time.perf_counter() - start:.2f}s")
+
+        graph = FollowGraph()
+        graph.load(db.cursor)
+
+        rng = random.Random(args.seed)
+        cursor = db.cursor
+        by_following = cursor.execute("SELECT usr FROM user_stats ORDER BY following DESC;").fetchall()
+        groups = {
+            "most following": [usr for (usr,) in by_following[:args.samples]],
+            "everyone": [usr for (usr,) in rng.sample(by_following, min(args.samples, len(by_following)))],
+        }
+
+        print(f"\n{'users':<15} {'following':>10} {'approach':<13} {'p50 ms':>9} {'p99 ms':>9}")
+        for group, users in groups.items():
+            following = sum(cursor.execute(Queries.USER_STATS, (usr,)).fetchone()[1] for usr in users) / len(users)
+            approaches = [
+                ("per followee", per_followee),
+                ("group by", group_by),
+                ("graph", lambda cursor, usr: Recommendations.score(graph, usr)),
+                ("precomputed", precomputed),
+            ]
+            for name, approach in approaches:
+                timings = []
+                for usr in users:
+                    start = time.perf_counter()
+                    approach(cursor, usr)
+                    timings.append((time.perf_counter() - start) * 1000)
+                print(f"{group:<15} {following:>10.0f} {name:<13} {percentile(timings, 0.5):>9.3f} "
+                      f"{percentile(timings, 0.99):>9.3f}")
+
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
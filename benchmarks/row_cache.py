@@ -0,0 +1,136 @@
+'''
+Replays browsing sessions with and without the row cache and reports the queries made
+per navigation and the cache's hit rate. Each session logs in, searches a popular
+hashtag, opens and retweets a result, pages through the results and opens more of them,
+then searches for a user, pages through their profile, follows them and opens their
+profile again. Run from the repository root with:
+
+    python -m benchmarks.row_cache [--sessions 500] [--tweets 10000]
+
+The sessions write retweets and follows, so each mode runs on its own copy of the
+generated database.
+'''
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from tui.core import Database, FrameManager, ScriptedIO, select
+from tui.core.Metrics import Metrics
+from tui.core.RowCache import RowCache, DEFAULT_MAX_ENTRIES
+from tui.frames import EntryFrame
+from tui.utils.DataGenerator import DataGenerator, FIRST_NAMES
+from benchmarks.frames import open_database
+
+# Invalid options do nothing, so they stand in for options a screen does not have
+NO_OP = "0"
+
+# Statements served through the row cache, the rest always query
+CACHED_QUERIES = ["tweet", "tweet_stats", "has_retweeted", "user_name", "user_stats", "is_following"]
+
+
+def session_script(rng, user_count, hashtags):
+    '''
+    Returns the responses a user gives during one browsing session
+    '''
+
+    usr = rng.randint(1, user_count)
+    back = select("Back")
+    return [
+        "1", str(usr), f"pwd{usr}",  # login
+        "2", "#" + rng.choice(hashtags),  # search for a popular hashtag
+        "1", select("Retweet this tweet", NO_OP), back,  # open the first result and retweet it
+        "2", back,  # open the second result
+        select("Next Page", NO_OP), "1", back,  # open the first result of the next page, back to the first page
+        "1", back,  # open the first result again
+        back,  # home
+        "3", rng.choice(FIRST_NAMES),  # search for users
+        "1",  # open the first result's profile
+        select("Next Page", NO_OP), select("Prev Page", NO_OP),  # page through their tweets
+        select("Follow User", NO_OP),
+        back, "1", back, back,  # back to the results, open the profile again, then home
+        select("Log out"),
+        "3",  # exit
+    ]
+
+
+def run(path, scripts, mode):
+    '''
+    Replays the scripts on the database at path.
+
+    :param mode: "off" caches nothing, "session" gives every session its own cache and
+    "shared" shares one cache between all of them like the server does
+
+    :return: A tuple of the seconds taken, the navigations, the Metrics and the cache stats
+    '''
+
+    metrics = Metrics()
+    shared = RowCache(0 if mode == "off" else DEFAULT_MAX_ENTRIES)
+    db = Database(metrics, shared)
+    db.connect(path)
+
+    navigations = 0
+    caches = [shared]
+    start = time.perf_counter()
+    for script in scripts:
+        if mode == "session":
+            db.cache = RowCache()
+            caches.append(db.cache)
+
+        io = ScriptedIO(script)
+        frame_mgr = FrameManager(db, io)
+        frame_mgr.run(EntryFrame(frame_mgr))
+        navigations += len(io.screens)
+    elapsed = time.perf_counter() - start
+    db.close()
+
+    # Adds up the counters of every cache the sessions used
+    stats = {"hits": 0, "misses": 0}
+    for cache in caches:
+        for counter in stats:
+            stats[counter] += cache.stats()[counter]
+
+    return elapsed, navigations, metrics, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Row cache replay benchmark")
+    parser.add_argument("--sessions", type=int, default=500)
+    parser.add_argument("--tweets", type=int, default=10000, help="tweet count of the generated database")
+    parser.add_argument("--db-dir", default="benchmarks/data", help="where generated databases are kept")
+    parser.add_argument("--seed", type=int, default=291)
+    args = parser.parse_args()
+
+    os.makedirs(args.db_dir, exist_ok=True)
+    source = open_database(args.db_dir, args.tweets)
+    source_path = source.connection.execute("PRAGMA database_list;").fetchone()[2]
+    user_count = source.cursor.execute("SELECT MAX(usr) FROM users;").fetchone()[0]
+    source.close()
+
+    # The most used hashtags, so searches have results to open and sessions look at the same tweets
+    hashtags = DataGenerator(args.tweets, user_count).hashtags[:20]
+    rng = random.Random(args.seed)
+    scripts = [session_script(rng, user_count, hashtags) for _ in range(args.sessions)]
+
+    print(f"{'cache':<8} {'navigations':>11} {'queries':>8} {'per nav':>8} {'cached queries':>15} {'hit rate':>9} {'seconds':>8}")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for mode in ["off", "session", "shared"]:
+            path = os.path.join(tmp_dir, f"replay-{mode}.db")
+            shutil.copyfile(source_path, path)
+
+            elapsed, navigations, metrics, stats = run(path, scripts, mode)
+            snapshot = metrics.snapshot()
+            queries = sum(query["calls"] for query in snapshot.values())
+            cached_queries = sum(snapshot[name]["calls"] for name in CACHED_QUERIES if name in snapshot)
+            lookups = stats["hits"] + stats["misses"]
+            hit_rate = stats["hits"] / lookups if mode != "off" and lookups else 0.0
+
+            print(f"{mode:<8} {navigations:>11} {queries:>8} {queries / navigations:>8.2f} "
+                  f"{cached_queries:>15} {hit_rate:>9.1%} {elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+'''
+Load-tests server.py with many concurrent telnet-style clients, each running the
+scripted sessions from benchmarks.sessions one after another, and reports completed
+sessions, requests per second and per-request latency for each concurrency level.
+A request is one line sent until the server's next prompt arrives.
+Run from the repository root with:
+
+    python -m benchmarks.server_load [--clients 1 100 1000] [--sessions-per-client 3]
+                                     [--workers 8] [--tweets 10000]
+
+A server is started on the generated database for every concurrency level unless
+--port points at one that is already running.
+'''
+import argparse
+import asyncio
+import os
+import random
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+from tui.core.FrameIO import Screen
+from tui.core.Server import GO_AHEAD
+from tui.utils.DataGenerator import DataGenerator
+from benchmarks.frames import open_database, percentile
+from benchmarks.sessions import session_script
+
+DEFAULT_CLIENTS = [1, 100, 1000]
+
+OPTION_LINE = re.compile(r"^(\d+)\) (.*)$", re.MULTILINE)
+
+
+async def read_prompt(reader):
+    '''
+    Returns everything the server sent up to its next prompt, or up to the end of the
+    connection once the session is over
+    '''
+
+    try:
+        data = await reader.readuntil(GO_AHEAD)
+    except asyncio.IncompleteReadError as error:
+        data = error.partial
+    return data.decode(errors="replace")
+
+
+async def run_client(host, port, scripts, latencies):
+    '''
+    Runs each script as its own session and records the latency of every request.
+    Returns how many sessions finished.
+    '''
+
+    finished = 0
+
+    for script in scripts:
+        reader, writer = await asyncio.open_connection(host, port, limit=2 ** 20)
+        screen = Screen(None)
+
+        try:
+            text = await read_prompt(reader)
+            for step, response in enumerate(script):
+                if not text:
+                    raise ConnectionError(f"Server ended the session before step {step}")
+
+                # A rendered frame replaces the options of the last one
+                options = OPTION_LINE.findall(text)
+                if options:
+                    screen.options = dict(options)
+
+                if callable(response):
+                    response = response(screen)
+
+                start = time.perf_counter()
+                writer.write(f"{response}\r\n".encode())
+                text = await read_prompt(reader)
+                latencies.append((time.perf_counter() - start) * 1000)
+
+            finished += 1
+        finally:
+            writer.close()
+
+    return finished
+
+
+async def run_level(host, port, client_scripts):
+    '''
+    Runs every client concurrently and returns the finished session count, failed
+    client count, elapsed seconds and request latencies
+    '''
+
+    latencies = []
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(run_client(host, port, scripts, latencies) for scripts in client_scripts),
+        return_exceptions=True,
+    )
+    elapsed = time.perf_counter() - start
+
+    finished = sum(result for result in results if isinstance(result, int))
+    failed = sum(1 for result in results if isinstance(result, BaseException))
+    return finished, failed, elapsed, latencies
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(db_path, port, workers, max_sessions):
+    '''
+    Starts server.py in its own process and waits until it accepts connections
+    '''
+
+    server = subprocess.Popen(
+        [sys.executable, "server.py", db_path, "--port", str(port),
+         "--workers", str(workers), "--max-sessions", str(max_sessions)],
+        stdout=subprocess.DEVNULL,
+    )
+
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port)).close()
+            return server
+        except ConnectionRefusedError:
+            time.sleep(0.1)
+
+    server.kill()
+    raise RuntimeError("server.py did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent client load test for server.py")
+    parser.add_argument("--clients", type=int, nargs="+", default=DEFAULT_CLIENTS, help="concurrency levels")
+    parser.add_argument("--sessions-per-client", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=8, help="worker slots of the started server")
+    parser.add_argument("--tweets", type=int, default=10000, help="tweet count of the generated database")
+    parser.add_argument("--db-dir", default="benchmarks/data", help="where generated databases are kept")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="load an already running server instead of starting one")
+    parser.add_argument("--seed", type=int, default=291)
+    args = parser.parse_args()
+
+    os.makedirs(args.db_dir, exist_ok=True)
+    db = open_database(args.db_dir, args.tweets)
+    user_count = db.cursor.execute("SELECT MAX(usr) FROM users;").fetchone()[0]
+    vocabulary = DataGenerator(args.tweets, user_count).vocabulary[:200]
+    db_path = db.connection.execute("PRAGMA database_list;").fetchone()[2]
+    db.close()
+
+    rng = random.Random(args.seed)
+
+    print(f"{'clients':>8} {'sessions':>9} {'failed':>7} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'mean ms':>9}")
+    for clients in args.clients:
+        client_scripts = [
+            [session_script(rng, user_count, vocabulary) for _ in range(args.sessions_per_client)]
+            for _ in range(clients)
+        ]
+
+        port = args.port or free_port()
+        # One extra session for the connection start_server uses to check the server is up
+        server = None if args.port else start_server(db_path, port, args.workers, clients + 1)
+        try:
+            finished, failed, elapsed, latencies = asyncio.run(run_level(args.host, port, client_scripts))
+        finally:
+            if server:
+                server.terminate()
+                server.wait()
+
+        if not latencies:
+            print(f"{clients:>8} {finished:>9} {failed:>7}   no requests completed")
+            continue
+
+        print(
+            f"{clients:>8} {finished:>9} {failed:>7} {len(latencies) / elapsed:>9.0f} "
+            f"{percentile(latencies, 0.50):>9.2f} {percentile(latencies, 0.99):>9.2f} "
+            f"{statistics.fmean(latencies):>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
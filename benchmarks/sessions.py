@@ -0,0 +1,92 @@
+'''
+Drives complete scripted sessions through the frames in-process, with no terminal,
+and reports how many sessions per second one process can run. Each session logs in
+as a random user, pages through the home feed, searches for tweets and users, opens
+a profile, lists followers and logs out. Run from the repository root with:
+
+    python -m benchmarks.sessions [--tweets 10000] [--sessions 2000] [--capture]
+
+--capture records every screen as structured output, otherwise output is discarded.
+The generated database is shared with benchmarks.frames.
+'''
+import argparse
+import os
+import random
+import time
+
+from tui.core import FrameManager, ScriptedIO, select
+from tui.frames import EntryFrame
+from tui.utils.DataGenerator import DataGenerator, FIRST_NAMES
+from benchmarks.frames import open_database
+
+
+def session_script(rng, user_count, vocabulary):
+    '''
+    Returns the responses a user gives during one session
+    '''
+
+    usr = rng.randint(1, user_count)
+    back = select("Back")
+    return [
+        "1", str(usr), f"pwd{usr}",  # login
+        select("Next Page", "0"), select("Prev Page", "0"),  # page through the home feed if it has pages
+        "2", " ".join(rng.sample(vocabulary, 2)),  # search for tweets
+        back,
+        "3", rng.choice(FIRST_NAMES),  # search for users
+        "1",  # open the first result's profile
+        back, back,  # back to the results, then the home page
+        "4",  # followers
+        back,
+        "99",  # invalid option
+        select("Log out"),
+        "3",  # exit
+    ]
+
+
+def run(db, sessions, capture, seed):
+    '''
+    Runs the sessions one after another against db and returns the elapsed seconds
+    and the io of the last session
+    '''
+
+    rng = random.Random(seed)
+    user_count = db.cursor.execute("SELECT MAX(usr) FROM users;").fetchone()[0]
+    tweet_count = db.cursor.execute("SELECT MAX(tid) FROM tweets;").fetchone()[0] + 1
+    vocabulary = DataGenerator(tweet_count, user_count).vocabulary[:200]
+    scripts = [session_script(rng, user_count, vocabulary) for _ in range(sessions)]
+
+    start = time.perf_counter()
+    for script in scripts:
+        io = ScriptedIO(script, capture=capture)
+        frame_mgr = FrameManager(db, io)
+        frame_mgr.run(EntryFrame(frame_mgr))
+    elapsed = time.perf_counter() - start
+
+    return elapsed, io
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scripted session throughput benchmark")
+    parser.add_argument("--tweets", type=int, default=10000, help="tweet count of the generated database")
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--db-dir", default="benchmarks/data", help="where generated databases are kept")
+    parser.add_argument("--capture", action="store_true", help="record every screen as structured output")
+    parser.add_argument("--seed", type=int, default=291)
+    args = parser.parse_args()
+
+    os.makedirs(args.db_dir, exist_ok=True)
+    db = open_database(args.db_dir, args.tweets)
+
+    elapsed, io = run(db, args.sessions, args.capture, args.seed)
+    print(f"{args.sessions} sessions in {elapsed:.2f}s: {args.sessions / elapsed:,.0f} sessions/s")
+
+    if args.capture:
+        print("\nScreens of the last session:")
+        for screen in io.screens[1:]:
+            print(f"  {screen.frame:<20} {len(screen.lines):>3} line(s)  inputs {[response for _, response in screen.inputs]}")
+
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+'''
+Compares read-heavy frame renders on the normal WAL connections against the same data
+opened as an immutable, memory mapped snapshot. Every read-only frame is rendered with
+the same random inputs in both modes, alternating between the modes round by round so
+neither gets a warmer machine. The row cache and prefetching are off so every render
+reaches SQLite on the thread being timed.
+Run from the repository root with:
+
+    python -m benchmarks.snapshot [--samples 300] [--rounds 5] [--tweets 10000]
+'''
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from tui.core import Database, FrameManager, ScriptedIO
+from tui.core.models import UserCredential
+from tui.core.RowCache import RowCache
+from tui.core.Prefetcher import Prefetcher
+from benchmarks.frames import open_database, frame_cases, percentile
+
+
+def render_times(db, samples, seed):
+    '''
+    Renders every frame samples times and returns the render times in ms by frame name
+    '''
+
+    rng = random.Random(seed)
+    cases, random_user = frame_cases(db, rng)
+    frame_mgr = FrameManager(db, ScriptedIO((), capture=False))
+    timings = {}
+
+    for name, build in cases.items():
+        for _ in range(samples):
+            db.user = UserCredential(random_user(), "", "", "", "", 0)
+            frame = build(frame_mgr)
+
+            start = time.perf_counter()
+            frame.render()
+            timings.setdefault(name, []).append((time.perf_counter() - start) * 1000)
+
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Frame renders on a snapshot against the normal connections")
+    parser.add_argument("--samples", type=int, default=300, help="renders of each frame per mode")
+    parser.add_argument("--rounds", type=int, default=5, help="times the modes take turns")
+    parser.add_argument("--tweets", type=int, default=10000, help="tweet count of the generated database")
+    parser.add_argument("--db-dir", default="benchmarks/data", help="where generated databases are kept")
+    parser.add_argument("--seed", type=int, default=291)
+    args = parser.parse_args()
+
+    os.makedirs(args.db_dir, exist_ok=True)
+    modes = ["normal", "snapshot"]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source = open_database(args.db_dir, args.tweets)
+        databases = {}
+        for mode in modes:
+            # Each mode reads its own copy of the same data, the normal one switches its copy to WAL
+            path = os.path.join(tmp_dir, f"{mode}.db")
+            source.snapshot_to(path)
+
+            databases[mode] = Database(cache=RowCache(0))
+            databases[mode].connect(path, snapshot=mode == "snapshot")
+            databases[mode].prefetcher.close()
+            databases[mode].prefetcher = Prefetcher(databases[mode].pool, 0)
+            render_times(databases[mode], 20, args.seed)  # warms the caches and prepares the statements
+        source.close()
+
+        results = {mode: {} for mode in modes}
+        for turn in range(args.rounds):
+            for mode in modes:
+                timings = render_times(databases[mode], args.samples // args.rounds, args.seed + turn)
+                for name, frame_timings in timings.items():
+                    results[mode].setdefault(name, []).extend(frame_timings)
+
+        for db in databases.values():
+            db.close()
+
+    print(f"{'frame':<20} {'normal p50':>11} {'snapshot p50':>13} {'normal p99':>11} {'snapshot p99':>13}")
+    for name, normal in results["normal"].items():
+        snapshot = results["snapshot"][name]
+        print(f"{name:<20} {percentile(normal, 0.5):>11.3f} {percentile(snapshot, 0.5):>13.3f} "
+              f"{percentile(normal, 0.99):>11.3f} {percentile(snapshot, 0.99):>13.3f}")
+
+    normal_total = sum(sum(timings) for timings in results["normal"].values())
+    snapshot_total = sum(sum(timings) for timings in results["snapshot"].values())
+    print(f"\ntotal render time: normal {normal_total:.1f} ms, snapshot {snapshot_total:.1f} ms "
+          f"({normal_total / snapshot_total:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+'''
+Counts how often statements are prepared while rendering frames, and how much the
+preparing costs. sqlite3 keeps the statements a connection has run in an LRU cache
+keyed by their text, so a statement is prepared again whenever its text is not in
+the cache, either because it was never seen or because it was evicted.
+
+Three tweet search builders are compared on the same keyword searches: the original
+one writing a different WHERE clause for every keyword count and hashtag position, the
+one writing a UNION of one subquery per kind of keyword, and the fixed statements of
+tui.core.Queries. Then every frame is rendered with a statement cache of the size the
+pool uses and with none at all, which prepares on every execute. Run from the
+repository root with:
+
+    python -m benchmarks.statements [--searches 2000] [--timed 200] [--renders 300] [--tweets 10000]
+'''
+import argparse
+import collections
+import os
+import random
+import statistics
+import time
+
+from tui.core import Database, FrameManager, ScriptedIO
+from tui.core.ConnectionPool import ConnectionPool
+from tui.core.models import UserCredential
+from tui.utils.DataGenerator import DataGenerator
+from benchmarks.frames import open_database, frame_cases
+import tui.core.Queries as Queries
+import tui.core.TextSearch as TextSearch
+
+# sqlite3's cache size when connect is not given one
+DEFAULT_CACHED_STATEMENTS = 128
+
+
+class StatementCache:
+    '''
+    Model of sqlite3's per-connection statement cache, counting the statements prepared
+    '''
+
+    def __init__(self, size):
+        self.size = size
+        self.statements = collections.OrderedDict()
+        self.prepares = 0
+        self.executes = 0
+
+    def use(self, sql):
+        self.executes += 1
+        if sql in self.statements:
+            self.statements.move_to_end(sql)
+            return
+
+        self.prepares += 1
+        if self.size:
+            self.statements[sql] = None
+            if len(self.statements) > self.size:
+                self.statements.popitem(last=False)
+
+
+class CountingCursor:
+    '''
+    Cursor passing every statement it runs through a StatementCache
+    '''
+
+    def __init__(self, cursor, cache):
+        self._cursor = cursor
+        self._cache = cache
+
+    def __getattr__(self, attribute):
+        return getattr(self._cursor, attribute)
+
+    def execute(self, sql, parameters=()):
+        self._cache.use(sql)
+        self._cursor.execute(sql, parameters)
+        return self
+
+
+def per_keyword_search(keywords, fts, after):
+    '''
+    The original tweet search, one OR term per keyword in the order they were typed
+    '''
+
+    terms = []
+    params = []
+    for keyword in keywords:
+        if keyword.startswith("#"):
+            terms.append("(t.tid = m.tid AND (m.term = ?))")
+            params.append(keyword[1:].lower())
+        else:
+            terms.append("(UPPER(t.text) LIKE '%' || ? || '%')")
+            params.append(keyword.upper())
+
+    return f'''
+        SELECT DISTINCT t.tid, t.text, t.tdate, t.writer
+        FROM tweets t LEFT JOIN mentions m on t.tid = m.tid
+        WHERE ({" OR ".join(terms)}) AND (t.tdate, t.tid) < (?, ?)
+        ORDER BY t.tdate DESC, t.tid DESC
+        LIMIT 6;
+    ''', (*params, *after)
+
+
+def union_search(keywords, fts, after):
+    '''
+    The tweet search before tui.core.Queries, a UNION of one subquery per kind of keyword present
+    '''
+
+    _, bound = Queries.tweet_search(keywords, fts, after)
+
+    match_queries = []
+    match_params = []
+    if bound["hashtags"] != "[]":
+        match_queries.append("SELECT m.tid FROM mentions m WHERE m.term IN (SELECT value FROM json_each(?))")
+        match_params.append(bound["hashtags"])
+    if bound["match"] is not None:
+        match_queries.append("SELECT rowid FROM tweets_fts WHERE tweets_fts MATCH ?")
+        match_params.append(bound["match"])
+    if bound["scan"] != "[]":
+        match_queries.append("SELECT tid FROM tweets WHERE EXISTS (SELECT 1 FROM json_each(?) k WHERE UPPER(text) LIKE '%' || k.value || '%')")
+        match_params.append(bound["scan"])
+
+    return f'''
+        SELECT t.tid, t.text, t.tdate, t.writer
+        FROM tweets t
+        WHERE t.tid IN ({" UNION ".join(match_queries)})
+        AND (t.tdate, t.tid) < (?, ?)
+        ORDER BY t.tdate DESC, t.tid DESC
+        LIMIT 6;
+    ''', (*match_params, *after)
+
+
+SEARCH_BUILDERS = {
+    "per keyword (original)": per_keyword_search,
+    "union per kind": union_search,
+    "fixed (Queries)": Queries.tweet_search,
+}
+
+
+def search_keywords(rng, vocabulary, hashtags, count):
+    '''
+    Returns count searches of one to four keywords, mixing hashtags, words and words too
+    short for the full-text index
+    '''
+
+    searches = []
+    for _ in range(count):
+        keywords = []
+        for _ in range(rng.randint(1, 4)):
+            kind = rng.random()
+            if kind < 0.35:
+                keywords.append("#" + rng.choice(hashtags))
+            elif kind < 0.85:
+                keywords.append(rng.choice(vocabulary))
+            else:
+                keywords.append(rng.choice(vocabulary)[:TextSearch.MIN_KEYWORD_LENGTH - 1])
+        searches.append(keywords)
+    return searches
+
+
+def compare_search_shapes(searches, fts):
+    '''
+    Prints the distinct statements and prepares of every search builder over the searches
+    '''
+
+    print(f"{len(searches)} tweet searches, statements prepared by a cache of:")
+    print(f"{'builder':<24} {'shapes':>7} {'0':>7} {Queries.CACHED_STATEMENTS:>7} {DEFAULT_CACHED_STATEMENTS:>7}")
+
+    after = ("9999-12-31", 2 ** 63 - 1)
+    for name, build in SEARCH_BUILDERS.items():
+        statements = [build(keywords, fts, after)[0] for keywords in searches]
+        prepares = []
+        for size in [0, Queries.CACHED_STATEMENTS, DEFAULT_CACHED_STATEMENTS]:
+            cache = StatementCache(size)
+            for sql in statements:
+                cache.use(sql)
+            prepares.append(cache.prepares)
+        print(f"{name:<24} {len(set(statements)):>7} {prepares[0]:>7} {prepares[1]:>7} {prepares[2]:>7}")
+
+
+def time_searches(path, searches, cached_statements):
+    '''
+    Returns the mean milliseconds of a first page tweet search per builder
+    '''
+
+    pool = ConnectionPool(path, readers=1, cached_statements=cached_statements)
+    reader = pool.acquire_reader()
+    after = ("9999-12-31", 2 ** 63 - 1)
+    fts = TextSearch.has_index(reader.cursor(), "tweets_fts")
+
+    results = {}
+    for name, build in SEARCH_BUILDERS.items():
+        start = time.perf_counter()
+        for keywords in searches:
+            sql, params = build(keywords, fts, after)
+            reader.execute(sql, params).fetchall()
+        results[name] = (time.perf_counter() - start) * 1000 / len(searches)
+
+    pool.release_reader(reader)
+    pool.close()
+    return results
+
+
+def time_frames(path, renders, cached_statements, seed):
+    '''
+    Renders every frame with random inputs on connections with the given statement cache size.
+
+    :return: A dictionary of (mean milliseconds, prepares per render) by frame name
+    '''
+
+    pool = ConnectionPool(path, readers=1, cached_statements=cached_statements)
+    db = Database()
+    db.connect(path, pool)
+    frame_mgr = FrameManager(db, ScriptedIO((), capture=False))
+    cases, random_user = frame_cases(db, random.Random(seed))
+
+    results = {}
+    for name, build in cases.items():
+        cache = StatementCache(cached_statements)
+        db.cursor = CountingCursor(db.reader.cursor(), cache)
+
+        timings = []
+        for _ in range(renders):
+            db.user = UserCredential(random_user(), "", "", "", "", 0)
+            frame = build(frame_mgr)
+
+            start = time.perf_counter()
+            frame.render()
+            timings.append((time.perf_counter() - start) * 1000)
+
+        results[name] = (statistics.fmean(timings), cache.prepares / renders)
+
+    db.close()
+    pool.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Statement preparation per frame render")
+    parser.add_argument("--searches", type=int, default=2000, help="tweet searches compared across builders")
+    parser.add_argument("--timed", type=int, default=200, help="how many of the searches are also timed")
+    parser.add_argument("--renders", type=int, default=300, help="renders per frame")
+    parser.add_argument("--tweets", type=int, default=10000, help="tweet count of the generated database")
+    parser.add_argument("--db-dir", default="benchmarks/data", help="where generated databases are kept")
+    parser.add_argument("--seed", type=int, default=291)
+    args = parser.parse_args()
+
+    os.makedirs(args.db_dir, exist_ok=True)
+    db = open_database(args.db_dir, args.tweets)
+    path = db.connection.execute("PRAGMA database_list;").fetchone()[2]
+    fts = db.tweet_fts
+    user_count = db.cursor.execute("SELECT MAX(usr) FROM users;").fetchone()[0]
+    generator = DataGenerator(args.tweets, user_count)
+    db.close()
+
+    searches = search_keywords(random.Random(args.seed), generator.vocabulary, generator.hashtags, args.searches)
+    compare_search_shapes(searches, fts)
+
+    print(f"\nMean ms of {min(args.timed, len(searches))} tweet searches with a cache of:")
+    print(f"{'builder':<24} {'0':>8} {Queries.CACHED_STATEMENTS:>8}")
+    uncached = time_searches(path, searches[:args.timed], 0)
+    cached = time_searches(path, searches[:args.timed], Queries.CACHED_STATEMENTS)
+    for name in SEARCH_BUILDERS:
+        print(f"{name:<24} {uncached[name]:>8.3f} {cached[name]:>8.3f}")
+
+    print(f"\n{args.renders} renders per frame, mean ms and statements prepared per render with a cache of:")
+    print(f"{'frame':<20} {'0':>16} {Queries.CACHED_STATEMENTS:>16}")
+    uncached = time_frames(path, args.renders, 0, args.seed)
+    cached = time_frames(path, args.renders, Queries.CACHED_STATEMENTS, args.seed)
+    for name in uncached:
+        print(f"{name:<20} {uncached[name][0]:>8.3f} ms {uncached[name][1]:>4.1f} "
+              f"{cached[name][0]:>8.3f} ms {cached[name][1]:>4.2f}")
+
+
+if __name__ == "__main__":
+    main()
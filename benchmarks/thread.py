@@ -0,0 +1,152 @@
+'''
+Compares loading a conversation thread page with the bounded Queries.THREAD statement
+against a recursive query that reads a tweet's whole reply tree, as threads grow viral.
+Threads of each size are added to a copy of the generated database, a quarter of their
+replies answering the tweet and the rest a random earlier reply, below a long chain of
+tweets replying to one another. The first page and one from the middle of the replies are
+timed. Run from the repository root with:
+
+    python -m benchmarks.thread [--sizes 1000 10000 100000] [--tweets 10000]
+'''
+import argparse
+import datetime
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+import tui.core.Queries as Queries
+from tui.core import Database
+from tui.frames import ThreadFrame
+from benchmarks.frames import open_database, percentile
+
+# Tweets in the chain above each thread's tweet
+CHAIN = 200
+
+# Times each page is loaded per thread
+REPEATS = 50
+
+# The whole reply tree below the tweet and every tweet above it, as a thread view without
+# bounds would read them
+UNBOUNDED_QUERY = '''
+    WITH RECURSIVE
+    ancestors (tid, depth) AS (
+        SELECT replyto, -1 FROM tweets WHERE tid = :tid AND replyto IS NOT NULL
+        UNION ALL
+        SELECT t.replyto, a.depth - 1 FROM ancestors a JOIN tweets t ON t.tid = a.tid
+        WHERE t.replyto IS NOT NULL
+    ),
+    replies (tid, depth, path) AS (
+        SELECT :tid, 0, ''
+        UNION ALL
+        SELECT c.tid, r.depth + 1, r.path || printf('%s%020d', c.tdate, c.tid)
+        FROM replies r JOIN tweets c ON c.replyto = r.tid
+    )
+    SELECT x.depth, t.tid, t.replyto, t.writer, t.tdate, t.text, COALESCE(s.replies, 0)
+    FROM (SELECT tid, depth, NULL AS path FROM ancestors UNION ALL SELECT tid, depth, path FROM replies) x
+    JOIN tweets t ON t.tid = x.tid
+    LEFT JOIN tweet_stats s ON s.tid = t.tid
+    ORDER BY x.depth > 0, x.path, x.depth;
+'''
+
+
+def add_thread(connection, first_tid, size, rng):
+    '''
+    Writes a chain of CHAIN tweets and a thread of size replies below its last tweet.
+
+    :return: The tid of the thread's tweet and the tid after the last one written
+    '''
+
+    writers = [usr for (usr,) in connection.execute("SELECT usr FROM users LIMIT 1000;")]
+    rows = []
+
+    tid = first_tid
+    for index in range(CHAIN):
+        rows.append((tid, rng.choice(writers), "2030-01-01", f"chain {index}", tid - 1 if index else None))
+        tid += 1
+    root = tid - 1
+
+    replies = []
+    for index in range(size):
+        replyto = root if not replies or rng.random() < 0.25 else rng.choice(replies)
+        tdate = datetime.date(2031, 1, 1) + datetime.timedelta(days=index * 365 // size)
+        rows.append((tid, rng.choice(writers), tdate.isoformat(), f"reply {index}", replyto))
+        replies.append(tid)
+        tid += 1
+
+    with connection:
+        connection.executemany("INSERT INTO tweets (tid, writer, tdate, text, replyto) VALUES (?,?,?,?,?);", rows)
+    return root, tid
+
+
+def time_query(cursor, sql, params):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        rows = cursor.execute(sql, params).fetchall()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings, len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Conversation thread benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="replies per thread")
+    parser.add_argument("--tweets", type=int, default=10000, help="tweet count of the generated database")
+    parser.add_argument("--db-dir", default="benchmarks/data", help="where generated databases are kept")
+    parser.add_argument("--seed", type=int, default=291)
+    args = parser.parse_args()
+
+    os.makedirs(args.db_dir, exist_ok=True)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # The threads are written to a copy so the generated database stays as generated
+        source = open_database(args.db_dir, args.tweets)
+        path = os.path.join(tmp_dir, "thread.db")
+        source.snapshot_to(path)
+        source.close()
+
+        rng = random.Random(args.seed)
+        connection = sqlite3.connect(path)
+        next_tid = connection.execute("SELECT MAX(tid) + 1 FROM tweets;").fetchone()[0]
+        threads = []
+        for size in args.sizes:
+            root, next_tid = add_thread(connection, next_tid, size, rng)
+            threads.append((size, root))
+        connection.close()
+
+        db = Database()
+        db.connect(path)
+        cursor = db.cursor
+
+        print(f"{'replies':>8} {'page':<7} {'query':<10} {'rows':>7} {'p50 ms':>9} {'p99 ms':>9}")
+        for size, root in threads:
+            # The middle page starts after the direct reply halfway through the tweet's replies
+            direct = cursor.execute("SELECT tdate, tid FROM tweets WHERE replyto = ? ORDER BY tdate, tid;",
+                                    (root,)).fetchall()
+            pages = [("first", ThreadFrame.FIRST_PAGE_KEY), ("middle", tuple(direct[len(direct) // 2]))]
+
+            for page, (tdate, after_tid) in pages:
+                params = {
+                    "tid": root,
+                    "ancestors": ThreadFrame.MAX_ANCESTORS,
+                    "tdate": tdate,
+                    "after_tid": after_tid,
+                    "page": ThreadFrame.PAGE_SIZE,
+                    "fanout": ThreadFrame.FANOUT,
+                    "depth": ThreadFrame.MAX_DEPTH,
+                }
+                timings, rows = time_query(cursor, Queries.THREAD, params)
+                print(f"{size:>8} {page:<7} {'bounded':<10} {rows:>7} {percentile(timings, 0.5):>9.3f} "
+                      f"{percentile(timings, 0.99):>9.3f}")
+
+            # Without bounds every page reads the same whole tree
+            timings, rows = time_query(cursor, UNBOUNDED_QUERY, {"tid": root})
+            print(f"{size:>8} {'any':<7} {'unbounded':<10} {rows:>7} {percentile(timings, 0.5):>9.3f} "
+                  f"{percentile(timings, 0.99):>9.3f}")
+
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
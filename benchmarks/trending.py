@@ -0,0 +1,132 @@
+'''
+Measures the trending hashtags engine. A synthetic week of mentions with a long tail of
+distinct terms is recorded to show the memory stays fixed and the top hashtags stay
+exact, then the top of every window of the generated database is read from the engine
+and from a GROUP BY over the mentions table. Run from the repository root with:
+
+    python -m benchmarks.trending [--mentions 300000] [--terms 100000] [--tweets 10000]
+'''
+import argparse
+import collections
+import itertools
+import os
+import random
+import time
+
+import tui.core.Trending as Trending
+from benchmarks.frames import open_database
+
+TOP_N = 10
+
+# The exact answer for a window, aggregating every mention of the tweets dated in it
+GROUP_BY_QUERY = '''
+    SELECT m.term, COUNT(*)
+    FROM tweets t JOIN mentions m ON m.tid = t.tid
+    WHERE t.tdate >= ?
+    GROUP BY m.term
+    ORDER BY COUNT(*) DESC, m.term
+    LIMIT ?
+'''
+
+
+def synthetic_stream(mentions, terms, seed, end):
+    '''
+    Returns (when, term) mentions spread over the week before end, oldest first, with
+    term popularity following a Zipf distribution
+    '''
+
+    rng = random.Random(seed)
+    weights = list(itertools.accumulate(1 / rank for rank in range(1, terms + 1)))
+    names = rng.choices(range(terms), cum_weights=weights, k=mentions)
+    start = end - 7 * 86400
+    times = sorted(rng.uniform(start, end) for _ in range(mentions))
+    return [(when, f"tag{name}") for when, name in zip(times, names)]
+
+
+def run_stream(args):
+    now = [time.time()]
+    stream = synthetic_stream(args.mentions, args.terms, args.seed, now[0])
+    trending = Trending.Trending(clock=lambda: now[0])
+    trending.warm = True  # nothing to load, the stream is the whole history
+
+    peak = {}  # largest counter bytes of every window seen while recording
+    elapsed = 0
+    for batch in range(0, len(stream), 10000):
+        start = time.perf_counter()
+        for tid, (when, term) in enumerate(stream[batch:batch + 10000], batch):
+            now[0] = when
+            trending.record([term], tid, when)
+        elapsed += time.perf_counter() - start
+
+        for window, stats in trending.stats().items():
+            peak[window] = max(peak.get(window, 0), stats["counter_bytes"])
+
+    print(f"{len(stream)} mentions of {len(set(term for _, term in stream))} distinct terms "
+          f"recorded in {elapsed:.2f}s ({len(stream) / elapsed:.0f}/s)\n")
+    print(f"{'window':<7} {'counter KiB':>12} {'peak KiB':>9} {'top ms':>8} {'top-{0} recall'.format(TOP_N):>14} {'max overcount':>14}")
+
+    for window, (seconds, count) in Trending.WINDOWS.items():
+        # Counted exactly over the same buckets the window covers
+        since = (int(now[0] // seconds) - count + 1) * seconds
+        exact = collections.Counter(term for when, term in stream if when >= since)
+
+        start = time.perf_counter()
+        top = trending.top(window, TOP_N, None)
+        top_ms = (time.perf_counter() - start) * 1000
+
+        recall = len({term for term, _ in top} & {term for term, _ in exact.most_common(TOP_N)}) / TOP_N
+        overcount = max((estimate - exact[term] for term, estimate in top), default=0)
+        kib = trending.stats()[window]["counter_bytes"] / 1024
+        print(f"{window:<7} {kib:>12.0f} {peak[window] / 1024:>9.0f} {top_ms:>8.3f} {recall:>14.0%} {overcount:>14}")
+
+
+def run_database(args):
+    os.makedirs(args.db_dir, exist_ok=True)
+    db = open_database(args.db_dir, args.tweets)
+
+    # The generated mentions are from the past, so the windows end at noon of the newest of their days
+    newest = db.cursor.execute("SELECT MAX(t.tdate) FROM tweets t JOIN mentions m ON m.tid = t.tid;").fetchone()[0]
+    end = time.mktime(time.strptime(newest, "%Y-%m-%d")) + 43200
+    trending = Trending.Trending(clock=lambda: end)
+
+    start = time.perf_counter()
+    trending.warm_up(db.cursor)
+    print(f"\nwarmed up from the mentions table of {args.tweets} tweets in {(time.perf_counter() - start) * 1000:.1f} ms\n")
+    print(f"{'window':<7} {'GROUP BY ms':>12} {'engine ms':>10} {'same top':>9}")
+
+    for window in [Trending.DAY, Trending.WEEK]:
+        # Mentions are placed at the start of their day, so the window holds the days starting in it
+        seconds, count = Trending.WINDOWS[window]
+        start = (int(end // seconds) - count + 1) * seconds
+        since = time.strftime("%Y-%m-%d", time.localtime(start))
+        if time.mktime(time.strptime(since, "%Y-%m-%d")) < start:
+            since = time.strftime("%Y-%m-%d", time.localtime(start + 86400))
+
+        start = time.perf_counter()
+        exact = db.cursor.execute(GROUP_BY_QUERY, (since, TOP_N)).fetchall()
+        group_by_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        top = trending.top(window, TOP_N, db.cursor)
+        engine_ms = (time.perf_counter() - start) * 1000
+
+        print(f"{window:<7} {group_by_ms:>12.3f} {engine_ms:>10.3f} {str(dict(top) == dict(exact)):>9}")
+
+    db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trending hashtags engine benchmark")
+    parser.add_argument("--mentions", type=int, default=300000, help="mentions in the synthetic week")
+    parser.add_argument("--terms", type=int, default=100000, help="distinct terms in the synthetic week")
+    parser.add_argument("--tweets", type=int, default=10000, help="tweet count of the generated database")
+    parser.add_argument("--db-dir", default="benchmarks/data", help="where generated databases are kept")
+    parser.add_argument("--seed", type=int, default=291)
+    args = parser.parse_args()
+
+    run_stream(args)
+    run_database(args)
+
+
+if __name__ == "__main__":
+    main()
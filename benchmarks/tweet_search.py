@@ -0,0 +1,103 @@
+'''
+Compares the LIKE scan and the FTS5 trigram index behind SearchForTweetFrame at
+100k, 1M and 5M tweets. Run from the repository root with:
+
+    python -m benchmarks.tweet_search [tweet_count ...]
+'''
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+from tui.core import Database, FrameManager
+from tui.core.models import UserCredential
+from tui.core.BulkImport import BulkImporter
+import tui.frames as frames
+
+SIZES = [100000, 1000000, 5000000]
+REPEATS = 5
+
+# A few words are common, most are rare, like real tweet text
+COMMON_WORDS = ["the", "game", "today", "great", "night", "friends", "hockey", "coffee"]
+RARE_WORDS = [f"word{i}" for i in range(50000)]
+
+SEARCHES = ["zebracorn", "word42", "word42 word4242", "hockey", "coffee night"]
+
+
+def populate(db, tweet_count):
+    '''
+    Fills the database with tweet_count tweets of random text
+
+    :param db: A connected Database
+    :param tweet_count: Number of tweets to write
+    '''
+
+    rng = random.Random(291)
+
+    db.connection.execute("INSERT INTO users (usr, pwd, name, email, city, timezone) VALUES (1, 'pwd', 'Writer', 'w@example.com', 'Edmonton', -7);")
+
+    def tweets():
+        for tid in range(tweet_count):
+            words = rng.choices(COMMON_WORDS, k=3) + rng.choices(RARE_WORDS, k=5)
+            rng.shuffle(words)
+            yield (tid, 1, f"20{10 + tid * 13 // tweet_count}-{rng.randint(1, 12):02}-{rng.randint(1, 28):02}", " ".join(words), None)
+
+    # Loads through the bulk importer so the text is indexed in one pass after the load
+    with BulkImporter(db, log=None) as importer:
+        importer.load("tweets", tweets())
+
+
+def time_search(frame_mgr, keyword):
+    '''
+    Returns the fastest first page render of a tweet search in milliseconds, and its results
+    '''
+
+    timings = []
+    for _ in range(REPEATS):
+        frame = frames.SearchForTweetFrame(frame_mgr, keyword)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            frame.render()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings), frame.search_results
+
+
+def main():
+    sizes = [int(size) for size in sys.argv[1:]] if len(sys.argv) > 1 else SIZES
+
+    for tweet_count in sizes:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db = Database()
+            db.connect(os.path.join(tmp_dir, "search.db"))
+
+            if not db.tweet_fts:
+                print("This SQLite build has no FTS5 trigram tokenizer, only the LIKE scan is available")
+                return
+
+            start = time.perf_counter()
+            populate(db, tweet_count)
+            print(f"\n{tweet_count} tweets loaded and indexed in {time.perf_counter() - start:.1f}s\n")
+
+            db.user = UserCredential(1, "pwd", "Writer", "w@example.com", "Edmonton", -7)
+            frame_mgr = FrameManager(db)
+
+            print(f"{'keywords':<18} | {'LIKE scan (ms)':>14} | {'FTS5 (ms)':>10} | speedup")
+            for keyword in SEARCHES:
+                db.tweet_fts = False
+                scan_ms, scan_results = time_search(frame_mgr, keyword)
+                db.tweet_fts = True
+                fts_ms, fts_results = time_search(frame_mgr, keyword)
+
+                # Both paths must return the same page
+                assert scan_results == fts_results
+
+                print(f"{keyword:<18} | {scan_ms:>14.2f} | {fts_ms:>10.2f} | {scan_ms / fts_ms:>6.1f}x")
+
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+'''
+Compares the LIKE scan and the FTS5 trigram index behind UserSearchFrame on a large
+user table. Run from the repository root with:
+
+    python -m benchmarks.user_search [user_count ...]
+'''
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+from tui.core import Database, FrameManager
+from tui.core.models import UserCredential
+from tui.core.BulkImport import BulkImporter
+import tui.frames as frames
+
+SIZES = [100000, 1000000]
+REPEATS = 5
+
+FIRST_NAMES = ["Emma", "Noah", "Olivia", "Liam", "Ava", "Connor", "Leon", "Mia", "Ella", "Jack"]
+CITIES = ["Edmonton", "Calgary", "Vancouver", "Toronto", "Boston", "Denver", "Miami", "Chicago"]
+
+SEARCHES = ["Quixote", "surname123", "Connor", "edmonton", "e"]
+
+
+def populate(db, user_count):
+    '''
+    Fills the database with user_count users
+
+    :param db: A connected Database
+    :param user_count: Number of users to write
+    '''
+
+    rng = random.Random(291)
+
+    def users():
+        for usr in range(user_count):
+            name = f"{rng.choice(FIRST_NAMES)} Surname{rng.randrange(user_count)}"
+            yield (usr, "pwd", name, f"user{usr}@example.com", rng.choice(CITIES), -7)
+
+    # Loads through the bulk importer so names and cities are indexed in one pass after the load
+    with BulkImporter(db, log=None) as importer:
+        importer.load("users", users())
+
+
+def time_search(frame_mgr, keyword):
+    '''
+    Returns the fastest first page render of a user search in milliseconds, and its results
+    '''
+
+    timings = []
+    for _ in range(REPEATS):
+        frame = frames.UserSearchFrame(frame_mgr, keyword)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            frame.render()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings), frame.search_results
+
+
+def main():
+    sizes = [int(size) for size in sys.argv[1:]] if len(sys.argv) > 1 else SIZES
+
+    for user_count in sizes:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db = Database()
+            db.connect(os.path.join(tmp_dir, "users.db"))
+
+            if not db.user_fts:
+                print("This SQLite build has no FTS5 trigram tokenizer, only the LIKE scan is available")
+                return
+
+            start = time.perf_counter()
+            populate(db, user_count)
+            print(f"\n{user_count} users loaded and indexed in {time.perf_counter() - start:.1f}s\n")
+
+            db.user = UserCredential(0, "pwd", "Viewer", "v@example.com", "Edmonton", -7)
+            frame_mgr = FrameManager(db)
+
+            print(f"{'keyword':<12} | {'LIKE scan (ms)':>14} | {'trigram (ms)':>12} | speedup")
+            for keyword in SEARCHES:
+                db.user_fts = False
+                scan_ms, scan_results = time_search(frame_mgr, keyword)
+                db.user_fts = True
+                fts_ms, fts_results = time_search(frame_mgr, keyword)
+
+                # Both paths must return the same page
+                assert scan_results == fts_results
+
+                print(f"{keyword:<12} | {scan_ms:>14.2f} | {fts_ms:>12.2f} | {scan_ms / fts_ms:>6.1f}x")
+
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
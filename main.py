@@ -1,21 +1,27 @@
-import sys
-from tui.core import FrameManager, Database
+import argparse
+from tui.core import FrameManager, Database, TIMELINE_FEED, MERGE_FEED
+from tui.core.FollowGraph import FollowGraph
 from tui.frames import EntryFrame
 
 if __name__ == "__main__":
 
-    if len(sys.argv) != 1:
-        db_path = sys.argv[1]  # stores the primary argument as the database path
+    parser = argparse.ArgumentParser(description="Twitter in the terminal.")
+    parser.add_argument("db_path", nargs="?", help="path to the database, asked for if left out")
+    parser.add_argument("--feed", choices=[TIMELINE_FEED, MERGE_FEED], default=TIMELINE_FEED,
+                        help="read home timelines from the timeline table or merge the followees' tweets as they are read")
+    parser.add_argument("--snapshot", action="store_true",
+                        help="open the database as an immutable, memory mapped snapshot for browsing only, see manage.py snapshot")
+    parser.add_argument("--graph", action="store_true",
+                        help="hold the follows in memory for following checks, follower lists and merged home timelines")
+    args = parser.parse_args()
+
+    if args.db_path:
+        db_path = args.db_path  # stores the primary argument as the database path
     else:
         db_path = input("Please input a valid path to your selected database: ")
     
-    db = Database()
-    db.connect(db_path)
-
-    frame_mgr = FrameManager(db) # Create frame manager instance
-    frame_mgr.display(EntryFrame(frame_mgr)) # Display our entry frame
+    db = Database(feed=args.feed, graph=FollowGraph() if args.graph else None)
+    db.connect(db_path, snapshot=args.snapshot)
 
-    while frame_mgr.shouldDisplay:
-        # Handle user input for the frame
-        usr_resp = input("\nPlease select an option: ")
-        frame_mgr.process_input(usr_resp)
\ No newline at end of file
+    frame_mgr = FrameManager(db) # Create frame manager instance reading from the terminal
+    frame_mgr.run(EntryFrame(frame_mgr)) # Display our entry frame and handle user input until exit
@@ -0,0 +1,190 @@
+import argparse
+import os
+import sys
+import time
+from tui.core import Database
+import tui.core.Recommendations as Recommendations
+from tui.core.BulkImport import BulkImporter, TABLE_COLUMNS
+from tui.utils.DataGenerator import DataGenerator
+
+
+def handle_migrate(db, args):
+    '''
+    Upgrades the database to the latest schema version.
+    '''
+
+    # Database.connect has already applied any pending migrations
+    print(f"Database is at schema version {db.cursor.execute('PRAGMA user_version;').fetchone()[0]}")
+    return 0
+
+
+def handle_rebuild_timeline(db, args):
+    '''
+    Recomputes every home timeline from the tweets, retweets and follows tables.
+    '''
+
+    db.rebuild_timeline()
+    print(f"Rebuilt {db.cursor.execute('SELECT COUNT(*) FROM timeline;').fetchone()[0]} timeline entries")
+    return 0
+
+
+def handle_check_stats(db, args):
+    '''
+    Verifies the user and tweet counters against the base tables, repairing them if asked.
+    '''
+
+    user_mismatches, tweet_mismatches = db.check_stats(args.repair)
+
+    print(f"{user_mismatches} user_stats row(s) and {tweet_mismatches} tweet_stats row(s) disagree with the base tables")
+
+    if (user_mismatches or tweet_mismatches) and not args.repair:
+        print("Run again with --repair to recompute them")
+        return 1
+
+    if user_mismatches or tweet_mismatches:
+        print("Counters recomputed")
+    return 0
+
+
+def handle_import(db, args):
+    '''
+    Streams CSV or JSONL files into the database in large batches.
+    '''
+
+    files = [(table, getattr(args, table)) for table in TABLE_COLUMNS if getattr(args, table)]
+
+    if not files:
+        print("Nothing to import, pass at least one of --users, --follows, --tweets or --retweets")
+        return 1
+
+    start = time.perf_counter()
+
+    with BulkImporter(db, args.batch_size, "WAL" if args.wal else "OFF") as importer:
+        for table, path in files:
+            importer.load_file(table, path)
+
+    print(f"Import finished in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+def handle_generate(db, args):
+    '''
+    Fills the database with a deterministic synthetic social graph.
+    '''
+
+    generator = DataGenerator(args.tweets, args.users, args.seed, args.avg_following)
+    start = time.perf_counter()
+
+    with BulkImporter(db, args.batch_size) as importer:
+        for table, rows in generator.tables():
+            importer.load(table, rows)
+
+    print(f"Generated {args.tweets} tweets by {generator.user_count} users in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+def handle_snapshot(db, args):
+    '''
+    Writes a consistent copy of the database to be browsed with --snapshot.
+    '''
+
+    if os.path.exists(args.snapshot_path):
+        print(f"{args.snapshot_path} already exists")
+        return 1
+
+    start = time.perf_counter()
+    db.snapshot_to(args.snapshot_path)
+
+    print(f"Snapshot written to {args.snapshot_path} in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+def handle_recommend(db, args):
+    '''
+    Works out every user's who to follow suggestions, to be run periodically.
+    '''
+
+    start = time.perf_counter()
+    users, suggestions = db.refresh_recommendations(args.per_user, args.batch_users, args.hub_followers)
+
+    print(f"Stored {suggestions} suggestion(s) for {users} user(s) in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+def handle_check_plans(db, args):
+    '''
+    Fails if any hot query of an applied migration still scans or sorts its table.
+    '''
+
+    failures = db.check_query_plans()
+
+    for version, table, query, detail in failures:
+        print(f"migration {version}: {detail} for: {query}")
+
+    if failures:
+        print(f"\n{len(failures)} query plan(s) scan or sort their table")
+        return 1
+
+    print("All query plans use an index")
+    return 0
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Maintenance commands for a Twitter database")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    migrate_parser = subparsers.add_parser("migrate", help="upgrade the database schema in place")
+    migrate_parser.add_argument("db_path")
+    migrate_parser.set_defaults(handler=handle_migrate)
+
+    check_parser = subparsers.add_parser("check-plans", help="verify the hot queries use their indexes")
+    check_parser.add_argument("db_path")
+    check_parser.set_defaults(handler=handle_check_plans)
+
+    timeline_parser = subparsers.add_parser("rebuild-timeline", help="recompute the materialized home timelines")
+    timeline_parser.add_argument("db_path")
+    timeline_parser.set_defaults(handler=handle_rebuild_timeline)
+
+    stats_parser = subparsers.add_parser("check-stats", help="verify the profile and tweet counters")
+    stats_parser.add_argument("db_path")
+    stats_parser.add_argument("--repair", action="store_true", help="recompute the counters if any are wrong")
+    stats_parser.set_defaults(handler=handle_check_stats)
+
+    snapshot_parser = subparsers.add_parser("snapshot", help="copy the database into a read-only snapshot file")
+    snapshot_parser.add_argument("db_path")
+    snapshot_parser.add_argument("snapshot_path", help="path of the new snapshot, which must not exist")
+    snapshot_parser.set_defaults(handler=handle_snapshot)
+
+    recommend_parser = subparsers.add_parser("recommend", help="work out who to follow suggestions for every user")
+    recommend_parser.add_argument("db_path")
+    recommend_parser.add_argument("--per-user", type=int, default=Recommendations.PER_USER, help="suggestions kept per user")
+    recommend_parser.add_argument("--batch-users", type=int, default=Recommendations.BATCH_USERS,
+                                  help="users whose suggestions are written per transaction")
+    recommend_parser.add_argument("--hub-followers", type=int, default=Recommendations.HUB_FOLLOWERS,
+                                  help="followees with more followers than this are not counted")
+    recommend_parser.set_defaults(handler=handle_recommend)
+
+    import_parser = subparsers.add_parser("import", help="bulk load users, follows, tweets and retweets")
+    import_parser.add_argument("db_path")
+    for table, columns in TABLE_COLUMNS.items():
+        import_parser.add_argument(f"--{table}", metavar="FILE", help=f".csv or .jsonl file with {', '.join(columns)}")
+    import_parser.add_argument("--batch-size", type=int, default=50000, help="rows written per transaction")
+    import_parser.add_argument("--wal", action="store_true", help="keep a WAL journal during the import instead of none")
+    import_parser.set_defaults(handler=handle_import)
+
+    generate_parser = subparsers.add_parser("generate", help="fill the database with a synthetic social graph")
+    generate_parser.add_argument("db_path")
+    generate_parser.add_argument("--tweets", type=int, required=True, help="number of tweets to generate")
+    generate_parser.add_argument("--users", type=int, help="number of users, a tenth of the tweets by default")
+    generate_parser.add_argument("--avg-following", type=int, default=20, help="average accounts followed per user")
+    generate_parser.add_argument("--seed", type=int, default=291, help="seed making the data reproducible")
+    generate_parser.add_argument("--batch-size", type=int, default=50000, help="rows written per transaction")
+    generate_parser.set_defaults(handler=handle_generate)
+
+    args = parser.parse_args()
+
+    db = Database()
+    db.connect(args.db_path)
+
+    sys.exit(args.handler(db, args))
@@ -0,0 +1,42 @@
+import argparse
+import asyncio
+import atexit
+import signal
+from tui.core.Database import TIMELINE_FEED, MERGE_FEED
+from tui.core.Metrics import Metrics
+from tui.core.Server import Server
+from tui.frames import EntryFrame
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Serve the Twitter frames to many users over TCP, one session per connection.")
+    parser.add_argument("db_path", help="path to the shared database")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2910)
+    parser.add_argument("--workers", type=int, default=8, help="sessions that may run queries at the same time")
+    parser.add_argument("--max-sessions", type=int, default=1024, help="connections beyond this many are turned away")
+    parser.add_argument("--prefetch-threads", type=int, default=1, help="next pages prefetched at once, 0 turns prefetching off")
+    parser.add_argument("--feed", choices=[TIMELINE_FEED, MERGE_FEED], default=TIMELINE_FEED,
+                        help="read home timelines from the timeline table or merge the followees' tweets as they are read")
+    parser.add_argument("--snapshot", action="store_true", help="serve the database as an immutable, memory mapped snapshot "
+                                                                   "for browsing only, see manage.py snapshot")
+    parser.add_argument("--graph", action="store_true",
+                        help="hold the follows in memory for following checks, follower lists and merged home timelines")
+    parser.add_argument("--metrics", help="record per-query metrics and write them to this file at exit and on SIGUSR1, "
+                                          "in the Prometheus text format if it ends in .prom and as JSON otherwise")
+    parser.add_argument("--slow-ms", type=float, help="log queries slower than this with their query plan to stderr")
+    args = parser.parse_args()
+
+    metrics = None
+    if args.metrics or args.slow_ms is not None:
+        metrics = Metrics(args.slow_ms)
+
+    if args.metrics:
+        atexit.register(metrics.dump, args.metrics)
+        signal.signal(signal.SIGUSR1, lambda signum, frame: metrics.dump(args.metrics))
+
+    server = Server(args.db_path, EntryFrame, args.workers, args.max_sessions, metrics, args.prefetch_threads, args.feed,
+                    args.snapshot, args.graph)
+
+    # Returns once SIGINT or SIGTERM has ended every session, the metrics are written at exit
+    asyncio.run(server.serve(args.host, args.port))
@@ -0,0 +1,110 @@
+'''
+Runs reader threads against a writer on one shared ConnectionPool, as the server does,
+and checks that in WAL mode neither side waits on or fails because of the other.
+'''
+import threading
+import time
+
+from tui.core import Database
+from tui.core.ConnectionPool import ConnectionPool
+from tests.test_migrations import migrated_copy
+
+READERS = 4
+
+# How long the readers and the writer run side by side
+SECONDS = 1.0
+
+
+def run_threads(targets):
+    threads = [threading.Thread(target=target) for target in targets]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+    assert not any(thread.is_alive() for thread in threads)
+
+
+def test_readers_progress_while_writer_commits(tmp_path):
+    migrated_copy(tmp_path).close()
+    path = str(tmp_path / "test.db")
+    pool = ConnectionPool(path, readers=READERS + 1)  # one for each reader thread and one for the writer
+
+    stop = threading.Event()
+    errors = []
+    reads = [0] * READERS
+    writes = []
+
+    def read(index):
+        db = Database()
+        db.connect(path, pool)
+        try:
+            while not stop.is_set():
+                db.acquire()
+                db.home_feed(1 + index, ("9999-12-31", 2 ** 63 - 1))
+                db.cursor.execute("SELECT COUNT(*) FROM tweets;").fetchone()
+                db.release()
+                reads[index] += 1
+        except Exception as e:
+            errors.append(e)
+        finally:
+            db.close()
+
+    def write():
+        db = Database()
+        db.connect(path, pool)
+        try:
+            while not stop.is_set():
+                db.acquire()
+                writes.append(db.compose_tweet(1, "2026-01-01", "Writing while others read #wal"))
+                db.release()
+        except Exception as e:
+            errors.append(e)
+        finally:
+            db.close()
+
+    timer = threading.Timer(SECONDS, stop.set)
+    timer.start()
+    run_threads([lambda index=index: read(index) for index in range(READERS)] + [write])
+    timer.cancel()
+
+    assert not [error for error in errors if "database is locked" in str(error)]
+    assert errors == []
+    assert writes, "the writer never committed"
+    assert all(reads), f"some readers made no progress: {reads}"
+
+    # Everything the writer committed is visible to a reader that starts afterwards
+    reader = pool.acquire_reader()
+    assert reader.execute("SELECT COUNT(*) FROM tweets WHERE tid IN (SELECT value FROM json_each(?));",
+                          (str(writes),)).fetchone() == (len(writes),)
+    pool.release_reader(reader)
+    pool.close()
+
+
+def test_open_read_does_not_block_writes(tmp_path):
+    migrated_copy(tmp_path).close()
+    path = str(tmp_path / "test.db")
+    pool = ConnectionPool(path, readers=2)
+
+    # A reader in the middle of a long read keeps the database as it was when the read began
+    reader = pool.acquire_reader()
+    reader.execute("BEGIN;")
+    before = reader.execute("SELECT COUNT(*) FROM tweets;").fetchone()
+
+    db = Database()
+    db.connect(path, pool)
+    start = time.perf_counter()
+    written = []
+    run_threads([lambda: written.append(db.compose_tweet(1, "2026-01-01", "Written under an open read"))])
+    elapsed = time.perf_counter() - start
+    db.close()
+
+    # The commit went through without waiting out the busy timeout
+    assert written and elapsed < pool.busy_timeout_ms / 1000 / 2
+    assert reader.execute("SELECT COUNT(*) FROM tweets;").fetchone() == before
+
+    pool.release_reader(reader)
+
+    reader = pool.acquire_reader()
+    assert reader.execute("SELECT COUNT(*) FROM tweets;").fetchone() == (before[0] + 1,)
+    pool.release_reader(reader)
+    pool.close()
@@ -0,0 +1,89 @@
+'''
+Follows enough users on a copy of test1.db for the follow graph to merge its appended
+follows into the flat arrays, and checks the graph answers as the follows table does
+before and after it does.
+'''
+import random
+
+from tui.core import Database
+from tui.core.FollowGraph import FollowGraph, MIN_COMPACT_EDGES
+from tests.test_migrations import migrated_copy
+
+# Followers read per page, small so most users' followers take several pages
+PAGE = 3
+
+
+def graph_copy(tmp_path):
+    migrated_copy(tmp_path).close()
+
+    db = Database(graph=FollowGraph())
+    db.connect(str(tmp_path / "test.db"))
+    db.acquire()
+    return db
+
+
+def new_follows(db, count, seed=291):
+    '''
+    Returns count (flwer, flwee) pairs of users who do not follow one another yet, in random order
+    '''
+
+    users = [usr for (usr,) in db.cursor.execute("SELECT usr FROM users ORDER BY usr;")]
+    follows = set(db.cursor.execute("SELECT flwer, flwee FROM follows;"))
+    pairs = [(flwer, flwee) for flwer in users for flwee in users if flwer != flwee and (flwer, flwee) not in follows]
+    random.Random(seed).shuffle(pairs)
+    return pairs[:count]
+
+
+def assert_matches_table(db):
+    graph = db.graph
+    users = [usr for (usr,) in db.cursor.execute("SELECT usr FROM users ORDER BY usr;")]
+    follows = set(db.cursor.execute("SELECT flwer, flwee FROM follows;"))
+
+    for usr in users:
+        followees = [flwee for (flwee,) in db.cursor.execute("SELECT flwee FROM follows WHERE flwer = ? ORDER BY flwee;", (usr,))]
+        assert graph.followees(usr) == followees
+
+        # Pages through the followers the way the followers page does, from the last one shown
+        followers = [flwer for (flwer,) in db.cursor.execute("SELECT flwer FROM follows WHERE flwee = ? ORDER BY flwer;", (usr,))]
+        pages, after = [], -1
+        while True:
+            page = graph.followers_after(usr, after, PAGE)
+            assert page == followers[len(pages) * PAGE:(len(pages) + 1) * PAGE]
+            if not page:
+                break
+            pages.append(page)
+            after = page[-1]
+        assert sum(pages, []) == followers
+
+        for other in users:
+            assert graph.is_following(usr, other) == ((usr, other) in follows)
+
+
+def test_graph_matches_follows_table_across_compaction(tmp_path):
+    db = graph_copy(tmp_path)
+    loaded = db.graph.stats()["follows"]
+    follows = new_follows(db, MIN_COMPACT_EDGES + 100)
+
+    # Still short of compacting, the new follows are all in the appended arrays
+    for flwer, flwee in follows[:MIN_COMPACT_EDGES]:
+        db.follow(flwer, flwee, "2026-01-01")
+    assert db.graph.stats()["appended"] == MIN_COMPACT_EDGES
+    assert_matches_table(db)
+
+    # One follow more merges them into the flat arrays
+    flwer, flwee = follows[MIN_COMPACT_EDGES]
+    db.follow(flwer, flwee, "2026-01-01")
+    assert db.graph.stats()["appended"] == 0
+    assert db.graph.stats()["follows"] == loaded + MIN_COMPACT_EDGES + 1
+    assert_matches_table(db)
+
+    # And later follows land in appended arrays again, beside the merged ones
+    for flwer, flwee in follows[MIN_COMPACT_EDGES + 1:]:
+        db.follow(flwer, flwee, "2026-01-01")
+    assert db.graph.stats()["appended"] == 99
+    assert_matches_table(db)
+
+    # Following someone twice adds nothing to the graph
+    db.graph.add(flwer, flwee)
+    assert db.graph.stats()["appended"] == 99
+    db.close()
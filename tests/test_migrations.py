@@ -0,0 +1,143 @@
+'''
+Runs the schema migrations over a copy of test1.db and makes sure the hot queries of every
+migration are planned as index seeks rather than full scans.
+'''
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+import tui.core.Migrations as Migrations
+import tui.core.Queries as Queries
+import tui.core.TextSearch as TextSearch
+from tui.core import Database
+
+TEST_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "test1.db")
+
+
+def migrated_copy(tmp_path, drop_indexes=()):
+    '''
+    Returns a connected Database on a migrated copy of test1.db, with drop_indexes dropped
+    '''
+
+    path = str(tmp_path / "test.db")
+    shutil.copyfile(TEST_DB, path)
+
+    db = Database()
+    db.connect(path)
+    db.close()
+
+    if drop_indexes:
+        connection = sqlite3.connect(path)
+        for index in drop_indexes:
+            connection.execute(f"DROP INDEX {index};")
+        connection.commit()
+        connection.close()
+
+    db = Database()
+    db.connect(path)
+    db.acquire()
+    return db
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = migrated_copy(tmp_path)
+    yield db
+    db.close()
+
+
+def test_migrates_to_latest_version(db):
+    assert Migrations.schema_version(db.cursor) == Migrations.MIGRATIONS[-1].version
+
+
+@pytest.mark.parametrize("migration", Migrations.MIGRATIONS, ids=lambda migration: f"v{migration.version}")
+def test_hot_queries_use_indexes(db, migration):
+    assert migration.check_plans(db.cursor) == []
+
+
+def test_table_names_include_aliases():
+    query = '''
+        SELECT t.tid FROM timeline tl JOIN tweets AS t ON t.tid = tl.tid
+        WHERE tl.owner = ? AND EXISTS (SELECT 1 FROM tweets WHERE replyto = t.tid)
+    '''
+
+    assert Migrations.table_names("timeline", query) == {"timeline", "tl"}
+    assert Migrations.table_names("tweets", query) == {"tweets", "t"}
+    assert Migrations.table_names("follows", "SELECT flwer FROM follows WHERE flwee = ?") == {"follows"}
+
+
+def test_scan_is_reported_through_an_alias(tmp_path):
+    db = migrated_copy(tmp_path, ["follows_flwee_idx"])
+
+    migration = Migrations.Migration(0, "test", [], [
+        ("follows", "SELECT flwer FROM follows WHERE flwee = ?", (1,)),
+        ("follows", "SELECT c.flwer FROM follows c WHERE c.flwee = ?", (1,)),
+        ("follows", "SELECT c.flwer FROM follows AS c WHERE c.flwee = ?", (1,)),
+    ])
+
+    try:
+        failures = migration.check_plans(db.cursor)
+    finally:
+        db.close()
+
+    assert [detail.split()[:2] for table, query, detail in failures] == [
+        ["SCAN", "follows"], ["SCAN", "c"], ["SCAN", "c"],
+    ]
+
+
+def test_hashtag_lookup_fails_without_term_index(tmp_path):
+    db = migrated_copy(tmp_path, ["mentions_term_idx"])
+
+    try:
+        failures = Migrations.check_query_plans(db.cursor)
+    finally:
+        db.close()
+
+    assert [(version, table) for version, table, query, detail in failures] == [(4, "mentions")]
+
+
+def test_who_to_follow_query_uses_indexes(db):
+    db.cursor.execute("EXPLAIN QUERY PLAN " + Queries.RECOMMENDATIONS, (1,))
+    scans = [row[3] for row in db.cursor.fetchall() if row[3].startswith("SCAN ")]
+
+    assert scans == []
+
+
+def test_recommendation_checks_fail_without_follower_index(tmp_path):
+    db = migrated_copy(tmp_path, ["follows_flwee_idx"])
+
+    try:
+        migration = next(migration for migration in Migrations.MIGRATIONS if migration.version == 9)
+        failures = migration.check_plans(db.cursor)
+    finally:
+        db.close()
+
+    assert [table for table, query, detail in failures] == ["follows"]
+
+
+@pytest.mark.parametrize("table", ["tweets", "users"])
+def test_search_indexes_are_created_once_fts5_is_available(tmp_path, monkeypatch, table):
+    path = str(tmp_path / "test.db")
+    shutil.copyfile(TEST_DB, path)
+
+    # A build without FTS5 migrates the file all the way, leaving searches on LIKE
+    with monkeypatch.context() as patch:
+        patch.setattr(TextSearch, "fts5_available", lambda cursor: False)
+        db = Database()
+        db.connect(path)
+        assert not db.tweet_fts and not db.user_fts
+        db.close()
+
+    # The next build that has FTS5 creates the indexes, without moving the version back
+    db = Database()
+    db.connect(path)
+    db.acquire()
+    try:
+        assert db.tweet_fts and db.user_fts
+        assert Migrations.schema_version(db.cursor) == Migrations.MIGRATIONS[-1].version
+        assert db.cursor.execute(f"SELECT COUNT(*) FROM {table}_fts;").fetchone() == \
+            db.cursor.execute(f"SELECT COUNT(*) FROM {table};").fetchone()
+    finally:
+        db.close()
@@ -0,0 +1,82 @@
+'''
+Checks the row cache keeps rows least recently used first, and never keeps a row that was
+read while a write invalidated the cache.
+'''
+from tui.core.RowCache import RowCache
+
+
+class CountingCursor:
+    '''
+    Stands in for a sqlite cursor, every row it reads is (sql, parameters, how many reads so far),
+    and before each read it runs during_read if set
+    '''
+
+    def __init__(self):
+        self.reads = 0
+        self.during_read = None
+        self.row = None
+
+    def execute(self, sql, parameters):
+        if self.during_read is not None:
+            self.during_read()
+        self.reads += 1
+        self.row = (sql, parameters, self.reads)
+        return self
+
+    def fetchone(self):
+        return self.row
+
+
+def test_row_read_during_invalidation_is_not_kept():
+    cache = RowCache()
+    cursor = CountingCursor()
+
+    # A write to another row commits between the read and the store, the row may predate it
+    cursor.during_read = lambda: cache.invalidate(("SELECT other", (2,)))
+    assert cache.fetchone(cursor, "SELECT row", (1,)) == ("SELECT row", (1,), 1)
+    assert cache.stats()["entries"] == 0
+
+    # So the next lookup reads it again, and keeps it once no write got in the way
+    cursor.during_read = None
+    assert cache.fetchone(cursor, "SELECT row", (1,)) == ("SELECT row", (1,), 2)
+    assert cache.fetchone(cursor, "SELECT row", (1,)) == ("SELECT row", (1,), 2)
+    assert cursor.reads == 2
+    assert cache.stats()["hits"] == 1
+
+
+def test_row_read_during_clear_is_not_kept():
+    cache = RowCache()
+    cursor = CountingCursor()
+
+    cursor.during_read = cache.clear
+    cache.fetchone(cursor, "SELECT row", (1,))
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_row_is_evicted():
+    cache = RowCache(max_entries=2)
+    cursor = CountingCursor()
+
+    cache.fetchone(cursor, "SELECT row", (1,))
+    cache.fetchone(cursor, "SELECT row", (2,))
+
+    # Using row 1 again leaves row 2 as the least recently used
+    cache.fetchone(cursor, "SELECT row", (1,))
+    cache.fetchone(cursor, "SELECT row", (3,))
+    assert list(cache.entries) == [("SELECT row", (1,)), ("SELECT row", (3,))]
+    assert cache.stats()["evictions"] == 1
+
+    # Row 2 is read again and takes the place of row 1
+    assert cache.fetchone(cursor, "SELECT row", (2,)) == ("SELECT row", (2,), 4)
+    assert list(cache.entries) == [("SELECT row", (3,)), ("SELECT row", (2,))]
+    assert cache.stats() == {"entries": 2, "hits": 1, "misses": 4, "hit_rate": 0.2, "evictions": 2, "invalidations": 0}
+
+
+def test_no_entries_disables_caching():
+    cache = RowCache(max_entries=0)
+    cursor = CountingCursor()
+
+    cache.fetchone(cursor, "SELECT row", (1,))
+    cache.fetchone(cursor, "SELECT row", (1,))
+    assert cursor.reads == 2
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,76 @@
+'''
+Allocates tweet and user ids from several writers at once, each on a connection of its own
+as separate processes would be, and after a bulk import, to check every id is handed out
+once and never collides with one already in the table.
+'''
+import threading
+
+from tui.core import Database
+from tui.core.BulkImport import BulkImporter
+from tests.test_connection_pool import run_threads
+from tests.test_migrations import migrated_copy
+
+WRITERS = 2
+
+# Tweets and users each writer adds
+ROWS = 50
+
+
+def test_concurrent_writers_get_unique_ids(tmp_path):
+    migrated_copy(tmp_path).close()
+    path = str(tmp_path / "test.db")
+    errors = []
+    tids = [[] for _ in range(WRITERS)]
+    usrs = [[] for _ in range(WRITERS)]
+    together = threading.Barrier(WRITERS)
+
+    # Each writer has a pool and so a writer connection of its own, only sqlite's write lock
+    # keeps them apart
+    def write(index):
+        db = Database()
+        db.connect(path)
+        try:
+            # Every row the writers start allocating together, otherwise sqlite's busy handler
+            # lets the first writer to get the lock keep it for most of its rows
+            for row in range(ROWS):
+                together.wait(30)
+                usrs[index].append(db.create_user("pwd", f"Writer {index} user {row}", "w@example.com", "Edmonton", -7))
+                tids[index].append(db.compose_tweet(1, "2026-01-01", f"Writer {index} tweet {row}"))
+        except Exception as e:
+            errors.append(e)
+            together.abort()
+        finally:
+            db.close()
+
+    run_threads([lambda index=index: write(index) for index in range(WRITERS)])
+    assert errors == []
+
+    all_tids = sum(tids, [])
+    all_usrs = sum(usrs, [])
+    assert len(set(all_tids)) == len(all_tids) == WRITERS * ROWS
+    assert len(set(all_usrs)) == len(all_usrs) == WRITERS * ROWS
+
+    # The writers took turns rather than one allocating all its ids before the other
+    assert min(tids[0]) < max(tids[1]) and min(tids[1]) < max(tids[0])
+
+    # Every allocated id was stored under the row it was allocated for
+    db = Database()
+    db.connect(path)
+    for index in range(WRITERS):
+        assert db.cursor.execute("SELECT tid FROM tweets WHERE text LIKE ? ORDER BY tid;",
+                                 (f"Writer {index} tweet %",)).fetchall() == [(tid,) for tid in tids[index]]
+    db.close()
+
+
+def test_ids_after_bulk_import_start_past_imported_ones(tmp_path):
+    db = migrated_copy(tmp_path)
+    usr, tid = db.cursor.execute("SELECT (SELECT MAX(usr) FROM users), (SELECT MAX(tid) FROM tweets);").fetchone()
+
+    # The imported ids skip well past the ones the sequences would hand out next
+    with BulkImporter(db, log=None) as importer:
+        importer.load("users", [(usr + 1000, "pwd", "Imported", "i@example.com", "Edmonton", -7)])
+        importer.load("tweets", [(tid + 1000, usr + 1000, "2026-01-01", "Imported tweet", None)])
+
+    assert db.create_user("pwd", "After import", "a@example.com", "Edmonton", -7) == usr + 1001
+    assert db.compose_tweet(usr + 1000, "2026-01-01", "After import") == tid + 1001
+    db.close()
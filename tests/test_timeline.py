@@ -0,0 +1,76 @@
+'''
+Checks that the timeline triggers keep every home timeline equal to a rebuild from the
+tweets, retweets and follows tables.
+'''
+import sqlite3
+
+import tui.core.Migrations as Migrations
+import tui.core.Timeline as Timeline
+from tests.test_migrations import migrated_copy
+
+
+def timeline_rows(cursor):
+    return cursor.execute("SELECT owner, sort_ts, tid, via_retweet_usr FROM timeline ORDER BY owner, tid;").fetchall()
+
+
+def assert_matches_rebuild(connection):
+    cursor = connection.cursor()
+    maintained = timeline_rows(cursor)
+
+    cursor.execute("BEGIN;")
+    Timeline.rebuild_timeline(cursor)
+    rebuilt = timeline_rows(cursor)
+    connection.rollback()
+
+    assert maintained == rebuilt
+
+
+def open_writer(tmp_path):
+    migrated_copy(tmp_path).close()
+    connection = sqlite3.connect(str(tmp_path / "test.db"), isolation_level=None)
+    return connection
+
+
+def test_timeline_check_fails_without_owner_index(tmp_path):
+    db = migrated_copy(tmp_path, ["timeline_owner_idx"])
+
+    try:
+        failures = Migrations.check_query_plans(db.cursor)
+    finally:
+        db.close()
+
+    assert [(version, table) for version, table, query, detail in failures] == [(2, "timeline")]
+
+
+def test_deleting_a_retweet_updates_timelines(tmp_path):
+    connection = open_writer(tmp_path)
+
+    # Every retweet, whether or not its followers also follow the writer or another retweeter
+    for usr, tid in connection.execute("SELECT usr, tid FROM retweets;").fetchall():
+        connection.execute("DELETE FROM retweets WHERE usr = ? AND tid = ?;", (usr, tid))
+        assert_matches_rebuild(connection)
+
+    connection.close()
+
+
+def test_deleting_a_tweet_updates_timelines(tmp_path):
+    connection = open_writer(tmp_path)
+
+    # Retweets go first, as the foreign key from retweets to tweets asks
+    for (tid,) in connection.execute("SELECT tid FROM tweets;").fetchall():
+        connection.execute("DELETE FROM retweets WHERE tid = ?;", (tid,))
+        connection.execute("DELETE FROM tweets WHERE tid = ?;", (tid,))
+        assert_matches_rebuild(connection)
+
+    connection.close()
+
+
+def test_deleting_a_retweeted_tweet_leaves_no_timeline_rows(tmp_path):
+    connection = open_writer(tmp_path)
+
+    # Without foreign keys the tweet can go while its retweets are still there
+    for (tid,) in connection.execute("SELECT DISTINCT tid FROM retweets;").fetchall():
+        connection.execute("DELETE FROM tweets WHERE tid = ?;", (tid,))
+        assert connection.execute("SELECT COUNT(*) FROM timeline WHERE tid = ?;", (tid,)).fetchone() == (0,)
+
+    connection.close()
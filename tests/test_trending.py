@@ -0,0 +1,157 @@
+'''
+Drives the trending windows with a clock of its own to check buckets slide out of the
+window, candidates give way to more mentioned terms, and every mention of a tweet is
+counted once however it races the warm-up.
+'''
+import time
+
+import pytest
+
+import tui.core.Queries as Queries
+import tui.core.Trending as Trending
+from tests.test_migrations import migrated_copy
+
+# The start of a day bucket, so every window's buckets line up with it
+START = 20000 * 86400
+
+
+@pytest.fixture
+def clock():
+    return [START]
+
+
+def warm_trending(clock, candidates=Trending.DEFAULT_CANDIDATES):
+    trending = Trending.Trending(candidates=candidates, clock=lambda: clock[0])
+    trending.warm = True  # nothing to load, the recorded mentions are the whole history
+    return trending
+
+
+def test_hour_window_expires_before_day_window(clock):
+    trending = warm_trending(clock)
+    for tid in range(3):
+        trending.record(["oilers"], tid)
+    trending.record(["flames"], 3)
+
+    assert trending.top(Trending.HOUR, 2, None) == [("oilers", 3), ("flames", 1)]
+
+    # Still within the hour while the first bucket is
+    clock[0] = START + 3600 - 1
+    assert trending.top(Trending.HOUR, 2, None) == [("oilers", 3), ("flames", 1)]
+
+    clock[0] = START + 3600
+    assert trending.top(Trending.HOUR, 2, None) == []
+    assert trending.stats()[Trending.HOUR] == {"buckets": 0, "candidates": 0, "counter_bytes": 8 * 2048 * 4}
+    assert trending.top(Trending.DAY, 2, None) == [("oilers", 3), ("flames", 1)]
+    assert trending.top(Trending.WEEK, 2, None) == [("oilers", 3), ("flames", 1)]
+
+    clock[0] = START + 86400
+    assert trending.top(Trending.DAY, 2, None) == []
+    assert trending.top(Trending.WEEK, 2, None) == [("oilers", 3), ("flames", 1)]
+
+
+def test_mentions_older_than_window_are_ignored(clock):
+    trending = warm_trending(clock)
+    trending.record(["oilers"], 1, START - 3600)
+
+    assert trending.top(Trending.HOUR, 1, None) == []
+    assert trending.top(Trending.DAY, 1, None) == [("oilers", 1)]
+
+
+def test_expired_bucket_lowers_candidate_counts(clock):
+    trending = warm_trending(clock)
+    trending.record(["oilers", "flames"], 1)
+
+    clock[0] = START + 1800
+    trending.record(["oilers"], 2)
+
+    clock[0] = START + 3600
+    window = trending.windows[Trending.HOUR]
+    assert trending.top(Trending.HOUR, 2, None) == [("oilers", 1)]
+    assert window.floor == 1
+
+
+def test_full_candidates_give_way_to_more_mentioned_term(clock):
+    trending = warm_trending(clock, candidates=2)
+    window = trending.windows[Trending.HOUR]
+
+    for tid, term in enumerate(["oilers"] * 3 + ["flames"] * 2 + ["jets"]):
+        trending.record([term], tid)
+
+    # jets is counted but not mentioned more than the least mentioned candidate
+    assert trending.top(Trending.HOUR, 3, None) == [("oilers", 3), ("flames", 2)]
+    assert window.floor == 2
+
+    # Level with flames is not enough, a mention more is
+    trending.record(["jets"], 6)
+    assert trending.top(Trending.HOUR, 3, None) == [("oilers", 3), ("flames", 2)]
+
+    trending.record(["jets"], 7)
+    assert trending.top(Trending.HOUR, 3, None) == [("jets", 3), ("oilers", 3)]
+    assert window.floor == 3
+    assert window.floor <= min(candidate[1] for candidate in window.candidates.values())
+
+
+def test_records_before_warm_up_are_left_to_it(clock):
+    trending = Trending.Trending(clock=lambda: clock[0])
+    trending.record(["oilers"], 1)
+
+    assert trending.windows[Trending.WEEK].top(1) == []
+    assert trending.held_back == []
+
+
+class HookedCursor:
+    '''
+    A cursor that runs hook just before it executes query
+    '''
+
+    def __init__(self, cursor, query, hook):
+        self.cursor = cursor
+        self.query = query
+        self.hook = hook
+
+    def execute(self, sql, params=()):
+        if sql == self.query:
+            self.hook()
+        return self.cursor.execute(sql, params)
+
+
+def count(db, term):
+    return dict(db.trending_hashtags(Trending.WEEK, Trending.DEFAULT_CANDIDATES)).get(term, 0)
+
+
+def test_compose_before_first_top_counted_once(tmp_path):
+    db = migrated_copy(tmp_path)
+    today = time.strftime("%Y-%m-%d")
+
+    # The first tweet starts the warm-up, which may or may not read it depending on who
+    # gets there first
+    db.compose_tweet(1, today, "First of the day #ExactlyOnce")
+    db.trending.warm_up_thread.join(30)
+    assert not db.trending.warm_up_thread.is_alive()
+    assert count(db, "exactlyonce") == 1
+
+    # Once warm, a tweet is counted as it is written
+    db.compose_tweet(2, today, "And another #ExactlyOnce")
+    assert count(db, "exactlyonce") == 2
+    db.close()
+
+
+@pytest.mark.parametrize("query", [Queries.NEWEST_TID, Queries.RECENT_MENTIONS],
+                         ids=["committed-before-read", "committed-during-read"])
+def test_compose_during_warm_up_counted_once(tmp_path, query):
+    db = migrated_copy(tmp_path)
+    today = time.strftime("%Y-%m-%d")
+    written = []
+
+    # Writes the tweet right before the warm-up reads the newest tweet, so the read sees it,
+    # or right before it reads the mentions, after its snapshot was taken, so it does not
+    def compose():
+        written.append(db.compose_tweet(1, today, "Written while warming up #ExactlyOnce"))
+
+    reader = db.pool.open_reader()
+    db.trending.warm_up(HookedCursor(reader.cursor(), query, compose))
+    reader.close()
+
+    assert written and db.trending.warm_up_thread is None
+    assert count(db, "exactlyonce") == 1
+    db.close()
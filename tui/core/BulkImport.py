@@ -0,0 +1,240 @@
+'''
+Bulk loading of users, follows, tweets and retweets from CSV or JSONL files.
+
+Rows are streamed from disk and written in large executemany batches, so memory use stays
+constant however big the input is. For the duration of the import the database trades
+durability for speed (no journal, no fsync, a large page cache), secondary indexes and
+triggers are dropped, and the derived tables they would have maintained row by row are
+rebuilt in one pass at the end.
+'''
+import csv
+import itertools
+import json
+import time
+
+import tui.core.Timeline as Timeline
+import tui.core.TextSearch as TextSearch
+import tui.core.Stats as Stats
+import tui.core.Sequences as Sequences
+import tui.utils.StringUtils as StringUtils
+
+# Columns of every table that can be imported, in load order so foreign keys resolve
+TABLE_COLUMNS = {
+    "users": ["usr", "pwd", "name", "email", "city", "timezone"],
+    "follows": ["flwer", "flwee", "start_date"],
+    "tweets": ["tid", "writer", "tdate", "text", "replyto"],
+    "retweets": ["usr", "tid", "rdate"],
+}
+
+BATCH_SIZE = 50000
+
+# Settings only used while the import runs, restored afterwards
+IMPORT_PRAGMAS = {
+    "synchronous": "OFF",
+    "cache_size": "-1048576",  # 1GB, negative values are in KiB
+    "temp_store": "MEMORY",
+    "foreign_keys": "OFF",
+}
+
+
+def read_rows(path, columns):
+    '''
+    Streams rows of a CSV (with a header line) or JSONL file as tuples in column order.
+    Empty CSV fields and missing JSON keys become NULL.
+
+    :param path: Path to a .csv or .jsonl file
+    :param columns: List of column names to read
+    '''
+
+    if path.endswith(".jsonl"):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    yield tuple(record.get(column) for column in columns)
+    else:
+        with open(path, newline="", encoding="utf-8") as f:
+            for record in csv.DictReader(f):
+                yield tuple(record.get(column) or None for column in columns)
+
+
+def batched(rows, size):
+    '''
+    Splits an iterable of rows into lists of at most size rows.
+    '''
+
+    rows = iter(rows)
+    batch = list(itertools.islice(rows, size))
+    while batch:
+        yield batch
+        batch = list(itertools.islice(rows, size))
+
+
+class BulkImporter:
+    '''
+    Loads rows into a connected Database as fast as SQLite allows.
+    '''
+
+    def __init__(self, db, batch_size=BATCH_SIZE, journal_mode="OFF", log=print):
+        '''
+        Initialization of the importer
+
+        :param db: A connected Database
+        :param batch_size: Number of rows written per transaction
+        :param journal_mode: Journal mode used while importing, OFF or WAL
+        :param log: Function used to report progress, or None to stay quiet
+        '''
+
+        self.db = db
+        self.batch_size = batch_size
+        self.journal_mode = journal_mode
+        self.log = log if log else (lambda message: None)
+
+        self.saved_pragmas = {}
+        self.saved_schema = []
+        self.cursor = None  # a cursor on the writer connection while importing
+
+    def __enter__(self):
+        self.begin()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # The schema is put back even if loading failed part way
+        self.finish()
+
+    def begin(self):
+        '''
+        Switches the database into bulk load mode.
+        '''
+
+        # Nothing else in this process writes until finish, and the journal mode can only
+        # leave WAL once the readers are closed
+        self.db.pool.write_lock.acquire()
+        self.db.release()
+        self.db.pool.close_readers()
+
+        self.cursor = self.db.connection.cursor()
+        cursor = self.cursor
+
+        # Pragmas like synchronous can not change inside a transaction
+        if self.db.connection.in_transaction:
+            self.db.connection.commit()
+
+        for pragma in ["journal_mode", *IMPORT_PRAGMAS]:
+            self.saved_pragmas[pragma] = cursor.execute(f"PRAGMA {pragma};").fetchone()[0]
+
+        cursor.execute(f"PRAGMA journal_mode = {self.journal_mode};")
+        for pragma, value in IMPORT_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {pragma} = {value};")
+
+        # Secondary indexes are cheaper to build once at the end than to maintain row by row,
+        # and the triggers' work is redone in bulk by rebuilding the derived tables
+        cursor.execute('''
+            SELECT type, name, sql FROM sqlite_master
+            WHERE type IN ('index', 'trigger') AND sql IS NOT NULL
+        ''')
+        self.saved_schema = cursor.fetchall()
+
+        for object_type, name, sql in self.saved_schema:
+            cursor.execute(f"DROP {object_type.upper()} IF EXISTS {name};")
+        self.db.connection.commit()
+
+    def load(self, table, rows):
+        '''
+        Writes rows into a table in batches.
+
+        :param table: One of the keys of TABLE_COLUMNS
+        :param rows: Iterable of tuples in TABLE_COLUMNS order
+
+        :return: Number of rows written
+        '''
+
+        columns = TABLE_COLUMNS[table]
+        insert = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))});"
+
+        count = 0
+        start = time.perf_counter()
+
+        for batch in batched(rows, self.batch_size):
+            self.cursor.execute("BEGIN;")
+            self.cursor.executemany(insert, batch)
+
+            # Hashtags are extracted as tweets stream past so they never need a second pass
+            if table == "tweets":
+                self.__load_hashtags(batch)
+
+            self.db.connection.commit()
+
+            count += len(batch)
+            self.log(f"{table}: {count} rows ({count / (time.perf_counter() - start):.0f} rows/s)")
+
+        return count
+
+    def load_file(self, table, path):
+        '''
+        Streams a CSV or JSONL file into a table.
+
+        :return: Number of rows written
+        '''
+
+        return self.load(table, read_rows(path, TABLE_COLUMNS[table]))
+
+    def __load_hashtags(self, tweets):
+        '''
+        Inserts the hashtags and mentions of a batch of tweet rows.
+        '''
+
+        mentions = [(tweet[0], term) for tweet in tweets if tweet[3] for term in StringUtils.get_hashtags(tweet[3])]
+
+        self.cursor.executemany("INSERT OR IGNORE INTO hashtags (term) VALUES (?);", ((term,) for _, term in mentions))
+        self.cursor.executemany("INSERT OR IGNORE INTO mentions (tid, term) VALUES (?, ?);", mentions)
+
+    def finish(self):
+        '''
+        Recreates indexes and triggers, rebuilds the derived tables and restores the settings.
+        '''
+
+        cursor = self.cursor
+
+        if self.db.connection.in_transaction:
+            self.db.connection.rollback()
+
+        start = time.perf_counter()
+        cursor.execute("BEGIN;")
+
+        # Indexes first, the rebuilds below read through them
+        for object_type, name, sql in self.saved_schema:
+            if object_type == "index":
+                cursor.execute(sql)
+        self.log(f"indexes built in {time.perf_counter() - start:.1f}s")
+
+        Timeline.rebuild_timeline(cursor)
+        Stats.rebuild_stats(cursor)
+        Sequences.reseed_sequences(cursor)
+
+        for fts_table in ["tweets_fts", "users_fts"]:
+            if TextSearch.has_index(cursor, fts_table):
+                cursor.execute(f"INSERT INTO {fts_table} ({fts_table}) VALUES ('rebuild');")
+
+        for object_type, name, sql in self.saved_schema:
+            if object_type == "trigger":
+                cursor.execute(sql)
+
+        self.db.connection.commit()
+        self.log(f"derived tables rebuilt in {time.perf_counter() - start:.1f}s")
+
+        self.saved_schema = []
+
+        for pragma, value in self.saved_pragmas.items():
+            cursor.execute(f"PRAGMA {pragma} = {value};")
+        self.saved_pragmas = {}
+
+        # Rows loaded behind the write methods' backs may change anything that was cached or prefetched
+        self.db.cache.clear()
+        self.db.trending.reset()
+        if self.db.graph is not None:
+            self.db.graph.reset()
+        self.db.pool.commits += 1
+
+        self.db.pool.write_lock.release()
+        self.db.acquire()
@@ -0,0 +1,157 @@
+'''
+Connections to one database file in WAL mode: a single writer that every write is
+serialized through, and a bounded pool of read-only connections.
+
+In WAL mode readers never block the writer and the writer never blocks readers, each
+reader sees the database as of the moment its statement started. Writers still
+exclude each other, so all writes in a process go through one connection under a lock
+instead of many connections fighting over the file lock.
+
+A pool can instead serve a snapshot: a database file nothing writes to, such as one
+made by Database.snapshot. It has no writer, and its readers open the file immutable,
+which skips all locking and journal checks, and memory map it, so pages are read
+straight from the OS page cache rather than copied into each connection's cache.
+'''
+import queue
+import sqlite3
+import threading
+import urllib.parse
+
+from tui.core.Queries import CACHED_STATEMENTS
+
+# How long a connection waits on a lock held by another process before giving up
+BUSY_TIMEOUT_MS = 5000
+
+# Bytes of a snapshot each reader memory maps, enough for the whole file of most databases
+SNAPSHOT_MMAP_SIZE = 1 << 30
+
+
+class ConnectionPool:
+    '''
+    Owns the writer connection and the reader connections of one database file.
+    Connections are created with check_same_thread off, as a reader may be checked out
+    by different threads over its lifetime, but only ever used by one at a time.
+    '''
+
+    def __init__(self, path, readers=4, busy_timeout_ms=BUSY_TIMEOUT_MS, cached_statements=CACHED_STATEMENTS,
+                 snapshot=False, mmap_size=SNAPSHOT_MMAP_SIZE):
+        '''
+        :param path: Path of an existing database file
+        :param readers: The most read-only connections open at once, checking out a
+        reader blocks while all of them are in use
+        :param busy_timeout_ms: How long to wait on locks held by other processes
+        :param cached_statements: How many prepared statements each connection keeps
+        :param snapshot: Whether the file is a snapshot no one writes to, in which case
+        there is no writer and readers open it immutable and memory mapped
+        :param mmap_size: Bytes of a snapshot each reader memory maps
+        '''
+
+        self.path = path
+        self.readers = readers
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cached_statements = cached_statements
+        self.snapshot = snapshot
+        self.mmap_size = mmap_size
+
+        # Held for the whole of every write transaction on the writer connection
+        self.write_lock = threading.RLock()
+
+        # Write transactions committed through the writer, for telling whether data read
+        # at some point may have changed since
+        self.commits = 0
+
+        # A snapshot is never written, switching it to WAL would be a write too
+        self.writer = None
+        if not snapshot:
+            self.writer = sqlite3.connect(path, check_same_thread=False, cached_statements=cached_statements)
+            self.writer.execute(f"PRAGMA busy_timeout = {busy_timeout_ms};")
+            self.writer.execute("PRAGMA journal_mode = WAL;")
+            self.writer.execute("PRAGMA foreign_keys = ON;")
+
+        self._idle = queue.LifoQueue()  # most recently used first, its pages are likely still cached
+        self._opened = 0
+        self._open_lock = threading.Lock()
+
+    def open_reader(self):
+        '''
+        Opens a new read-only connection to the file, outside of the pool
+        '''
+
+        uri = f"file:{urllib.parse.quote(self.path)}?mode=ro"
+        if self.snapshot:
+            uri += "&immutable=1"
+
+        reader = sqlite3.connect(uri, uri=True, check_same_thread=False, cached_statements=self.cached_statements)
+        reader.execute(f"PRAGMA busy_timeout = {self.busy_timeout_ms};")
+        if self.snapshot:
+            reader.execute(f"PRAGMA mmap_size = {self.mmap_size};")
+        return reader
+
+    def acquire_reader(self):
+        '''
+        Checks out a read-only connection, opening one if fewer than the pool size are
+        open and waiting for one to be released otherwise.
+
+        :return: A sqlite connection that must be given back with release_reader
+        '''
+
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._open_lock:
+            if self._opened < self.readers:
+                self._opened += 1
+                open_new = True
+            else:
+                open_new = False
+
+        if open_new:
+            try:
+                return self.open_reader()
+            except:
+                with self._open_lock:
+                    self._opened -= 1
+                raise
+
+        return self._idle.get()
+
+    def release_reader(self, reader):
+        '''
+        Gives a checked out reader back to the pool.
+
+        :param reader: A connection returned by acquire_reader
+        '''
+
+        # Never hand out a connection that is still pinned to an old snapshot
+        if reader.in_transaction:
+            reader.rollback()
+        self._idle.put(reader)
+
+    def close_readers(self):
+        '''
+        Closes every idle reader, they are reopened on demand. The writer can only leave
+        WAL mode once no other connection has the file open.
+        '''
+
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+            with self._open_lock:
+                self._opened -= 1
+
+    def close(self):
+        '''
+        Closes the writer and every idle reader. Readers still checked out are closed
+        when they are garbage collected.
+        '''
+
+        self.close_readers()
+
+        with self.write_lock:
+            if self.writer is not None:
+                self.writer.close()
@@ -1,28 +1,105 @@
 import sqlite3
 import os.path
+import time
+import tui.core.Migrations as Migrations
+import tui.core.Timeline as Timeline
+import tui.core.TextSearch as TextSearch
+import tui.core.Stats as Stats
+import tui.core.Sequences as Sequences
+import tui.core.Queries as Queries
+import tui.core.FeedMerge as FeedMerge
+import tui.core.Trending as Trending
+import tui.core.Recommendations as Recommendations
+from tui.core.ConnectionPool import ConnectionPool
+from tui.core.Metrics import InstrumentedCursor
+from tui.core.RowCache import RowCache
+from tui.core.Prefetcher import Prefetcher
+from tui.core.FollowGraph import FollowGraph
+import tui.utils.StringUtils as StringUtils
+
+# How many times a write transaction is retried when another connection holds the write lock,
+# on top of the busy timeout sqlite already waits for on every attempt
+WRITE_RETRIES = 5
+WRITE_RETRY_DELAY = 0.05  # seconds, doubled after every failed attempt
+
+# Ways of building the home timeline, see Database.home_feed
+TIMELINE_FEED = "timeline"
+MERGE_FEED = "merge"
+
+class ReadOnlySnapshotError(Exception):
+    '''
+    Raised when a Database opened on a snapshot is asked to write, or when a file can
+    not be opened as a snapshot.
+    '''
+
 
 class Database:
-    def __init__(self):
+    def __init__(self, metrics=None, cache=None, prefetcher=None, feed=TIMELINE_FEED, trending=None, graph=None):
         '''
         Initializes the Database object. 
 
         self.connection and self.cursor are abstracted sqlite objects that are 
-        used for interacting with the local db
+        used for interacting with the local db. self.connection is the pool's single
+        writer connection and self.cursor reads through the read-only connection this
+        Database has checked out of the pool, writes go through self.write.
 
         self.user will contain all the attributes of the currently logged in user.
+
+        :param metrics: A Metrics recording every query made through self.cursor and
+        self.write, or None to use plain sqlite cursors
+        :param cache: A RowCache to share with other Database objects, such as the other
+        sessions of a server. A new one is made if None.
+        :param prefetcher: A Prefetcher on the same pool to share with other Database
+        objects. A new one is made on connect if None.
+        :param feed: TIMELINE_FEED to read home pages from the materialized timeline table,
+        or MERGE_FEED to merge the followees' tweets and retweets as they are read
+        :param trending: A Trending to share with other Database objects. A new one is
+        made if None.
+        :param graph: A FollowGraph answering who follows whom from memory, shared with
+        other Database objects, or None to read follows from the follows table
         '''
         
+        self.metrics = metrics
+        self.cache = cache if cache is not None else RowCache()
+        self.pool = None
         self.connection = None
         self.cursor = None
+        self.reader = None
+        self.snapshot = False  # whether the pool serves an immutable snapshot that can not be written
         self.user = None
+        self._owns_pool = False
+        self.prefetcher = prefetcher
+        self._owns_prefetcher = False
+        self.pending_prefetch = None  # PrefetchJob of the page the user is likely to view next
+        self.feed = feed
+        self.trending = trending if trending is not None else Trending.Trending()
+        self.graph = graph
+
+        # Whether tweet text and user names and cities can be searched through FTS5 indexes instead of LIKE scans
+        self.tweet_fts = False
+        self.user_fts = False
 
-    def connect(self, path):
+    def connect(self, path, pool=None, readers=1, snapshot=False):
         '''
         Connect the python sqlite library to the sql database.
 
         :param path: A path string to the file location of the database
+        :param pool: A ConnectionPool to share with other Database objects, such as the
+        other sessions of a server. A new pool is opened if None.
+        :param readers: The size of the new pool's reader pool when pool is None
+        :param snapshot: Whether the new pool opens the file as an immutable, memory mapped
+        snapshot when pool is None. Every write is then refused with ReadOnlySnapshotError.
         '''
 
+        # A snapshot is never created or migrated, and changes still in a write-ahead log are
+        # invisible to immutable connections
+        if snapshot and pool is None:
+            if not os.path.exists(path):
+                raise ReadOnlySnapshotError(f"No database to open as a snapshot at {path}")
+            if os.path.exists(path + "-wal") and os.path.getsize(path + "-wal") > 0:
+                raise ReadOnlySnapshotError(f"{path} has changes in its write-ahead log that a snapshot would not see, "
+                                            "make a snapshot of it with manage.py snapshot")
+
         first_time = False  # variable used to check if the database presently exists
         
         # Checks if path exists, if not creates the database and clarifies that tables need to be defined
@@ -31,17 +108,472 @@ class Database:
             f.close()
             first_time = True
 
-        
-        self.connection = sqlite3.connect(path)
-        self.cursor = self.connection.cursor()
+        self._owns_pool = pool is None
+        self.pool = pool if pool is not None else ConnectionPool(path, readers, snapshot=snapshot)
+        self.snapshot = self.pool.snapshot
+        self.connection = self.pool.writer
 
-        self.cursor.execute(' PRAGMA foreign_keys=ON; ')
-        self.connection.commit()
+        if self.prefetcher is None:
+            self.prefetcher = Prefetcher(self.pool)
+            self._owns_prefetcher = True
 
         # If the database did not exist prior to running, define tables
         if first_time:
             self.define_tables()
 
+        # Bring new and existing databases up to the latest schema version
+        if not self.snapshot:
+            self.migrate()
+
+        self.acquire()
+
+        if self.snapshot and Migrations.schema_version(self.cursor) < Migrations.MIGRATIONS[-1].version:
+            self.close()
+            raise ReadOnlySnapshotError(f"{path} is at an old schema version, open it normally once to migrate it")
+
+        self.tweet_fts = TextSearch.has_index(self.cursor, "tweets_fts")
+        self.user_fts = TextSearch.has_index(self.cursor, "users_fts")
+
+        # Loads the follow graph up front, rather than in the middle of someone's first page
+        if self.graph is not None:
+            self.graph.load(self.cursor)
+
+    def acquire(self):
+        '''
+        Check a read-only connection out of the pool for self.cursor, waiting for one if
+        they are all in use.
+        '''
+
+        if self.reader is None:
+            self.reader = self.pool.acquire_reader()
+            self.cursor = self.__new_cursor(self.reader)
+
+    def __new_cursor(self, connection):
+        '''
+        Returns a cursor on connection, instrumented if this Database has metrics
+        '''
+
+        cursor = connection.cursor()
+        return InstrumentedCursor(cursor, self.metrics, Queries.NAMES) if self.metrics else cursor
+
+    def release(self):
+        '''
+        Give the read-only connection back to the pool so another Database can use it.
+        self.cursor cannot be used until acquire is called again.
+        '''
+
+        if self.reader is not None:
+            self.cursor.close()
+            self.pool.release_reader(self.reader)
+            self.reader = None
+            self.cursor = None
+
+    def fetchone_cached(self, sql, parameters):
+        '''
+        Run a single row query through the row cache. Only statements whose rows are
+        invalidated by the write methods below may be cached, see invalidate.
+
+        :param sql: One of the statements in Queries
+        :param parameters: Tuple of the statement's parameters
+
+        :return: The first row of the query, or None
+        '''
+
+        return self.cache.fetchone(self.cursor, sql, parameters)
+
+    def prefetch(self, sql, parameters):
+        '''
+        Start running a query in the background, for a page the user is likely to view
+        next. Replaces the previous prefetch, which is cancelled.
+
+        :param sql: One of the statements in Queries
+        :param parameters: The statement's parameters
+        '''
+
+        self.cancel_prefetch()
+        self.pending_prefetch = self.prefetcher.submit(sql, parameters)
+
+    def cancel_prefetch(self):
+        '''
+        Discard the pending prefetch, if any.
+        '''
+
+        if self.pending_prefetch is not None:
+            self.prefetcher.cancel(self.pending_prefetch)
+            self.pending_prefetch = None
+
+    def fetchall_prefetched(self, sql, parameters):
+        '''
+        Run a query, taking its rows from the pending prefetch if it was for the same query
+        and parameters and no write has committed since.
+
+        :param sql: One of the statements in Queries
+        :param parameters: The statement's parameters
+
+        :return: A list of every row of the query
+        '''
+
+        job = self.pending_prefetch
+        self.pending_prefetch = None
+
+        if job is not None:
+            if job.matches(sql, parameters):
+                rows = self.prefetcher.result(job)
+                if rows is not None:
+                    return rows
+            else:
+                self.prefetcher.cancel(job)
+
+        return self.cursor.execute(sql, parameters).fetchall()
+
+    def home_feed(self, owner, after):
+        '''
+        Read a page of a user's home timeline, the tweets and retweets of everyone they
+        follow with each tweet dated by its latest appearance.
+
+        :param owner: usr of the user whose home timeline it is
+        :param after: The (date, tid) key of the last row of the previous page
+
+        :return: A list of up to six (tid, text, tdate, writer, sort_ts, via_retweet_usr)
+        tuples, via_retweet_usr being who retweeted it or None if it appears as written
+        '''
+
+        if self.feed == MERGE_FEED:
+            return FeedMerge.merge_feed(self.cursor, owner, after, followees=self.followees(owner))
+
+        return self.fetchall_prefetched(Queries.HOME_FEED, (owner, *after))
+
+    def prefetch_home_feed(self, owner, after):
+        '''
+        Start reading the next page of a user's home timeline in the background. Only
+        pages of the timeline table are prefetched, as a merged page is many statements.
+
+        :param owner: usr of the user whose home timeline it is
+        :param after: The (date, tid) key of the last row of the page being shown
+        '''
+
+        if self.feed == TIMELINE_FEED:
+            self.prefetch(Queries.HOME_FEED, (owner, *after))
+
+    def is_following(self, flwer, flwee):
+        '''
+        Check whether flwer follows flwee.
+
+        :param flwer: usr of the user following
+        :param flwee: usr of the user being followed
+        '''
+
+        if self.graph is not None:
+            self.graph.load(self.cursor)
+            return self.graph.is_following(flwer, flwee)
+
+        return self.fetchone_cached(Queries.IS_FOLLOWING, (flwer, flwee))[0] > 0
+
+    def followees(self, usr):
+        '''
+        Find everyone a user follows, from the follow graph if there is one.
+
+        :param usr: usr of the user following
+
+        :return: A list of usr in order, or None without a follow graph, for the caller
+        to read them from the follows table itself
+        '''
+
+        if self.graph is None:
+            return None
+
+        self.graph.load(self.cursor)
+        return self.graph.followees(usr)
+
+    def followers(self, usr, after, limit):
+        '''
+        Read a page of a user's followers in usr order.
+
+        :param usr: usr of the user being followed
+        :param after: usr of the last follower of the previous page
+        :param limit: The most followers to return
+
+        :return: A list of (flwer, name) tuples
+        '''
+
+        if self.graph is None:
+            return self.cursor.execute(Queries.FOLLOWERS, (usr, after)).fetchmany(limit)
+
+        self.graph.load(self.cursor)
+        followers = self.graph.followers_after(usr, after, limit)
+        return self.cursor.execute(Queries.USER_NAMES, (TextSearch.json_list(followers),)).fetchall()
+
+    def trending_hashtags(self, window, n):
+        '''
+        Find the most mentioned hashtags of a recent period.
+
+        :param window: Trending.HOUR, Trending.DAY or Trending.WEEK
+        :param n: How many hashtags to return
+
+        :return: A list of (term, estimated mentions) tuples, most mentioned first
+        '''
+
+        return self.trending.top(window, n, self.cursor)
+
+    def close(self):
+        '''
+        Release the read-only connection and close the pool and prefetcher if this
+        Database opened them.
+        '''
+
+        self.cancel_prefetch()
+        if self._owns_prefetcher:
+            self.prefetcher.close()
+        self.release()
+        if self._owns_pool:
+            self.pool.close()
+
+    def migrate(self):
+        '''
+        Apply every schema migration the database has not seen yet.
+
+        :return: A list of the migrations that were applied
+        '''
+
+        with self.pool.write_lock:
+            return Migrations.migrate(self.connection)
+
+    def write(self, work):
+        '''
+        Run work inside a single write transaction that commits once. If another connection
+        holds the write lock for longer than the busy timeout, the whole transaction is rolled
+        back and tried again.
+
+        :param work: A function taking a sqlite cursor that performs the writes
+
+        :return: Whatever work returns
+        '''
+
+        if self.snapshot:
+            raise ReadOnlySnapshotError("This database is open as a read-only snapshot, "
+                                        "writing tweets, retweeting, following and signing up are turned off")
+
+        delay = WRITE_RETRY_DELAY
+
+        for attempt in range(WRITE_RETRIES + 1):
+            # The pool's lock serializes the writes of this process on the one writer connection
+            with self.pool.write_lock:
+                try:
+                    # IMMEDIATE takes the write lock up front so nothing can change between our reads and writes
+                    cursor = self.__new_cursor(self.connection)
+                    cursor.execute("BEGIN IMMEDIATE;")
+                    result = work(cursor)
+                    cursor.close()  # records the last statement before the commit
+                    self.connection.commit()
+                    self.pool.commits += 1
+                    return result
+                except sqlite3.OperationalError as e:
+                    if self.connection.in_transaction:
+                        self.connection.rollback()
+
+                    # Only a busy database is worth retrying, and only so many times
+                    busy = "locked" in str(e) or "busy" in str(e)
+                    if not busy or attempt == WRITE_RETRIES:
+                        raise
+                except:
+                    if self.connection.in_transaction:
+                        self.connection.rollback()
+                    raise
+
+            # Another process holds the file's write lock, back off without holding ours
+            time.sleep(delay)
+            delay *= 2
+
+    def compose_tweet(self, writer, tdate, text, replyto=None):
+        '''
+        Insert a new tweet under a freshly allocated tid along with its hashtags and mentions.
+        Everything is written in one transaction, so the tweet is stored completely or not at all
+        and costs a single commit however many hashtags it has.
+
+        :param writer: usr of the user writing the tweet
+        :param tdate: Date string of the tweet
+        :param text: Text of the tweet
+        :param replyto: tid of the tweet being replied to, if any
+
+        :return: The tid of the new tweet
+        '''
+
+        # Acquires all the hashtags in the tweet, already in their canonical lowercase form
+        hashtags = StringUtils.get_hashtags(text)
+
+        # Starts loading the mentions made so far on another thread, the first tweet written
+        # does not wait for it
+        self.trending.start_warm_up(self.pool)
+
+        def insert(cursor):
+            tid = Sequences.allocate_id(cursor, "tweets")
+            cursor.execute(Queries.INSERT_TWEET, (tid, writer, tdate, text, replyto))
+
+            # Hashtags that already exist are left alone, then every hashtag is linked to the tweet
+            cursor.executemany(Queries.INSERT_HASHTAG, [(term,) for term in hashtags])
+            cursor.executemany(Queries.INSERT_MENTION, [(tid, term) for term in hashtags])
+            return tid
+
+        tid = self.write(insert)
+
+        # The writer's tweet count, and the reply count of the tweet replied to
+        self.cache.invalidate(
+            (Queries.TWEET, (tid,)),
+            (Queries.USER_STATS, (writer,)),
+            (Queries.TWEET_STATS, (tid,)),
+            (Queries.TWEET_STATS, (replyto,)),
+        )
+
+        self.trending.record(hashtags, tid)
+        return tid
+
+    def create_user(self, pwd, name, email, city, timezone):
+        '''
+        Insert a new user under a freshly allocated usr.
+
+        :return: The usr of the new user
+        '''
+
+        def insert(cursor):
+            usr = Sequences.allocate_id(cursor, "users")
+            cursor.execute(Queries.INSERT_USER, (usr, pwd, name, email, city, timezone))
+            return usr
+
+        usr = self.write(insert)
+
+        self.cache.invalidate((Queries.USER_NAME, (usr,)), (Queries.USER_STATS, (usr,)))
+        return usr
+
+    def follow(self, flwer, flwee, start_date):
+        '''
+        Record that flwer started following flwee.
+
+        :param flwer: usr of the user following
+        :param flwee: usr of the user being followed
+        :param start_date: Date string the follow started
+        '''
+
+        # Loads the follows made so far before this one is written, so it is added exactly once
+        if self.graph is not None:
+            self.graph.load(self.cursor)
+
+        def insert(cursor):
+            cursor.execute(Queries.INSERT_FOLLOW, (flwee, flwer, start_date))
+
+        self.write(insert)
+
+        # Both users' counters, and whether flwer follows flwee
+        self.cache.invalidate(
+            (Queries.USER_STATS, (flwer,)),
+            (Queries.USER_STATS, (flwee,)),
+            (Queries.IS_FOLLOWING, (flwer, flwee)),
+        )
+
+        if self.graph is not None:
+            self.graph.add(flwer, flwee)
+
+    def retweet(self, usr, tid, rdate):
+        '''
+        Record that usr retweeted tid.
+
+        :param usr: usr of the user retweeting
+        :param tid: tid of the tweet being retweeted
+        :param rdate: Date string of the retweet
+        '''
+
+        def insert(cursor):
+            cursor.execute(Queries.INSERT_RETWEET, (usr, tid, rdate))
+
+        self.write(insert)
+
+        self.cache.invalidate((Queries.TWEET_STATS, (tid,)), (Queries.HAS_RETWEETED, (tid, usr)))
+
+    def snapshot_to(self, path):
+        '''
+        Write a consistent, compacted copy of the database to a new file that can be
+        opened with connect(path, snapshot=True). The copy is not in WAL mode, so nothing
+        it holds is left in a write-ahead log.
+
+        :param path: Path of the copy, which must not exist yet
+        '''
+
+        with self.pool.write_lock:
+            self.connection.execute("VACUUM INTO ?;", (path,))
+
+    def rebuild_timeline(self):
+        '''
+        Recompute every user's materialized home timeline from the base tables.
+        '''
+
+        self.write(Timeline.rebuild_timeline)
+
+    def refresh_recommendations(self, per_user=Recommendations.PER_USER, batch_users=Recommendations.BATCH_USERS,
+                                hub_followers=Recommendations.HUB_FOLLOWERS):
+        '''
+        Work out every user's who to follow suggestions again from the follow graph, which
+        is loaded for the refresh if this Database has none. The suggestions of each batch
+        of users are written in their own short transaction, so sessions keep reading and
+        writing while this runs.
+
+        :param per_user: Suggestions kept per user
+        :param batch_users: Users whose suggestions are written per transaction
+        :param hub_followers: Followees with more followers than this are not counted
+
+        :return: A tuple of the number of users scored and suggestions stored
+        '''
+
+        graph = self.graph if self.graph is not None else FollowGraph()
+        graph.load(self.cursor)
+
+        users_scored = 0
+        suggestions = 0
+        after = -1
+
+        while True:
+            users = [usr for (usr,) in self.cursor.execute(Recommendations.NEXT_USERS, (after, batch_users))]
+            if not users:
+                break
+
+            rows = []
+            for usr in users:
+                ranked = Recommendations.score(graph, usr, per_user, hub_followers)
+                rows.extend((usr, rank, candidate, shared) for rank, (candidate, shared) in enumerate(ranked, 1))
+
+            batch = TextSearch.json_list(users)
+            self.write(lambda cursor: Recommendations.store(cursor, batch, rows))
+
+            users_scored += len(users)
+            suggestions += len(rows)
+            after = users[-1]
+
+        return users_scored, suggestions
+
+    def check_stats(self, repair=False):
+        '''
+        Compare the user and tweet counters against the base tables, optionally recomputing them.
+
+        :param repair: If True, every counter is recomputed from the base tables when any is wrong
+
+        :return: A tuple of the number of user_stats rows and tweet_stats rows that were wrong or missing
+        '''
+
+        mismatches = Stats.check_stats(self.cursor)
+
+        if repair and any(mismatches):
+            self.write(Stats.rebuild_stats)
+            self.cache.clear()
+
+        return mismatches
+
+    def check_query_plans(self):
+        '''
+        Make sure the hot queries of every applied migration are served by an index.
+
+        :return: A list of (version, table, query, plan detail) tuples for each query that scans or sorts its table
+        '''
+
+        return Migrations.check_query_plans(self.cursor)
+
 
     def define_tables(self):
         '''
@@ -119,8 +651,13 @@ class Database:
             );
         '''.strip().split(";")[:-1]  # get all queries seperately
 
-        for query in queries:
-            query = query.strip() + ";"  # clean up our query
-            self.cursor.execute(query)
+        with self.pool.write_lock:
+            cursor = self.connection.cursor()
+            for query in queries:
+                query = query.strip() + ";"  # clean up our query
+                cursor.execute(query)
+
+            # Freshly defined tables have none of the migrations applied yet
+            cursor.execute("PRAGMA user_version = 0;")
 
-        self.connection.commit()
\ No newline at end of file
+            self.connection.commit()
\ No newline at end of file
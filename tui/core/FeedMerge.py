@@ -0,0 +1,83 @@
+'''
+Home timeline built at read time by merging what every followee wrote and retweeted.
+
+Each user the reader follows is one stream of (date, tid, retweeter) rows, newest first,
+read a batch at a time from tweets_writer_idx and retweets_usr_idx. heapq.merge keeps the
+head of every stream in a heap and takes the newest, stopping once a page is full, so a
+page costs one seek per followee plus a few more batches however many tweets and
+retweets the followees have made. This is the alternative to the materialized timeline
+table, which is a single range read but costs a row per follower on every write.
+
+A tweet is shown once, at its latest appearance: the first time the merge reaches it,
+unless a followee wrote or retweeted it after the page's starting point, in which case
+a previous page showed it.
+'''
+import heapq
+import tui.core.Queries as Queries
+
+# Rows in a home page, one more than the frame shows so it knows whether there is a next page
+PAGE_ROWS = 6
+
+
+def stream(cursor, usr, after):
+    '''
+    Yields the (date, tid, retweeter) rows of one followee older than after, newest first.
+    The first batch is a single row, as most streams never get past their head.
+
+    :param cursor: A sqlite cursor, only used between rows so other streams can share it
+    :param usr: usr of the followee
+    :param after: The (date, tid) key the rows sort after
+    '''
+
+    limit = 1
+    while True:
+        rows = cursor.execute(Queries.FEED_STREAM, {"usr": usr, "ts": after[0], "tid": after[1], "limit": limit}).fetchall()
+        yield from rows
+
+        if len(rows) < limit:
+            return
+        after = rows[-1][:2]
+        limit = PAGE_ROWS
+
+
+def merge_feed(cursor, owner, after, rows=PAGE_ROWS, followees=None):
+    '''
+    Returns a page of a user's home timeline by merging the streams of everyone they follow.
+
+    :param cursor: A sqlite cursor
+    :param owner: usr of the user whose home timeline it is
+    :param after: The (date, tid) key of the last row of the previous page
+    :param rows: The most rows to return
+    :param followees: List of the usr of everyone owner follows, read from the follows
+    table if None
+
+    :return: A list of (tid, text, tdate, writer, sort_ts, via_retweet_usr) tuples, the
+    same rows Queries.HOME_FEED reads from the timeline table
+    '''
+
+    if followees is None:
+        followees = [flwee for (flwee,) in cursor.execute(Queries.FOLLOWEES, (owner,))]
+    streams = [stream(cursor, flwee, after) for flwee in followees]
+
+    page = []
+    shown = set()
+
+    # Between appearances on the same date, the tweet as written comes before its retweets like
+    # it does on the timeline table
+    for sort_ts, tid, retweeter in heapq.merge(*streams, key=lambda row: (*row[:2], row[2] is None), reverse=True):
+        # Older appearances of a tweet already on this page
+        if tid in shown:
+            continue
+        shown.add(tid)
+
+        # Appearances newer than the start of the page were on a previous one
+        if cursor.execute(Queries.FEED_NEWER, {"owner": owner, "tid": tid, "ts": sort_ts}).fetchone()[0]:
+            continue
+
+        tweet = cursor.execute(Queries.TWEET, (tid,)).fetchone()
+        if tweet is not None:
+            page.append((*tweet, sort_ts, retweeter))
+            if len(page) == rows:
+                break
+
+    return page
@@ -0,0 +1,180 @@
+import getpass
+import sys
+
+
+class TerminalIO:
+    '''
+    The default input source and output sink for a FrameManager, reading from and
+    writing to the terminal the program was started in.
+
+    Output is buffered and written in one call whenever the user is prompted, so a frame
+    with hundreds of lines costs one write to the terminal rather than one per line.
+    '''
+
+    def __init__(self):
+        self.pending = []  # text written since the last flush
+
+    def begin_frame(self, frame):
+        '''
+        Called whenever the FrameManager switches to a new frame, before it is rendered.
+
+        :param frame: The frame about to be rendered
+        '''
+
+        pass
+
+    def flush(self):
+        '''
+        Writes all buffered output to the terminal.
+        '''
+
+        if self.pending:
+            sys.stdout.write("".join(self.pending))
+            sys.stdout.flush()
+            self.pending = []
+
+    def write(self, text=""):
+        '''
+        Writes a block of text followed by a newline.
+
+        :param text: The text to display
+        '''
+
+        self.pending.append(f"{text}\n")
+
+    def option(self, index, text):
+        '''
+        Writes a numbered option the user can select.
+
+        :param index: The option number the user types to select it
+        :param text: The text displayed next to the option number
+        '''
+
+        self.pending.append(f"{index}) {text}\n")
+
+    def read(self, prompt=""):
+        '''
+        Prompts the user and returns their response.
+
+        :param prompt: The text displayed before the user's response
+        '''
+
+        self.flush()
+        return input(prompt)
+
+    def read_secret(self, prompt=""):
+        '''
+        Prompts the user without echoing their response, such as for passwords.
+
+        :param prompt: The text displayed before the user's response
+        '''
+
+        self.flush()
+        return getpass.getpass(prompt)
+
+
+class Screen:
+    '''
+    Everything a single frame displayed and read while it was active.
+    '''
+
+    def __init__(self, frame):
+        self.frame = frame  # name of the frame's class
+        self.lines = []  # displayed text, one entry per line
+        self.options = {}  # option number -> option text
+        self.inputs = []  # (prompt, response) pairs in the order they were read
+
+    def __repr__(self):
+        return f"Screen({self.frame}, {len(self.lines)} line(s), {len(self.options)} option(s))"
+
+
+def select(text, default=None):
+    '''
+    Returns a scripted response that picks the option of the active screen whose text
+    starts with the given text, for options whose number depends on what is displayed.
+
+    :param text: The start of the option's text, such as "Next Page"
+    :param default: The response given when there is no such option, raising
+    LookupError if None
+    '''
+
+    def response(screen):
+        for index, option_text in screen.options.items():
+            if option_text.startswith(text):
+                return index
+        if default is not None:
+            return default
+        raise LookupError(f"{screen.frame} has no option starting with {text!r}")
+
+    return response
+
+
+class ScriptedIO(TerminalIO):
+    '''
+    A headless input source and output sink that answers prompts from a script of
+    responses and captures everything displayed as a list of Screens.
+
+    Responses are strings, or callables given the active Screen that return one,
+    such as select("Log out"). Once the script runs out, reading raises EOFError
+    just like input() does when stdin is closed, which ends FrameManager.run.
+    '''
+
+    def __init__(self, responses, capture=True):
+        '''
+        :param responses: An iterable of responses given to the prompts in order
+        :param capture: Whether to keep every screen's text and inputs, turned off when
+        only the side effects of a session matter. The active screen's options are
+        always kept so select() works.
+        '''
+
+        super().__init__()
+        self.responses = iter(responses)
+        self.capture = capture
+        self.screens = [Screen(None)]  # holds anything written before the first frame
+
+    @property
+    def screen(self):
+        '''
+        The screen of the frame that is currently active
+        '''
+
+        return self.screens[-1]
+
+    def begin_frame(self, frame):
+        if self.capture:
+            self.screens.append(Screen(type(frame).__name__))
+        else:
+            self.screens[-1] = Screen(type(frame).__name__)
+
+    def write(self, text=""):
+        if self.capture:
+            self.screen.lines.extend(str(text).split("\n"))
+
+    def option(self, index, text):
+        self.screen.options[str(index)] = str(text)
+        if self.capture:
+            self.screen.lines.append(f'{index}) {text}')
+
+    def read(self, prompt=""):
+        response = next(self.responses, None)
+        if response is None:
+            raise EOFError("Scripted responses exhausted")
+
+        if callable(response):
+            response = response(self.screen)
+
+        response = str(response)
+        if self.capture:
+            self.screen.inputs.append((prompt, response))
+        return response
+
+    def read_secret(self, prompt=""):
+        return self.read(prompt)
+
+    def output(self):
+        '''
+        Returns everything displayed so far as a single string, as it would have
+        appeared in a terminal minus the echoed responses.
+        '''
+
+        return "\n".join(line for screen in self.screens for line in screen.lines)
@@ -1,13 +1,21 @@
+from .FrameIO import TerminalIO
+from .Database import ReadOnlySnapshotError
+
 
 class FrameManager:
     '''
     A class that will be responsible for displaying the current frame and switching frames.
     ''' 
 
-    def __init__(self, database):
+    def __init__(self, database, io=None):
+        '''
+        :param database: The connected Database frames query
+        :param io: The input source and output sink frames use, defaulting to the terminal
+        '''
         self.frame = None
         self.shouldDisplay = True
         self.db = database
+        self.io = io if io is not None else TerminalIO()
 
 
     def display(self, frame):
@@ -17,8 +25,15 @@ class FrameManager:
         :param frame: The frame to activate and render.
         '''
         self.frame = frame
+        self.io.begin_frame(frame)
+
+        pending = self.db.pending_prefetch
         self.frame.render()
 
+        # A prefetch the new frame neither used nor replaced was for a page the user did not go to
+        if pending is not None and self.db.pending_prefetch is pending:
+            self.db.cancel_prefetch()
+
 
     def process_input(self, response):
         '''
@@ -27,4 +42,28 @@ class FrameManager:
         :param response: A string containing the user's response.
         '''
         if self.frame:
-            self.frame.handle_event(response)
\ No newline at end of file
+            try:
+                self.frame.handle_event(response)
+            except ReadOnlySnapshotError as error:
+                # Writes fail before any frame is displayed, so the refused frame's options still apply
+                self.io.write(f"\n{error}")
+
+
+    def run(self, frame):
+        '''
+        Displays the first frame and keeps handing the user's responses to the active
+        frame until a frame stops the display or the input source runs out.
+
+        :param frame: The frame to display first
+        '''
+        try:
+            self.display(frame)
+
+            while self.shouldDisplay:
+                # Handle user input for the frame
+                self.process_input(self.io.read("\nPlease select an option: "))
+        except EOFError:
+            self.shouldDisplay = False
+        finally:
+            # Whatever the last frame displayed after the last prompt
+            self.io.flush()
@@ -0,0 +1,320 @@
+'''
+Per-query instrumentation: call counts, rows returned, latency histograms and a log of
+slow queries along with their query plans.
+
+A Database given a Metrics hands out InstrumentedCursors in place of its sqlite cursors,
+a Database without one hands out the plain cursors, so turning instrumentation off costs
+nothing on the query path.
+'''
+import bisect
+import json
+import re
+import sys
+import threading
+import time
+from time import perf_counter
+
+# Upper bounds of the latency histogram buckets in seconds, Prometheus style
+BUCKETS = [0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, float("inf")]
+
+# Statements that have no query plan worth capturing
+NO_PLAN = ("PRAGMA", "BEGIN", "COMMIT", "END", "ROLLBACK", "SAVEPOINT", "RELEASE", "CREATE", "DROP", "ALTER", "ANALYZE", "VACUUM")
+
+TABLE_REFERENCE = re.compile(r"\b(?:FROM|JOIN|INTO|UPDATE)\s+([A-Za-z_][A-Za-z0-9_]*)", re.IGNORECASE)
+
+
+def summarize(sql):
+    '''
+    Describes a statement by its verb and the tables it touches, such as
+    "SELECT timeline,tweets", to tell apart the queries made by the same function
+    '''
+
+    verb = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else ""
+    tables = []
+    for table in TABLE_REFERENCE.findall(sql):
+        if table.lower() not in tables and table.upper() not in ("SELECT", "VALUES"):
+            tables.append(table.lower())
+    return f"{verb} {','.join(tables)}".strip()
+
+
+class QueryStats:
+    '''
+    Everything recorded about one named query. Rows are the rows fetched from a query,
+    or the rows changed by an INSERT, UPDATE or DELETE.
+    '''
+
+    def __init__(self, sql):
+        self.sql = sql  # the most recent statement text recorded under the name
+        self.calls = 0
+        self.rows = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.slow = 0
+        self.buckets = [0] * len(BUCKETS)  # calls per bucket, not cumulative
+
+    def record(self, seconds, rows):
+        self.calls += 1
+        self.rows += rows
+        self.seconds += seconds
+        if seconds > self.max_seconds:
+            self.max_seconds = seconds
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+
+    def percentile(self, fraction):
+        '''
+        Estimates a latency percentile in seconds as the upper bound of the bucket it falls in
+        '''
+
+        target = fraction * self.calls
+        seen = 0
+        for bound, count in zip(BUCKETS, self.buckets):
+            seen += count
+            if seen >= target and count:
+                return min(bound, self.max_seconds)
+        return self.max_seconds
+
+    def snapshot(self):
+        return {
+            "sql": " ".join(self.sql.split()),
+            "calls": self.calls,
+            "rows": self.rows,
+            "slow": self.slow,
+            "total_ms": self.seconds * 1000,
+            "mean_ms": self.seconds * 1000 / self.calls if self.calls else 0.0,
+            "max_ms": self.max_seconds * 1000,
+            "p50_ms": self.percentile(0.50) * 1000,
+            "p99_ms": self.percentile(0.99) * 1000,
+            "buckets": {("+Inf" if bound == float("inf") else str(bound)): count for bound, count in zip(BUCKETS, self.buckets)},
+        }
+
+
+class Metrics:
+    '''
+    Collects QueryStats by query name, safe to share between the Databases of many threads.
+    '''
+
+    def __init__(self, slow_ms=None, log=None):
+        '''
+        :param slow_ms: Queries slower than this many milliseconds are logged with their
+        query plan, None never logs
+        :param log: Function given each slow query report, printing to stderr if None
+        '''
+
+        self.slow_seconds = slow_ms / 1000 if slow_ms is not None else None
+        self.log = log if log else (lambda message: print(message, file=sys.stderr))
+        self.queries = {}
+        self.lock = threading.Lock()
+
+    def record(self, name, sql, seconds, rows):
+        '''
+        Adds one finished call of a query.
+
+        :return: True if the call was slower than the slow query threshold
+        '''
+
+        with self.lock:
+            stats = self.queries.get(name)
+            if stats is None:
+                stats = self.queries[name] = QueryStats(sql)
+            stats.sql = sql
+            stats.record(seconds, rows)
+
+            slow = self.slow_seconds is not None and seconds > self.slow_seconds
+            if slow:
+                stats.slow += 1
+
+        return slow
+
+    def log_slow(self, name, sql, parameters, seconds, rows, plan):
+        '''
+        Reports a slow query with its parameters and query plan.
+
+        :param plan: Rows of EXPLAIN QUERY PLAN (id, parent, notused, detail), or None
+        '''
+
+        lines = [f"Slow query {name}: {seconds * 1000:.2f} ms, {rows} row(s)", "  " + " ".join(sql.split())]
+        if parameters:
+            lines.append(f"  parameters: {parameters!r}")
+
+        if plan:
+            # Indents every step under its parent step like the sqlite shell does
+            depth = {0: 0}
+            for node, parent, _, detail in plan:
+                depth[node] = depth.get(parent, 0) + 1
+                lines.append("  " + "  " * depth[node] + detail)
+
+        self.log("\n".join(lines))
+
+    def snapshot(self):
+        '''
+        Returns the stats of every query as a dictionary keyed by query name
+        '''
+
+        with self.lock:
+            return {name: stats.snapshot() for name, stats in sorted(self.queries.items())}
+
+    def to_json(self):
+        return json.dumps({"time": time.time(), "queries": self.snapshot()}, indent=2)
+
+    def to_prometheus(self):
+        '''
+        Returns the stats in the Prometheus text exposition format
+        '''
+
+        def label(name):
+            return name.replace("\\", "\\\\").replace('"', '\\"')
+
+        lines = [
+            "# HELP tui_query_duration_seconds Time spent executing and fetching each query.",
+            "# TYPE tui_query_duration_seconds histogram",
+        ]
+        with self.lock:
+            queries = sorted(self.queries.items())
+
+            for name, stats in queries:
+                cumulative = 0
+                for bound, count in zip(BUCKETS, stats.buckets):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'tui_query_duration_seconds_bucket{{query="{label(name)}",le="{le}"}} {cumulative}')
+                lines.append(f'tui_query_duration_seconds_sum{{query="{label(name)}"}} {stats.seconds!r}')
+                lines.append(f'tui_query_duration_seconds_count{{query="{label(name)}"}} {stats.calls}')
+
+            lines.append("# HELP tui_query_rows_total Rows returned by each query.")
+            lines.append("# TYPE tui_query_rows_total counter")
+            for name, stats in queries:
+                lines.append(f'tui_query_rows_total{{query="{label(name)}"}} {stats.rows}')
+
+            lines.append("# HELP tui_slow_queries_total Calls of each query slower than the slow query threshold.")
+            lines.append("# TYPE tui_slow_queries_total counter")
+            for name, stats in queries:
+                lines.append(f'tui_slow_queries_total{{query="{label(name)}"}} {stats.slow}')
+
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path):
+        '''
+        Writes a snapshot to path, in the Prometheus text format if it ends in .prom or
+        .txt and as JSON otherwise.
+        '''
+
+        text = self.to_prometheus() if path.endswith((".prom", ".txt")) else self.to_json()
+        with open(path, "w") as f:
+            f.write(text)
+
+
+class InstrumentedCursor:
+    '''
+    Wraps a sqlite cursor, timing every statement from execute until the next statement
+    or close, so the time spent fetching its rows is included.
+
+    Queries are named by execute's name argument, then by the names given for known
+    statement texts, and otherwise after the function that ran them and the statement's
+    verb and tables, such as "Stats.check_stats: SELECT user_stats".
+    '''
+
+    def __init__(self, cursor, metrics, names=None):
+        '''
+        :param cursor: The sqlite cursor to wrap
+        :param metrics: The Metrics to record into
+        :param names: Dictionary of query names by statement text, such as Queries.NAMES
+        '''
+
+        self._cursor = cursor
+        self._metrics = metrics
+        self._known = names if names is not None else {}
+        self._pending = None  # [name, sql, parameters, seconds so far, rows so far]
+        self._names = {}  # (caller, sql) -> query name
+
+    def __getattr__(self, attribute):
+        # Everything that is not timed, such as rowcount and lastrowid, goes to the real cursor
+        return getattr(self._cursor, attribute)
+
+    def _name(self, sql, caller):
+        known = self._known.get(sql)
+        if known is not None:
+            return known
+
+        key = (caller.f_code, sql)
+        name = self._names.get(key)
+        if name is None:
+            code = caller.f_code
+            name = self._names[key] = f"{getattr(code, 'co_qualname', code.co_name)}: {summarize(sql)}"
+        return name
+
+    def _fetched(self, start, rows):
+        if self._pending is not None:
+            self._pending[3] += perf_counter() - start
+            self._pending[4] += rows
+
+    def _finish(self):
+        '''
+        Records the statement in progress, logging it if it was slow
+        '''
+
+        if self._pending is None:
+            return
+
+        name, sql, parameters, seconds, rows = self._pending
+        self._pending = None
+
+        if self._metrics.record(name, sql, seconds, rows):
+            plan = None
+            if not sql.lstrip().upper().startswith(NO_PLAN):
+                try:
+                    plan = self._cursor.connection.execute(f"EXPLAIN QUERY PLAN {sql}", parameters).fetchall()
+                except Exception:
+                    pass
+            self._metrics.log_slow(name, sql, parameters, seconds, rows, plan)
+
+    def execute(self, sql, parameters=(), name=None):
+        if self._pending is not None:
+            self._finish()
+        if name is None:
+            name = self._name(sql, sys._getframe(1))
+
+        start = perf_counter()
+        self._cursor.execute(sql, parameters)
+        seconds = perf_counter() - start
+
+        # Statements without a result set count the rows they changed instead
+        rows = max(self._cursor.rowcount, 0) if self._cursor.description is None else 0
+        self._pending = [name, sql, parameters, seconds, rows]
+        return self
+
+    def executemany(self, sql, seq_of_parameters, name=None):
+        if self._pending is not None:
+            self._finish()
+        if name is None:
+            name = self._name(sql, sys._getframe(1))
+
+        start = perf_counter()
+        self._cursor.executemany(sql, seq_of_parameters)
+        self._pending = [name, sql, (), perf_counter() - start, max(self._cursor.rowcount, 0)]
+        return self
+
+    def fetchone(self):
+        start = perf_counter()
+        row = self._cursor.fetchone()
+        self._fetched(start, row is not None)
+        return row
+
+    def fetchmany(self, size=None):
+        start = perf_counter()
+        rows = self._cursor.fetchmany(size) if size is not None else self._cursor.fetchmany()
+        self._fetched(start, len(rows))
+        return rows
+
+    def fetchall(self):
+        start = perf_counter()
+        rows = self._cursor.fetchall()
+        self._fetched(start, len(rows))
+        return rows
+
+    def __iter__(self):
+        while (row := self.fetchone()) is not None:
+            yield row
+
+    def close(self):
+        self._finish()
+        self._cursor.close()
@@ -0,0 +1,325 @@
+import re
+
+import tui.core.Queries as Queries
+import tui.core.Timeline as Timeline
+import tui.core.TextSearch as TextSearch
+import tui.core.Stats as Stats
+import tui.core.Sequences as Sequences
+import tui.core.Recommendations as Recommendations
+
+# Words that can follow a table name in a FROM or JOIN clause without being its alias
+CLAUSE_KEYWORDS = {
+    "WHERE", "ON", "USING", "JOIN", "LEFT", "RIGHT", "FULL", "INNER", "OUTER", "CROSS", "NATURAL",
+    "GROUP", "ORDER", "LIMIT", "HAVING", "WINDOW", "UNION", "EXCEPT", "INTERSECT", "INDEXED", "NOT",
+}
+
+
+def table_names(table, query):
+    '''
+    Returns every name a query refers to table by, the table itself and the aliases it is given,
+    since query plans name a table by its alias when it has one
+
+    :param table: Name of the table
+    :param query: SQL text of the query
+    '''
+
+    names = {table}
+
+    for alias in re.findall(rf"\b(?:FROM|JOIN)\s+{re.escape(table)}\s+(?:AS\s+)?(\w+)", query, re.IGNORECASE):
+        if alias.upper() not in CLAUSE_KEYWORDS:
+            names.add(alias)
+
+    return names
+
+
+class Migration:
+    '''
+    A single versioned upgrade of the database schema.
+
+    Migrations are applied in order of their version, each inside its own transaction,
+    and the version of the last applied migration is stored in PRAGMA user_version.
+    A migration whose work depends on the SQLite build can be retried by later runs.
+    '''
+
+    def __init__(self, version, description, statements, plan_checks=None, retry=None):
+        '''
+        Initialization of the migration
+
+        :param version: Integer schema version the database is at once this migration is applied
+        :param description: Short human readable summary of the migration
+        :param statements: List of SQL statements, or callables taking a cursor, run in order
+        :param plan_checks: List of (table, query, params) tuples whose query plan must not scan the table
+        or sort its rows for the ORDER BY
+        :param retry: Callable taking a cursor that tells whether the migration, although applied,
+        left work undone that it could finish now, such as an index the SQLite build could not
+        create at the time. The migration is then applied again.
+        '''
+
+        self.version = version
+        self.description = description
+        self.statements = statements
+        self.plan_checks = plan_checks if plan_checks else []
+        self.retry = retry
+
+    def needs_retry(self, cursor):
+        '''
+        Checks whether an applied migration should be applied again
+
+        :param cursor: A sqlite cursor
+        '''
+
+        return self.retry is not None and self.retry(cursor)
+
+    def apply(self, cursor):
+        '''
+        Runs every statement of the migration
+
+        :param cursor: A sqlite cursor with a transaction already open
+        '''
+
+        for statement in self.statements:
+            if callable(statement):
+                statement(cursor)
+            else:
+                cursor.execute(statement)
+
+    def check_plans(self, cursor):
+        '''
+        Runs EXPLAIN QUERY PLAN over every plan check of the migration
+
+        :param cursor: A sqlite cursor on a database at or above this migration's version
+
+        :return: A list of (table, query, plan detail) tuples for each check that scans its table
+        or sorts its rows
+        '''
+
+        failures = []
+
+        for table, query, params in self.plan_checks:
+            names = table_names(table, query)
+            cursor.execute("EXPLAIN QUERY PLAN " + query, params)
+
+            # Each plan row is (id, parent, notused, detail), a full scan reads "SCAN <table or alias> ..."
+            # and a page read out of order reads "USE TEMP B-TREE FOR ORDER BY"
+            for row in cursor.fetchall():
+                detail = row[3]
+                words = detail.split()
+                scans = len(words) >= 2 and words[0] == "SCAN" and words[1] in names
+                if scans or detail.startswith("USE TEMP B-TREE FOR") and "ORDER BY" in detail:
+                    failures.append((table, " ".join(query.split()), detail))
+
+        return failures
+
+
+MIGRATIONS = [
+    Migration(
+        1,
+        "Secondary indexes for follower, profile, reply and retweet lookups",
+        [
+            "CREATE INDEX IF NOT EXISTS follows_flwee_idx ON follows (flwee, flwer);",
+            "CREATE INDEX IF NOT EXISTS tweets_writer_idx ON tweets (writer, tdate, tid);",
+            "CREATE INDEX IF NOT EXISTS tweets_replyto_idx ON tweets (replyto, tdate, tid);",
+            "CREATE INDEX IF NOT EXISTS retweets_tid_idx ON retweets (tid, usr);",
+        ],
+        [
+            ("follows", "SELECT flwer FROM follows WHERE flwee = ?", (1,)),
+            ("follows", "SELECT COUNT(DISTINCT flwer) FROM follows WHERE flwee = ?", (1,)),
+            ("tweets", "SELECT COUNT(DISTINCT tid) FROM tweets WHERE writer = ?", (1,)),
+            ("tweets", '''
+                SELECT tid, text, tdate
+                FROM tweets
+                WHERE writer = ? AND (tdate, tid) < (?, ?)
+                ORDER BY tdate DESC, tid DESC
+                LIMIT 4
+            ''', (1, "9999-12-31", 2 ** 63 - 1)),
+            ("tweets", "SELECT COUNT(DISTINCT tid) FROM tweets WHERE replyto = ?", (1,)),
+            ("retweets", "SELECT COUNT(DISTINCT usr) FROM retweets WHERE tid = ?", (1,)),
+        ]
+    ),
+    Migration(
+        2,
+        "Materialized home timeline filled by fan-out-on-write triggers",
+        [*Timeline.SCHEMA, Timeline.rebuild_timeline],
+        [
+            ("timeline", '''
+                SELECT t.tid, t.text, t.tdate, t.writer, tl.sort_ts, tl.via_retweet_usr
+                FROM timeline tl JOIN tweets t ON t.tid = tl.tid
+                WHERE tl.owner = ? AND (tl.sort_ts, tl.tid) < (?, ?)
+                ORDER BY tl.sort_ts DESC, tl.tid DESC
+                LIMIT 6
+            ''', (1, "9999-12-31", 2 ** 63 - 1)),
+            ("follows", "SELECT flwer FROM follows WHERE flwee = ?", (1,)),
+            ("retweets", "SELECT tid FROM retweets WHERE usr = ?", (1,)),
+        ]
+    ),
+    Migration(
+        3,
+        "Trigram full-text index over tweet text, skipped on SQLite builds without FTS5 until one has it",
+        [TextSearch.create_tweet_index],
+        retry=TextSearch.tweet_index_missing
+    ),
+    Migration(
+        4,
+        "Lowercase hashtag terms and index mentions by term",
+        [
+            TextSearch.normalize_hashtags,
+            "CREATE INDEX IF NOT EXISTS mentions_term_idx ON mentions (term, tid);",
+        ],
+        [
+            ("hashtags", "SELECT COUNT(*) FROM hashtags WHERE term = ?", ("oilers",)),
+            ("mentions", "SELECT tid FROM mentions WHERE term IN (SELECT value FROM json_each(?))", ('["oilers"]',)),
+        ]
+    ),
+    Migration(
+        5,
+        "Trigram full-text index over user names and cities, skipped on SQLite builds without FTS5 until one has it",
+        [TextSearch.create_user_index],
+        retry=TextSearch.user_index_missing
+    ),
+    Migration(
+        6,
+        "Trigger-maintained user and tweet counters",
+        [*Stats.SCHEMA, Stats.rebuild_stats],
+        [
+            ("user_stats", "SELECT tweets, following, followers FROM user_stats WHERE usr = ?", (1,)),
+            ("tweet_stats", "SELECT replies, retweets FROM tweet_stats WHERE tid = ?", (1,)),
+        ]
+    ),
+    Migration(
+        7,
+        "Sequence table for allocating tweet and user ids",
+        [*Sequences.SCHEMA, Sequences.reseed_sequences],
+        [
+            ("id_sequences", "SELECT next_id FROM id_sequences WHERE name = ?", ("tweets",)),
+        ]
+    ),
+    Migration(
+        8,
+        "Index retweets by retweeter and date for the merged home feed",
+        [
+            "CREATE INDEX IF NOT EXISTS retweets_usr_idx ON retweets (usr, rdate, tid);",
+        ],
+        [
+            ("retweets", '''
+                SELECT rdate, tid, usr
+                FROM retweets
+                WHERE usr = ? AND (rdate, tid) < (?, ?)
+                ORDER BY rdate DESC, tid DESC
+                LIMIT 6
+            ''', (1, "9999-12-31", 2 ** 63 - 1)),
+        ]
+    ),
+    Migration(
+        9,
+        "Who to follow suggestions, filled in by manage.py recommend",
+        [*Recommendations.SCHEMA],
+        [
+            # The who to follow page, checked once for each table it reads
+            *[(table, '''
+                SELECT candidate, name, shared
+                FROM recommendations JOIN users ON users.usr = recommendations.candidate
+                WHERE recommendations.usr = ?
+                AND NOT EXISTS (SELECT 1 FROM follows WHERE flwer = recommendations.usr AND flwee = recommendations.candidate)
+                ORDER BY rank
+                LIMIT 10
+            ''', (1,)) for table in ("recommendations", "users", "follows")],
+            ("follows", "SELECT flwer FROM follows WHERE flwee = ?", (1,)),
+        ]
+    ),
+    Migration(
+        10,
+        "Take deleted tweets and retweets off home timelines",
+        [*Timeline.DELETE_SCHEMA],
+        [
+            ("retweets", "SELECT f.flwer FROM retweets r JOIN follows f ON f.flwee = r.usr WHERE r.tid = ?", (1,)),
+            ("follows", "SELECT f.flwer FROM retweets r JOIN follows f ON f.flwee = r.usr WHERE r.tid = ?", (1,)),
+            ("timeline", "SELECT sort_ts FROM timeline WHERE owner = ? AND tid = ?", (1, 1)),
+        ]
+    ),
+    Migration(
+        11,
+        "Index tweets by date for warming up trending hashtags",
+        [
+            "CREATE INDEX IF NOT EXISTS tweets_tdate_idx ON tweets (tdate, tid);",
+        ],
+        [
+            ("tweets", Queries.RECENT_MENTIONS, ("2026-01-01",)),
+            ("mentions", Queries.RECENT_MENTIONS, ("2026-01-01",)),
+        ]
+    ),
+]
+
+
+def schema_version(cursor):
+    '''
+    Returns the schema version stored in the database header
+
+    :param cursor: A sqlite cursor
+    '''
+
+    cursor.execute("PRAGMA user_version;")
+    return cursor.fetchone()[0]
+
+
+def migrate(connection):
+    '''
+    Upgrades the database in place by applying every migration newer than its schema version,
+    and applying again every older one that asks to be retried.
+
+    :param connection: A sqlite connection with no transaction open
+
+    :return: A list of the migrations that were applied
+    '''
+
+    cursor = connection.cursor()
+    applied = []
+
+    version = schema_version(cursor)
+
+    for migration in MIGRATIONS:
+        if migration.version <= version and not migration.needs_retry(cursor):
+            continue
+
+        # The schema changes and the version bump commit together or not at all. The version is
+        # read again under the write lock in case another process migrated the file meanwhile
+        cursor.execute("BEGIN IMMEDIATE;")
+        try:
+            current_version = schema_version(cursor)
+            if current_version >= migration.version and not migration.needs_retry(cursor):
+                connection.rollback()
+                continue
+
+            # A retried migration leaves the version where the later migrations put it
+            migration.apply(cursor)
+            if current_version < migration.version:
+                cursor.execute(f"PRAGMA user_version = {migration.version};")
+            connection.commit()
+        except:
+            connection.rollback()
+            raise
+
+        applied.append(migration)
+
+    return applied
+
+
+def check_query_plans(cursor):
+    '''
+    Runs the plan checks of every migration the database has applied.
+
+    :param cursor: A sqlite cursor
+
+    :return: A list of (version, table, query, plan detail) tuples for each check that scans or sorts its table
+    '''
+
+    current_version = schema_version(cursor)
+    failures = []
+
+    for migration in MIGRATIONS:
+        if migration.version > current_version:
+            continue
+
+        for failure in migration.check_plans(cursor):
+            failures.append((migration.version, *failure))
+
+    return failures
@@ -0,0 +1,199 @@
+'''
+Speculative fetching of the next page of a paged frame while the user reads the current
+one, on worker threads with read-only connections of their own.
+
+A frame showing a page that has a next page submits the query for it. When the user
+picks Next Page, the new frame asks for exactly that query and gets the rows from
+memory, or waits for the worker if it is still running the query. A prefetch is thrown
+away when the user goes anywhere else, and when any write commits through the pool
+between the prefetch being submitted and used, since the write may have changed the
+page.
+'''
+import queue
+import sqlite3
+import threading
+
+# States of a PrefetchJob
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+CANCELLED = "cancelled"
+
+
+class PrefetchJob:
+    '''
+    One query to run in the background and, once done, its rows.
+    '''
+
+    def __init__(self, sql, parameters, commits):
+        '''
+        :param sql: The statement, one of the statements in Queries
+        :param parameters: The statement's parameters, a tuple or dictionary
+        :param commits: The pool's commit count when the job was submitted
+        '''
+
+        self.sql = sql
+        self.parameters = parameters
+        self.commits = commits
+        self.state = QUEUED
+        self.rows = None  # None if the query failed or was interrupted
+        self.done = threading.Event()
+        self.worker = None  # the Worker running the job
+
+    def matches(self, sql, parameters):
+        return self.sql == sql and self.parameters == parameters
+
+
+class Worker(threading.Thread):
+    '''
+    Thread running prefetch jobs on its own read-only connection.
+    '''
+
+    def __init__(self, prefetcher):
+        super().__init__(name="prefetch", daemon=True)
+        self.prefetcher = prefetcher
+        self.connection = None
+
+    def run(self):
+        self.connection = self.prefetcher.pool.open_reader()
+        jobs = self.prefetcher.jobs
+
+        while (job := jobs.get()) is not None:
+            with self.prefetcher.lock:
+                if job.state != QUEUED:
+                    continue
+                job.state = RUNNING
+                job.worker = self
+
+            try:
+                rows = self.connection.execute(job.sql, job.parameters).fetchall()
+            except sqlite3.Error:
+                # Interrupted by a cancel, or failed, either way the page is queried again when needed
+                rows = None
+
+            with self.prefetcher.lock:
+                job.worker = None
+                if job.state == RUNNING:
+                    job.state = DONE
+                    job.rows = rows
+                    self.prefetcher.completed += 1
+                job.done.set()
+
+        self.connection.close()
+
+
+class Prefetcher:
+    '''
+    Runs PrefetchJobs for the Databases of one ConnectionPool, safe to share between the
+    Databases of many threads. Worker threads and their connections are started on the
+    first submit.
+    '''
+
+    def __init__(self, pool, threads=1):
+        '''
+        :param pool: The ConnectionPool to open the workers' connections on, whose
+        commit count decides whether a prefetched page is still current
+        :param threads: How many queries may be prefetched at once, 0 disables prefetching
+        '''
+
+        self.pool = pool
+        self.threads = threads
+        self.jobs = queue.SimpleQueue()
+        self.workers = []
+        self.lock = threading.Lock()
+
+        self.submitted = 0
+        self.completed = 0
+        self.used = 0
+        self.cancelled = 0
+        self.stale = 0  # completed but a write committed before they were used
+
+    def submit(self, sql, parameters):
+        '''
+        Queues a query to run in the background.
+
+        :return: The PrefetchJob, or None if prefetching is disabled
+        '''
+
+        if not self.threads:
+            return None
+
+        with self.lock:
+            if not self.workers:
+                self.workers = [Worker(self) for _ in range(self.threads)]
+                for worker in self.workers:
+                    worker.start()
+            self.submitted += 1
+
+        job = PrefetchJob(sql, parameters, self.pool.commits)
+        self.jobs.put(job)
+        return job
+
+    def cancel(self, job):
+        '''
+        Discards a job, interrupting its query if a worker is running it.
+
+        :param job: A PrefetchJob returned by submit
+        '''
+
+        with self.lock:
+            if job.state == RUNNING:
+                job.worker.connection.interrupt()
+            if job.state in (QUEUED, RUNNING):
+                self.cancelled += 1
+            job.state = CANCELLED
+
+    def result(self, job):
+        '''
+        Returns the rows of a job, waiting for it if a worker is running it. Jobs that are
+        still queued are cancelled rather than waited for, as running the query right away
+        is quicker than waiting for the jobs ahead of it.
+
+        :param job: A PrefetchJob returned by submit
+        :return: The rows, or None if the caller has to run the query itself
+        '''
+
+        with self.lock:
+            if job.state == CANCELLED:
+                return None
+            if job.state == QUEUED:
+                job.state = CANCELLED
+                self.cancelled += 1
+                return None
+
+        job.done.wait()
+
+        with self.lock:
+            # A write committed since the job was submitted may have changed the page
+            if job.state != DONE or job.rows is None:
+                return None
+            if job.commits != self.pool.commits:
+                self.stale += 1
+                return None
+            self.used += 1
+            return job.rows
+
+    def stats(self):
+        '''
+        Returns the job counters as a dictionary
+        '''
+
+        with self.lock:
+            return {
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "used": self.used,
+                "cancelled": self.cancelled,
+                "stale": self.stale,
+            }
+
+    def close(self):
+        '''
+        Stops the workers once they finish their current job, closing their connections.
+        '''
+
+        for worker in self.workers:
+            self.jobs.put(None)
+        for worker in self.workers:
+            worker.join()
+        self.workers = []
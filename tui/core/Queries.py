@@ -0,0 +1,306 @@
+'''
+Every statement the frames and Database run, each under a name and with a fixed shape.
+
+sqlite3 keeps a cache of prepared statements per connection keyed by the statement
+text, so a statement is only compiled the first time a connection runs it as long as
+its text never changes. Values always go in as parameters, and lists of values (such
+as the keywords of a search) as a single JSON array parameter read with json_each, so
+no statement here is ever built from a string at runtime.
+
+Statements that maintain the schema itself (migrations, triggers, rebuilds and id
+sequences) stay with the modules that own those tables.
+'''
+import tui.core.TextSearch as TextSearch
+import tui.utils.StringUtils as StringUtils
+
+# Login, the count tells whether the credentials matched
+LOGIN = "SELECT COUNT(*), * FROM users WHERE usr = ? AND pwd = ?;"
+
+# Home timeline page, seeking past the (sort_ts, tid) of the last tweet of the previous page
+HOME_FEED = '''
+    SELECT t.tid, t.text, t.tdate, t.writer, tl.sort_ts, tl.via_retweet_usr
+    FROM timeline tl JOIN tweets t ON t.tid = tl.tid
+    WHERE tl.owner = ? AND (tl.sort_ts, tl.tid) < (?, ?)
+    ORDER BY tl.sort_ts DESC, tl.tid DESC
+    LIMIT 6;
+'''
+
+# Users a user follows, each one a stream of the merged home feed
+FOLLOWEES = "SELECT flwee FROM follows WHERE flwer = ?;"
+
+# One followee's stream of the merged home feed: their tweets and retweets newest first as
+# (date, tid, retweeter) rows, seeking past the (date, tid) of the last row read.
+# tweets_writer_idx and retweets_usr_idx yield both halves in order, so sqlite merges them
+# without sorting.
+FEED_STREAM = '''
+    SELECT tdate, tid, NULL FROM tweets WHERE writer = :usr AND (tdate, tid) < (:ts, :tid)
+    UNION ALL
+    SELECT rdate, tid, usr FROM retweets WHERE usr = :usr AND (rdate, tid) < (:ts, :tid)
+    ORDER BY 1 DESC, 2 DESC
+    LIMIT :limit;
+'''
+
+# Whether a user :owner follows wrote or retweeted :tid after :ts, which puts the tweet
+# higher up the merged home feed than the row dated :ts
+FEED_NEWER = '''
+    SELECT EXISTS (
+        SELECT 1 FROM retweets r JOIN follows f ON f.flwer = :owner AND f.flwee = r.usr
+        WHERE r.tid = :tid AND r.rdate > :ts
+    ) OR EXISTS (
+        SELECT 1 FROM tweets t JOIN follows f ON f.flwer = :owner AND f.flwee = t.writer
+        WHERE t.tid = :tid AND t.tdate > :ts
+    );
+'''
+
+# Followers of a user with their names in usr order, starting after the last follower of
+# the previous page. follows_flwee_idx yields them in order without sorting, so rows are
+# read only as far as they are fetched.
+FOLLOWERS = '''
+    SELECT f.flwer, u.name
+    FROM follows f JOIN users u ON u.usr = f.flwer
+    WHERE f.flwee = ? AND f.flwer > ?
+    ORDER BY f.flwer;
+'''
+
+IS_FOLLOWING = "SELECT COUNT(DISTINCT flwer) FROM follows WHERE flwer = ? AND flwee = ?;"
+
+# Who to follow suggestions of a user with their names, best first, leaving out accounts the
+# user followed since the suggestions were worked out
+RECOMMENDATIONS = '''
+    SELECT r.candidate, u.name, r.shared
+    FROM recommendations r JOIN users u ON u.usr = r.candidate
+    WHERE r.usr = ?
+    AND NOT EXISTS (SELECT 1 FROM follows f WHERE f.flwer = r.usr AND f.flwee = r.candidate)
+    ORDER BY r.rank
+    LIMIT 10;
+'''
+
+# Smallest and largest usr of any follow, which size the follow graph's offsets
+FOLLOW_USR_RANGE = '''
+    SELECT MIN((SELECT MIN(flwer) FROM follows), (SELECT MIN(flwee) FROM follows)),
+           MAX((SELECT MAX(flwer) FROM follows), (SELECT MAX(flwee) FROM follows));
+'''
+
+# How many users each user follows, and the followees themselves, in (flwer, flwee) order.
+# Both are read in the order of the follows primary key, so neither is sorted.
+FOLLOWING_COUNTS = "SELECT flwer, COUNT(*) FROM follows GROUP BY flwer ORDER BY flwer;"
+FOLLOWING_EDGES = "SELECT flwee FROM follows ORDER BY flwer, flwee;"
+
+# How many followers each user has, and the followers themselves, in (flwee, flwer) order,
+# read in the order of follows_flwee_idx
+FOLLOWER_COUNTS = "SELECT flwee, COUNT(*) FROM follows GROUP BY flwee ORDER BY flwee;"
+FOLLOWER_EDGES = "SELECT flwer FROM follows ORDER BY flwee, flwer;"
+
+USER_NAME = "SELECT DISTINCT usr, name FROM users WHERE usr = ?;"
+
+# Names of a JSON array of users in usr order, for a page of followers read from the follow graph
+USER_NAMES = "SELECT usr, name FROM users WHERE usr IN (SELECT value FROM json_each(?)) ORDER BY usr;"
+
+USER_STATS = "SELECT tweets, following, followers FROM user_stats WHERE usr = ?;"
+
+# Profile page of a user's own tweets, seeking past the last tweet of the previous page
+USER_TWEETS = '''
+    SELECT tid, text, tdate
+    FROM tweets
+    WHERE writer = ? AND (tdate, tid) < (?, ?)
+    ORDER BY tdate DESC, tid DESC
+    LIMIT 4;
+'''
+
+TWEET = "SELECT DISTINCT t.tid, t.text, t.tdate, t.writer FROM tweets t WHERE t.tid = ?;"
+
+TWEET_STATS = "SELECT s.replies, s.retweets FROM tweet_stats s WHERE s.tid = ?;"
+
+# A page of a tweet's conversation in one statement, as (depth, tid, replyto, writer, tdate,
+# text, replies) rows: up to :ancestors tweets it replies to, root first, at negative depths,
+# the tweet itself at depth 0, then a page of its direct replies, oldest first after the
+# (tdate, tid) of the last reply of the previous page, each followed by up to :fanout of its
+# own replies, :depth levels down. Every level is a seek into tweets_replyto_idx with a
+# LIMIT, so the rows read are bounded by the page, fanout and depth however big the thread
+# is. Replies sort by the path of (tdate, tid) keys from the page's direct reply down.
+THREAD = '''
+    WITH RECURSIVE
+    ancestors (tid, replyto, depth) AS (
+        SELECT tid, replyto, -1 FROM tweets WHERE tid = (SELECT replyto FROM tweets WHERE tid = :tid)
+        UNION ALL
+        SELECT t.tid, t.replyto, a.depth - 1
+        FROM ancestors a JOIN tweets t ON t.tid = a.replyto
+        WHERE a.depth > -:ancestors
+    ),
+    replies (tid, depth, path) AS (
+        SELECT tid, 1, printf('%s%020d', tdate, tid)
+        FROM (
+            SELECT tid, tdate FROM tweets
+            WHERE replyto = :tid AND (tdate, tid) > (:tdate, :after_tid)
+            ORDER BY tdate, tid
+            LIMIT :page
+        )
+        UNION ALL
+        SELECT c.tid, r.depth + 1, r.path || printf('%s%020d', c.tdate, c.tid)
+        FROM replies r JOIN tweets c ON c.tid IN (
+            SELECT s.tid FROM tweets s WHERE s.replyto = r.tid ORDER BY s.tdate, s.tid LIMIT :fanout
+        )
+        WHERE r.depth < :depth
+    )
+    SELECT x.depth, t.tid, t.replyto, t.writer, t.tdate, t.text, COALESCE(s.replies, 0)
+    FROM (
+        SELECT tid, depth, NULL AS path FROM ancestors
+        UNION ALL
+        SELECT :tid, 0, NULL
+        UNION ALL
+        SELECT tid, depth, path FROM replies
+    ) x
+    JOIN tweets t ON t.tid = x.tid
+    LEFT JOIN tweet_stats s ON s.tid = t.tid
+    ORDER BY x.depth > 0, x.path, x.depth;
+'''
+
+HAS_RETWEETED = "SELECT COUNT(DISTINCT r.usr) FROM retweets r WHERE r.tid = ? AND r.usr = ?;"
+
+# Tweet search page. A tweet matches if it mentions one of the hashtag terms, contains one of
+# the full-text keywords or contains one of the scanned keywords. Every kind of keyword is
+# bound as a JSON array (the full-text ones as one MATCH expression, or NULL), and a kind
+# with no keywords is skipped before sqlite reads any rows for it, so the one statement
+# serves every mix of keywords.
+TWEET_SEARCH = '''
+    SELECT t.tid, t.text, t.tdate, t.writer
+    FROM tweets t
+    WHERE t.tid IN (
+        SELECT m.tid FROM mentions m WHERE m.term IN (SELECT value FROM json_each(:hashtags))
+        UNION
+        SELECT rowid FROM tweets_fts WHERE :match IS NOT NULL AND tweets_fts MATCH :match
+        UNION
+        SELECT tid FROM tweets
+        WHERE json_array_length(:scan) > 0
+        AND EXISTS (SELECT 1 FROM json_each(:scan) k WHERE UPPER(text) LIKE '%' || k.value || '%')
+    )
+    AND (t.tdate, t.tid) < (:tdate, :tid)
+    ORDER BY t.tdate DESC, t.tid DESC
+    LIMIT 6;
+'''
+
+# TWEET_SEARCH for databases without tweets_fts, every keyword that is not a hashtag is scanned
+TWEET_SEARCH_SCAN = '''
+    SELECT t.tid, t.text, t.tdate, t.writer
+    FROM tweets t
+    WHERE t.tid IN (
+        SELECT m.tid FROM mentions m WHERE m.term IN (SELECT value FROM json_each(:hashtags))
+        UNION
+        SELECT tid FROM tweets
+        WHERE json_array_length(:scan) > 0
+        AND EXISTS (SELECT 1 FROM json_each(:scan) k WHERE UPPER(text) LIKE '%' || k.value || '%')
+    )
+    AND (t.tdate, t.tid) < (:tdate, :tid)
+    ORDER BY t.tdate DESC, t.tid DESC
+    LIMIT 6;
+'''
+
+# User search page. Names matching the keyword rank before cities, then shorter matches first,
+# seeking past the (rank, length, usr) of the last user on the previous page. Candidates come
+# from the trigram index on name and city.
+USER_SEARCH = '''
+    SELECT usr, name, city, name_rank, match_len
+    FROM (
+        SELECT usr, name, city,
+        CASE WHEN name_match THEN 1 ELSE 2 END AS name_rank,
+        CASE WHEN name_match THEN LENGTH(name) ELSE LENGTH(city) END AS match_len
+        FROM (
+            SELECT u.usr, u.name, u.city,
+            UPPER(u.name) LIKE '%' || :keyword || '%' AS name_match,
+            UPPER(u.city) LIKE '%' || :keyword || '%' AS city_match
+            FROM users u
+            WHERE u.usr IN (SELECT rowid FROM users_fts WHERE users_fts MATCH :match)
+        )
+        WHERE name_match OR city_match
+    )
+    WHERE (name_rank, match_len, usr) > (:rank, :length, :usr)
+    ORDER BY name_rank, match_len, usr
+    LIMIT 6;
+'''
+
+# USER_SEARCH scanning every user, for keywords too short for trigrams or databases without users_fts
+USER_SEARCH_SCAN = '''
+    SELECT usr, name, city, name_rank, match_len
+    FROM (
+        SELECT usr, name, city,
+        CASE WHEN name_match THEN 1 ELSE 2 END AS name_rank,
+        CASE WHEN name_match THEN LENGTH(name) ELSE LENGTH(city) END AS match_len
+        FROM (
+            SELECT u.usr, u.name, u.city,
+            UPPER(u.name) LIKE '%' || :keyword || '%' AS name_match,
+            UPPER(u.city) LIKE '%' || :keyword || '%' AS city_match
+            FROM users u
+        )
+        WHERE name_match OR city_match
+    )
+    WHERE (name_rank, match_len, usr) > (:rank, :length, :usr)
+    ORDER BY name_rank, match_len, usr
+    LIMIT 6;
+'''
+
+
+def tweet_search(keywords, fts, after):
+    '''
+    Binds a tweet search to TWEET_SEARCH, or TWEET_SEARCH_SCAN without the full-text index.
+
+    :param keywords: List of search keywords, hashtags start with #
+    :param fts: Whether the database has the tweets_fts index
+    :param after: The (tdate, tid) key the page starts after
+
+    :return: A tuple of the statement and its parameters
+    '''
+
+    hashtag_terms = []  # lowercase hashtag keywords, read from the mentions table by term
+    text_keywords = []  # keywords served by the full-text index
+    scan_keywords = []  # keywords matched by scanning tweet text with LIKE
+
+    # Sorts keywords by how they can be matched, a tweet only has to match one of them
+    for keyword in keywords:
+        if keyword.startswith("#"):
+            hashtags = StringUtils.get_hashtags(keyword)  # turns hashtag keywords into alphanumeric only terms
+            if hashtags:
+                hashtag_terms.append(hashtags[0])
+        elif fts and len(keyword) >= TextSearch.MIN_KEYWORD_LENGTH:
+            text_keywords.append(keyword)
+        else:
+            scan_keywords.append(keyword.upper())
+
+    return TWEET_SEARCH if fts else TWEET_SEARCH_SCAN, {
+        "hashtags": TextSearch.json_list(hashtag_terms),
+        "match": TextSearch.match_expression(text_keywords) if text_keywords else None,
+        "scan": TextSearch.json_list(scan_keywords),
+        "tdate": after[0],
+        "tid": after[1],
+    }
+
+
+# Hashtag mentions of the tweets dated on or after a day, read once to warm up the trending
+# windows. tweets_tdate_idx bounds the read to the tweets of those days.
+RECENT_MENTIONS = '''
+    SELECT m.term, t.tdate
+    FROM tweets t JOIN mentions m ON m.tid = t.tid
+    WHERE t.tdate >= ?;
+'''
+
+# The newest tweet a trending warm-up read the mentions of
+NEWEST_TID = "SELECT MAX(tid) FROM tweets;"
+
+INSERT_TWEET = "INSERT INTO tweets (tid,writer,tdate,text,replyto) VALUES (?,?,?,?,?);"
+
+INSERT_HASHTAG = "INSERT OR IGNORE INTO hashtags (term) VALUES (?);"
+
+INSERT_MENTION = "INSERT INTO mentions (tid,term) VALUES (?,?);"
+
+INSERT_USER = "INSERT INTO users (usr, pwd, name, email, city, timezone) VALUES (?,?,?,?,?,?);"
+
+INSERT_FOLLOW = "INSERT INTO follows (flwee, flwer, start_date) VALUES (?,?,?);"
+
+INSERT_RETWEET = "INSERT INTO retweets (usr,tid,rdate) VALUES (?,?,?);"
+
+# Query name by statement text, so metrics report queries under the names above
+NAMES = {sql: name.lower() for name, sql in list(globals().items()) if name.isupper() and isinstance(sql, str)}
+
+# Statements each connection keeps prepared: every named statement, plus room for the
+# statements of the schema modules and the admin commands, which run rarely enough that
+# it does not matter if they are evicted
+CACHED_STATEMENTS = len(NAMES) + 32
@@ -0,0 +1,86 @@
+'''
+Who to follow suggestions, worked out ahead of time into the recommendations table.
+
+An account is suggested to a user by how many followees they have in common, counted
+two hops over the follow graph: from the user to everyone they follow, then back to
+everyone else following those accounts. Accounts the user already follows are left out.
+
+Every followee's followers are a slice of the graph's flat follower array, counted in a
+single Counter.update rather than read with a query per followee. Followees with more
+than hub_followers followers are skipped, since nearly everyone has them in common and
+following them would say little. The ranked suggestions of a batch of users are then
+swapped in with one short write transaction, so frames read a user's suggestions with a
+single primary key range read however many accounts they follow. Suggestions are only
+as fresh as the last run of manage.py recommend.
+'''
+import collections
+import heapq
+
+# Suggestions kept per user, more than a page so some are left once the first are followed
+PER_USER = 20
+
+# Users whose suggestions are written per transaction
+BATCH_USERS = 500
+
+# Followees with more followers than this are not counted
+HUB_FOLLOWERS = 10000
+
+SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS recommendations (
+    usr         int,
+    rank        int,
+    candidate   int,
+    shared      int not null,
+    primary key (usr, rank)
+    ) WITHOUT ROWID;
+    ''',
+]
+
+# The next batch of users to score, in usr order after the last user of the previous batch
+NEXT_USERS = "SELECT usr FROM users WHERE usr > ? ORDER BY usr LIMIT ?;"
+
+DELETE_USERS = "DELETE FROM recommendations WHERE usr IN (SELECT value FROM json_each(?));"
+
+INSERT_RECOMMENDATION = "INSERT INTO recommendations (usr, rank, candidate, shared) VALUES (?,?,?,?);"
+
+
+def store(cursor, users, rows):
+    '''
+    Replaces the suggestions of a batch of users.
+
+    :param cursor: A sqlite cursor with a transaction already open
+    :param users: JSON array of the batch's usr values
+    :param rows: List of (usr, rank, candidate, shared) tuples
+    '''
+
+    cursor.execute(DELETE_USERS, (users,))
+    cursor.executemany(INSERT_RECOMMENDATION, rows)
+
+
+def score(graph, usr, per_user=PER_USER, hub_followers=HUB_FOLLOWERS):
+    '''
+    Ranks the accounts usr does not follow by followees in common.
+
+    :param graph: A loaded FollowGraph
+    :param usr: usr of the user the suggestions are for
+    :param per_user: The most suggestions to return
+    :param hub_followers: Followees with more followers than this are not counted
+
+    :return: A list of (candidate, followees in common) tuples, most in common first
+    '''
+
+    followees = graph.followees(usr)
+
+    shared = collections.Counter()
+    for flwee in followees:
+        followers = graph.followers_after(flwee, -1, hub_followers + 1)
+        if len(followers) <= hub_followers:
+            shared.update(followers)
+
+    # Neither the user nor the accounts they already follow are suggested
+    for flwee in [usr, *followees]:
+        shared.pop(flwee, None)
+
+    ranked = heapq.nsmallest(per_user, ((-count, candidate) for candidate, count in shared.items()))
+    return [(candidate, -count) for count, candidate in ranked]
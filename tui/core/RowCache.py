@@ -0,0 +1,113 @@
+'''
+In-process cache of single-row query results, such as a tweet's details or a user's
+profile header, so frames rebuilt by Back, Next Page and Prev Page do not query for
+rows that have not changed.
+
+Entries are keyed by the statement and its parameters and evicted least recently used
+first once the cache holds max_entries rows. The writes the app performs through
+Database invalidate exactly the entries they change. Writes made by other processes,
+such as a bulk import, are not seen, so anything that writes behind the app's back
+should clear the cache.
+'''
+import collections
+import threading
+
+# Rows kept by default, each entry is a short tuple of a few hundred bytes at most
+DEFAULT_MAX_ENTRIES = 10000
+
+
+class RowCache:
+    '''
+    LRU cache of query rows, safe to share between the Databases of many threads.
+    '''
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        '''
+        :param max_entries: The most rows kept at once, 0 disables caching but keeps counting
+        '''
+
+        self.max_entries = max_entries
+        self.entries = collections.OrderedDict()  # (sql, parameters) -> row, most recently used last
+        self.lock = threading.Lock()
+
+        # Bumped by every invalidation, a row loaded while it changed may be stale and is not kept
+        self.generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def fetchone(self, cursor, sql, parameters):
+        '''
+        Returns the first row of a query, from the cache if it is there and from the
+        database otherwise.
+
+        :param cursor: A sqlite cursor to run the query on if it is not cached
+        :param sql: The statement, one of the statements in Queries
+        :param parameters: Tuple of the statement's parameters
+        '''
+
+        key = (sql, parameters)
+
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+
+            self.misses += 1
+            generation = self.generation
+
+        row = cursor.execute(sql, parameters).fetchone()
+
+        with self.lock:
+            if self.max_entries and generation == self.generation:
+                self.entries[key] = row
+                self.entries.move_to_end(key)
+                if len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+                    self.evictions += 1
+
+        return row
+
+    def invalidate(self, *keys):
+        '''
+        Drops the rows of the given queries. Called after the write that changed them has
+        committed, so the next read loads the new row.
+
+        :param keys: (sql, parameters) tuples
+        '''
+
+        with self.lock:
+            self.generation += 1
+            for key in keys:
+                # Rows can be None when a query found nothing, so check for the key itself
+                if key in self.entries:
+                    del self.entries[key]
+                    self.invalidations += 1
+
+    def clear(self):
+        '''
+        Drops every row, for when the database was changed by something other than Database
+        '''
+
+        with self.lock:
+            self.generation += 1
+            self.entries.clear()
+
+    def stats(self):
+        '''
+        Returns the hit and miss counts and the hit rate as a dictionary
+        '''
+
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
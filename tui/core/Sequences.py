@@ -0,0 +1,62 @@
+'''
+ID allocation for new tweets and users.
+
+id_sequences stores the next free id of each table. Allocating an id reads and bumps that
+single row inside the write transaction that inserts the new row, so it costs the same no
+matter how big the table is, and two connections can never be handed the same id because
+only one of them can hold the write lock at a time.
+'''
+
+SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS id_sequences (
+    name        text,
+    next_id     int not null,
+    primary key (name)
+    );
+    ''',
+]
+
+# The first id handed out for each table when it is empty
+FIRST_IDS = {
+    "tweets": 0,
+    "users": 1,
+}
+
+KEY_COLUMNS = {
+    "tweets": "tid",
+    "users": "usr",
+}
+
+
+def reseed_sequences(cursor):
+    '''
+    Points every sequence just past the largest id in its table.
+
+    :param cursor: A sqlite cursor with a transaction already open
+    '''
+
+    for name, key_column in KEY_COLUMNS.items():
+        cursor.execute(f'''
+            INSERT INTO id_sequences (name, next_id)
+            SELECT ?, COALESCE(MAX({key_column}) + 1, ?) FROM {name} WHERE true
+            ON CONFLICT (name) DO UPDATE SET next_id = excluded.next_id;
+        ''', (name, FIRST_IDS[name]))
+
+
+def allocate_id(cursor, name):
+    '''
+    Hands out the next id of a table.
+
+    :param cursor: A sqlite cursor inside a write transaction (BEGIN IMMEDIATE)
+    :param name: Name of the table the id is for
+
+    :return: The allocated id
+    '''
+
+    cursor.execute("SELECT next_id FROM id_sequences WHERE name = ?;", (name,))
+    next_id = cursor.fetchone()[0]
+
+    cursor.execute("UPDATE id_sequences SET next_id = ? WHERE name = ?;", (next_id + 1, name))
+
+    return next_id
@@ -0,0 +1,208 @@
+'''
+Line-based TCP server that runs one frame session per connection.
+
+Frames are synchronous and prompt for input in the middle of their handlers, so every
+session runs its frame code on its own thread. Sessions share one ConnectionPool, a
+session only holds one of its `workers` read-only connections while that code is
+running, never while waiting for the user, so at most `workers` sessions are executing
+sqlite calls at any moment and an idle or slow session never stalls the others. Their
+writes are serialized through the pool's single writer connection.
+'''
+import asyncio
+import queue
+import re
+import signal
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from .Database import Database, TIMELINE_FEED
+from .FrameIO import TerminalIO
+from .FrameManager import FrameManager
+from .RowCache import RowCache
+from .Prefetcher import Prefetcher
+from .Trending import Trending
+from .FollowGraph import FollowGraph
+
+# Telnet "go ahead", sent after every prompt so clients know the server is waiting on them
+GO_AHEAD = b"\xff\xf9"
+
+# Telnet option negotiation a client may send at the start of a line
+TELNET_COMMAND = re.compile(rb"\xff[\xfb-\xfe].|\xff[\xf0-\xfa]", re.DOTALL)
+
+
+class SessionIO(TerminalIO):
+    '''
+    The input source and output sink of one network session. Output is buffered and
+    handed to the event loop in one piece whenever the session waits for input, and
+    input lines are queued by the event loop as they arrive.
+    '''
+
+    def __init__(self, loop, writer):
+        '''
+        :param loop: The event loop that owns the connection
+        :param writer: The connection's asyncio StreamWriter
+        '''
+
+        super().__init__()
+        self.loop = loop
+        self.writer = writer
+        self.db = None  # the session's Database, whose reader is given up while waiting
+        self.lines = queue.SimpleQueue()  # received lines, None once the client disconnects
+
+    def flush(self, *extra):
+        '''
+        Sends all buffered output to the client from the event loop's thread.
+
+        :param extra: Raw bytes to send after the buffered output
+        '''
+
+        data = "".join(self.pending).replace("\n", "\r\n").encode() + b"".join(extra)
+        self.pending = []
+        if data:
+            self.loop.call_soon_threadsafe(self.writer.write, data)
+
+    def read(self, prompt=""):
+        self.pending.append(prompt)
+        self.flush(GO_AHEAD)
+
+        # Give the read-only connection back to the pool while the user is typing
+        self.db.release()
+        try:
+            line = self.lines.get()
+        finally:
+            self.db.acquire()
+
+        if line is None:
+            raise EOFError("Client disconnected")
+        return line
+
+    def read_secret(self, prompt=""):
+        # Plain TCP clients cannot hide what they type, so secrets are read like any line
+        return self.read(prompt)
+
+
+class Server:
+    '''
+    Accepts connections and runs a frame session, with its own Database,
+    FrameManager and logged in user, for each of them.
+    '''
+
+    def __init__(self, db_path, first_frame, workers=8, max_sessions=1024, metrics=None, prefetch_threads=1,
+                 feed=TIMELINE_FEED, snapshot=False, graph=False):
+        '''
+        :param db_path: Path of the database every session connects to
+        :param first_frame: Callable building the first frame from a session's FrameManager
+        :param workers: How many sessions may run frame code and queries at the same time,
+        the size of the shared reader pool
+        :param max_sessions: Connections beyond this many are turned away
+        :param metrics: A Metrics shared by every session's Database, or None
+        :param prefetch_threads: How many next pages are prefetched at once for all the
+        sessions, each on a read-only connection outside the reader pool
+        :param feed: How sessions build home timelines, TIMELINE_FEED or MERGE_FEED
+        :param snapshot: Whether to serve the database as an immutable read-only snapshot,
+        refusing every write
+        :param graph: Whether sessions share an in-memory FollowGraph of the follows table,
+        loaded before the first connection is accepted
+        '''
+
+        self.db_path = db_path
+        self.metrics = metrics
+        self.first_frame = first_frame
+        self.max_sessions = max_sessions
+        self.feed = feed
+
+        # Sessions share one row cache, so a write by one session invalidates the rows all of them see
+        self.cache = RowCache()
+        self.trending = Trending()
+        self.graph = FollowGraph() if graph else None
+
+        # Creates and migrates the database once, then every session shares its pool
+        setup = Database(metrics, self.cache, graph=self.graph)
+        setup.connect(db_path, readers=workers, snapshot=snapshot)
+        setup.release()
+        self.pool = setup.pool
+        self.prefetcher = Prefetcher(self.pool, prefetch_threads)
+        self.session_threads = ThreadPoolExecutor(max_workers=max_sessions, thread_name_prefix="session")
+        self.sessions = {}  # SessionIO -> connection handling task of every connected session
+
+    def run_session(self, io):
+        '''
+        Runs one session to completion on a session thread.
+
+        :param io: The session's SessionIO
+        '''
+
+        db = Database(self.metrics, self.cache, self.prefetcher, self.feed, self.trending, self.graph)
+        io.db = db
+        try:
+            db.connect(self.db_path, self.pool)
+            frame_mgr = FrameManager(db, io)
+            frame_mgr.run(self.first_frame(frame_mgr))
+        finally:
+            io.flush()
+            db.release()
+
+    async def handle_connection(self, reader, writer):
+        '''
+        Feeds a connection's lines to its session until either side hangs up.
+
+        :param reader: The connection's asyncio StreamReader
+        :param writer: The connection's asyncio StreamWriter
+        '''
+
+        if len(self.sessions) >= self.max_sessions:
+            writer.write(b"Sorry, the server is full. Please try again later.\r\n")
+            writer.close()
+            return
+
+        loop = asyncio.get_running_loop()
+        io = SessionIO(loop, writer)
+        self.sessions[io] = asyncio.current_task()
+
+        async def receive_lines():
+            try:
+                while line := await reader.readline():
+                    line = TELNET_COMMAND.sub(b"", line)
+                    io.lines.put(line.decode(errors="replace").rstrip("\r\n"))
+            except ConnectionError:
+                pass
+            io.lines.put(None)
+
+        receiver = asyncio.create_task(receive_lines())
+        try:
+            await loop.run_in_executor(self.session_threads, self.run_session, io)
+        except Exception as error:
+            print(f"Session ended with an error: {error!r}", file=sys.stderr)
+        finally:
+            self.sessions.pop(io, None)
+            receiver.cancel()
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def serve(self, host, port):
+        '''
+        Serves connections until SIGINT or SIGTERM, then ends every session as if its
+        client had disconnected and waits for them to finish.
+
+        :param host: The interface to listen on
+        :param port: The TCP port to listen on
+        '''
+
+        loop = asyncio.get_running_loop()
+        stop = asyncio.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stop.set)
+
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=2 ** 16, backlog=1024)
+        print(f"Serving {self.db_path} on {', '.join(str(s.getsockname()) for s in server.sockets)}")
+        async with server:
+            await stop.wait()
+
+        # Session threads waiting on input would keep the process alive
+        for io in self.sessions:
+            io.lines.put(None)
+        if self.sessions:
+            await asyncio.wait(list(self.sessions.values()), timeout=10)
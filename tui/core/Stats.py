@@ -0,0 +1,155 @@
+'''
+Trigger-maintained counters for profile and tweet statistics.
+
+user_stats holds how many tweets each user wrote, how many users they follow and how many
+follow them. tweet_stats holds how many replies and retweets each tweet has. Triggers on
+users, tweets, follows and retweets keep both up to date, so frames read the counters with
+a primary key lookup instead of aggregating over the base tables on every render.
+'''
+
+SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS user_stats (
+    usr         int,
+    tweets      int not null default 0,
+    following   int not null default 0,
+    followers   int not null default 0,
+    primary key (usr)
+    );
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS tweet_stats (
+    tid         int,
+    replies     int not null default 0,
+    retweets    int not null default 0,
+    primary key (tid)
+    );
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS user_stats_users_insert AFTER INSERT ON users
+    BEGIN
+        INSERT OR IGNORE INTO user_stats (usr) VALUES (NEW.usr);
+    END;
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS stats_tweets_insert AFTER INSERT ON tweets
+    BEGIN
+        INSERT INTO user_stats (usr, tweets) VALUES (NEW.writer, 1)
+        ON CONFLICT (usr) DO UPDATE SET tweets = tweets + 1;
+
+        INSERT OR IGNORE INTO tweet_stats (tid) VALUES (NEW.tid);
+
+        INSERT INTO tweet_stats (tid, replies)
+        SELECT NEW.replyto, 1
+        WHERE NEW.replyto IS NOT NULL
+        ON CONFLICT (tid) DO UPDATE SET replies = replies + 1;
+    END;
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS stats_tweets_delete AFTER DELETE ON tweets
+    BEGIN
+        UPDATE user_stats SET tweets = tweets - 1 WHERE usr = OLD.writer;
+        UPDATE tweet_stats SET replies = replies - 1 WHERE tid = OLD.replyto;
+        DELETE FROM tweet_stats WHERE tid = OLD.tid;
+    END;
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS stats_follows_insert AFTER INSERT ON follows
+    BEGIN
+        INSERT INTO user_stats (usr, following) VALUES (NEW.flwer, 1)
+        ON CONFLICT (usr) DO UPDATE SET following = following + 1;
+
+        INSERT INTO user_stats (usr, followers) VALUES (NEW.flwee, 1)
+        ON CONFLICT (usr) DO UPDATE SET followers = followers + 1;
+    END;
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS stats_follows_delete AFTER DELETE ON follows
+    BEGIN
+        UPDATE user_stats SET following = following - 1 WHERE usr = OLD.flwer;
+        UPDATE user_stats SET followers = followers - 1 WHERE usr = OLD.flwee;
+    END;
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS stats_retweets_insert AFTER INSERT ON retweets
+    BEGIN
+        INSERT INTO tweet_stats (tid, retweets) VALUES (NEW.tid, 1)
+        ON CONFLICT (tid) DO UPDATE SET retweets = retweets + 1;
+    END;
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS stats_retweets_delete AFTER DELETE ON retweets
+    BEGIN
+        UPDATE tweet_stats SET retweets = retweets - 1 WHERE tid = OLD.tid;
+    END;
+    ''',
+]
+
+# What the counters should hold, computed from the base tables
+EXPECTED_USER_STATS = '''
+    SELECT usr, SUM(tweets), SUM(following), SUM(followers)
+    FROM (
+        SELECT usr, 0 AS tweets, 0 AS following, 0 AS followers FROM users
+        UNION ALL
+        SELECT writer, 1, 0, 0 FROM tweets
+        UNION ALL
+        SELECT flwer, 0, 1, 0 FROM follows
+        UNION ALL
+        SELECT flwee, 0, 0, 1 FROM follows
+    )
+    WHERE usr IS NOT NULL
+    GROUP BY usr
+'''
+
+EXPECTED_TWEET_STATS = '''
+    SELECT tid, SUM(replies), SUM(retweets)
+    FROM (
+        SELECT tid, 0 AS replies, 0 AS retweets FROM tweets
+        UNION ALL
+        SELECT replyto, 1, 0 FROM tweets WHERE replyto IS NOT NULL
+        UNION ALL
+        SELECT tid, 0, 1 FROM retweets
+    )
+    WHERE tid IS NOT NULL
+    GROUP BY tid
+'''
+
+
+def check_stats(cursor):
+    '''
+    Compares the stored counters against counts recomputed from the base tables.
+
+    :param cursor: A sqlite cursor
+
+    :return: A tuple of the number of user_stats rows and tweet_stats rows that are wrong or missing
+    '''
+
+    counts = []
+
+    for table, key, columns, expected in [("user_stats", "usr", "tweets, following, followers", EXPECTED_USER_STATS),
+                                          ("tweet_stats", "tid", "replies, retweets", EXPECTED_TWEET_STATS)]:
+        # Rows on either side of the difference are counters that disagree, keyed by their id
+        cursor.execute(f'''
+            SELECT COUNT(DISTINCT {key}) FROM (
+                SELECT * FROM (SELECT {key}, {columns} FROM {table} EXCEPT {expected})
+                UNION ALL
+                SELECT * FROM ({expected} EXCEPT SELECT {key}, {columns} FROM {table})
+            )
+        ''')
+        counts.append(cursor.fetchone()[0])
+
+    return tuple(counts)
+
+
+def rebuild_stats(cursor):
+    '''
+    Recomputes every counter from the base tables.
+
+    :param cursor: A sqlite cursor with a transaction already open
+    '''
+
+    cursor.execute("DELETE FROM user_stats;")
+    cursor.execute(f"INSERT INTO user_stats (usr, tweets, following, followers) {EXPECTED_USER_STATS};")
+
+    cursor.execute("DELETE FROM tweet_stats;")
+    cursor.execute(f"INSERT INTO tweet_stats (tid, replies, retweets) {EXPECTED_TWEET_STATS};")
@@ -0,0 +1,185 @@
+'''
+Full-text indexes over tweet text and user names and cities.
+
+tweets_fts and users_fts are external content FTS5 tables using the trigram tokenizer,
+so a quoted keyword matches any row containing it as a case-insensitive substring, just
+like the LIKE '%keyword%' scans they replace. Triggers on the base tables keep them in
+sync. SQLite builds without FTS5 (or older than 3.34, which lack the trigram tokenizer)
+skip the indexes and searches fall back to the LIKE scans, until the database is opened
+by a build that has them and the indexes are created then.
+'''
+import json
+import sqlite3
+
+# Trigrams need at least this many characters, shorter keywords are matched with LIKE
+MIN_KEYWORD_LENGTH = 3
+
+TWEETS_FTS_SCHEMA = [
+    '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS tweets_fts
+    USING fts5(text, content='tweets', content_rowid='tid', tokenize='trigram');
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS tweets_fts_insert AFTER INSERT ON tweets
+    BEGIN
+        INSERT INTO tweets_fts (rowid, text) VALUES (NEW.tid, NEW.text);
+    END;
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS tweets_fts_delete AFTER DELETE ON tweets
+    BEGIN
+        INSERT INTO tweets_fts (tweets_fts, rowid, text) VALUES ('delete', OLD.tid, OLD.text);
+    END;
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS tweets_fts_update AFTER UPDATE OF tid, text ON tweets
+    BEGIN
+        INSERT INTO tweets_fts (tweets_fts, rowid, text) VALUES ('delete', OLD.tid, OLD.text);
+        INSERT INTO tweets_fts (rowid, text) VALUES (NEW.tid, NEW.text);
+    END;
+    ''',
+    "INSERT INTO tweets_fts (tweets_fts) VALUES ('rebuild');",
+]
+
+
+USERS_FTS_SCHEMA = [
+    '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS users_fts
+    USING fts5(name, city, content='users', content_rowid='usr', tokenize='trigram');
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS users_fts_insert AFTER INSERT ON users
+    BEGIN
+        INSERT INTO users_fts (rowid, name, city) VALUES (NEW.usr, NEW.name, NEW.city);
+    END;
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS users_fts_delete AFTER DELETE ON users
+    BEGIN
+        INSERT INTO users_fts (users_fts, rowid, name, city) VALUES ('delete', OLD.usr, OLD.name, OLD.city);
+    END;
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS users_fts_update AFTER UPDATE OF usr, name, city ON users
+    BEGIN
+        INSERT INTO users_fts (users_fts, rowid, name, city) VALUES ('delete', OLD.usr, OLD.name, OLD.city);
+        INSERT INTO users_fts (rowid, name, city) VALUES (NEW.usr, NEW.name, NEW.city);
+    END;
+    ''',
+    "INSERT INTO users_fts (users_fts) VALUES ('rebuild');",
+]
+
+
+def fts5_available(cursor):
+    '''
+    Checks whether this SQLite build has FTS5 with the trigram tokenizer.
+
+    :param cursor: A sqlite cursor
+    '''
+
+    try:
+        cursor.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(text, tokenize='trigram');")
+        cursor.execute("DROP TABLE temp.fts5_probe;")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def create_tweet_index(cursor):
+    '''
+    Creates and fills the tweet full-text index when the SQLite build supports it.
+
+    :param cursor: A sqlite cursor with a transaction already open
+    '''
+
+    if not fts5_available(cursor):
+        return
+
+    for statement in TWEETS_FTS_SCHEMA:
+        cursor.execute(statement)
+
+
+def create_user_index(cursor):
+    '''
+    Creates and fills the user name and city full-text index when the SQLite build supports it.
+
+    :param cursor: A sqlite cursor with a transaction already open
+    '''
+
+    if not fts5_available(cursor):
+        return
+
+    for statement in USERS_FTS_SCHEMA:
+        cursor.execute(statement)
+
+
+def tweet_index_missing(cursor):
+    '''
+    Checks whether the tweet full-text index is missing although this SQLite build could create it.
+
+    :param cursor: A sqlite cursor
+    '''
+
+    return not has_index(cursor, "tweets_fts") and fts5_available(cursor)
+
+
+def user_index_missing(cursor):
+    '''
+    Checks whether the user full-text index is missing although this SQLite build could create it.
+
+    :param cursor: A sqlite cursor
+    '''
+
+    return not has_index(cursor, "users_fts") and fts5_available(cursor)
+
+
+def has_index(cursor, name):
+    '''
+    Checks whether a full-text table exists in the database.
+
+    :param cursor: A sqlite cursor
+    :param name: Name of the FTS5 table
+    '''
+
+    cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = ?;", (name,))
+    return cursor.fetchone()[0] != 0
+
+
+def match_expression(keywords):
+    '''
+    Builds an FTS5 query matching any of the keywords as a substring in any indexed column.
+
+    :param keywords: List of keywords, each at least MIN_KEYWORD_LENGTH characters long
+    '''
+
+    # Quoting turns each keyword into a phrase so FTS5 syntax characters are taken literally
+    return " OR ".join('"' + keyword.replace('"', '""') + '"' for keyword in keywords)
+
+
+def json_list(values):
+    '''
+    Packs a list of query values into one parameter that SQL can expand with json_each.
+
+    :param values: List of strings
+    '''
+
+    return json.dumps(values)
+
+
+def normalize_hashtags(cursor):
+    '''
+    Rewrites every hashtag term into the canonical lowercase form StringUtils.get_hashtags
+    produces, merging terms that only differed by case.
+
+    :param cursor: A sqlite cursor with a transaction already open
+    '''
+
+    # SQLite's lower() only folds ASCII, so use the same lowering as the write path
+    cursor.connection.create_function("canonical_term", 1, str.lower, deterministic=True)
+
+    cursor.execute("INSERT OR IGNORE INTO hashtags (term) SELECT canonical_term(term) FROM hashtags WHERE term <> canonical_term(term);")
+
+    # A tweet that mentioned both spellings keeps a single mention
+    cursor.execute("UPDATE OR IGNORE mentions SET term = canonical_term(term) WHERE term <> canonical_term(term);")
+    cursor.execute("DELETE FROM mentions WHERE term <> canonical_term(term);")
+    cursor.execute("DELETE FROM hashtags WHERE term <> canonical_term(term);")
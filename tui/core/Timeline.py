@@ -0,0 +1,180 @@
+'''
+Materialized home timeline.
+
+Every user owns one row per tweet that should appear on their home page, keyed by the
+latest date it was written or retweeted by someone they follow. Triggers on tweets,
+retweets and follows fan each write out to the followers' timelines, so rendering the
+home page is a single range read over timeline (owner, sort_ts, tid). Deleting a tweet,
+retweet or follow takes back what it fanned out.
+'''
+
+# Keeps only the most recent appearance of a tweet on each owner's timeline
+UPSERT_LATEST = '''
+    ON CONFLICT (owner, tid) DO UPDATE
+    SET sort_ts = excluded.sort_ts, via_retweet_usr = excluded.via_retweet_usr
+    WHERE excluded.sort_ts > timeline.sort_ts
+'''
+
+SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS timeline (
+    owner           int,
+    sort_ts         date,
+    tid             int,
+    via_retweet_usr int,
+    primary key (owner, tid),
+    foreign key (owner) references users,
+    foreign key (tid) references tweets,
+    foreign key (via_retweet_usr) references users
+    );
+    ''',
+    "CREATE INDEX IF NOT EXISTS timeline_owner_idx ON timeline (owner, sort_ts, tid);",
+
+    # A new tweet lands on the timeline of everyone following its writer
+    f'''
+    CREATE TRIGGER IF NOT EXISTS timeline_tweets_insert AFTER INSERT ON tweets
+    BEGIN
+        INSERT INTO timeline (owner, sort_ts, tid, via_retweet_usr)
+        SELECT f.flwer, NEW.tdate, NEW.tid, NULL
+        FROM follows f
+        WHERE f.flwee = NEW.writer
+        {UPSERT_LATEST};
+    END;
+    ''',
+
+    # A retweet bumps the tweet to the top of the timeline of everyone following the retweeter
+    f'''
+    CREATE TRIGGER IF NOT EXISTS timeline_retweets_insert AFTER INSERT ON retweets
+    BEGIN
+        INSERT INTO timeline (owner, sort_ts, tid, via_retweet_usr)
+        SELECT f.flwer, NEW.rdate, NEW.tid, NEW.usr
+        FROM follows f
+        WHERE f.flwee = NEW.usr
+        {UPSERT_LATEST};
+    END;
+    ''',
+
+    # Following someone backfills their tweets and retweets into the follower's timeline
+    f'''
+    CREATE TRIGGER IF NOT EXISTS timeline_follows_insert AFTER INSERT ON follows
+    BEGIN
+        INSERT INTO timeline (owner, sort_ts, tid, via_retweet_usr)
+        SELECT NEW.flwer, t.tdate, t.tid, NULL
+        FROM tweets t
+        WHERE t.writer = NEW.flwee
+        {UPSERT_LATEST};
+
+        INSERT INTO timeline (owner, sort_ts, tid, via_retweet_usr)
+        SELECT NEW.flwer, r.rdate, r.tid, r.usr
+        FROM retweets r
+        WHERE r.usr = NEW.flwee
+        {UPSERT_LATEST};
+    END;
+    ''',
+
+    # Unfollowing prunes what the followee contributed, then re-adds any of those tweets
+    # that another followee still wrote or retweeted
+    f'''
+    CREATE TRIGGER IF NOT EXISTS timeline_follows_delete AFTER DELETE ON follows
+    BEGIN
+        DELETE FROM timeline
+        WHERE owner = OLD.flwer
+        AND tid IN (
+            SELECT tid FROM tweets WHERE writer = OLD.flwee
+            UNION
+            SELECT tid FROM retweets WHERE usr = OLD.flwee
+        );
+
+        INSERT INTO timeline (owner, sort_ts, tid, via_retweet_usr)
+        SELECT s.owner, s.sort_ts, s.tid, s.via_retweet_usr
+        FROM (
+            SELECT f.flwer AS owner, t.tdate AS sort_ts, t.tid, NULL AS via_retweet_usr
+            FROM follows f JOIN tweets t ON t.writer = f.flwee
+            WHERE f.flwer = OLD.flwer
+            UNION ALL
+            SELECT f.flwer, r.rdate, r.tid, r.usr
+            FROM follows f JOIN retweets r ON r.usr = f.flwee
+            WHERE f.flwer = OLD.flwer
+        ) s
+        WHERE s.tid IN (
+            SELECT tid FROM tweets WHERE writer = OLD.flwee
+            UNION
+            SELECT tid FROM retweets WHERE usr = OLD.flwee
+        )
+        {UPSERT_LATEST};
+    END;
+    ''',
+]
+
+DELETE_SCHEMA = [
+    # A deleted tweet leaves the timeline of everyone following its writer or one of its retweeters
+    '''
+    CREATE TRIGGER IF NOT EXISTS timeline_tweets_delete AFTER DELETE ON tweets
+    BEGIN
+        DELETE FROM timeline
+        WHERE tid = OLD.tid
+        AND owner IN (
+            SELECT flwer FROM follows WHERE flwee = OLD.writer
+            UNION
+            SELECT f.flwer FROM retweets r JOIN follows f ON f.flwee = r.usr WHERE r.tid = OLD.tid
+        );
+    END;
+    ''',
+
+    # Undoing a retweet takes the tweet off the retweeter's followers' timelines, then puts it
+    # back for those who still follow its writer or another retweeter of it
+    f'''
+    CREATE TRIGGER IF NOT EXISTS timeline_retweets_delete AFTER DELETE ON retweets
+    BEGIN
+        DELETE FROM timeline
+        WHERE tid = OLD.tid
+        AND owner IN (SELECT flwer FROM follows WHERE flwee = OLD.usr);
+
+        INSERT INTO timeline (owner, sort_ts, tid, via_retweet_usr)
+        SELECT s.owner, s.sort_ts, s.tid, s.via_retweet_usr
+        FROM (
+            SELECT f.flwer AS owner, t.tdate AS sort_ts, t.tid, NULL AS via_retweet_usr
+            FROM tweets t JOIN follows f ON f.flwee = t.writer
+            WHERE t.tid = OLD.tid
+            UNION ALL
+            SELECT f.flwer, r.rdate, r.tid, r.usr
+            FROM retweets r JOIN follows f ON f.flwee = r.usr
+            WHERE r.tid = OLD.tid
+        ) s
+        WHERE s.owner IN (SELECT flwer FROM follows WHERE flwee = OLD.usr)
+        {UPSERT_LATEST};
+    END;
+    ''',
+
+    # Rows of tweets deleted before the triggers existed
+    "DELETE FROM timeline WHERE tid NOT IN (SELECT tid FROM tweets);",
+]
+
+
+def rebuild_timeline(cursor):
+    '''
+    Recomputes every user's timeline from the tweets, retweets and follows tables.
+
+    :param cursor: A sqlite cursor with a transaction already open
+    '''
+
+    cursor.execute("DELETE FROM timeline;")
+
+    # Feeding rows in primary key order keeps the b-tree inserts sequential
+    cursor.execute(f'''
+        INSERT INTO timeline (owner, sort_ts, tid, via_retweet_usr)
+        SELECT f.flwer, t.tdate, t.tid, NULL
+        FROM follows f JOIN tweets t ON t.writer = f.flwee
+        WHERE true
+        ORDER BY f.flwer, t.tid
+        {UPSERT_LATEST};
+    ''')
+
+    cursor.execute(f'''
+        INSERT INTO timeline (owner, sort_ts, tid, via_retweet_usr)
+        SELECT f.flwer, r.rdate, r.tid, r.usr
+        FROM follows f JOIN retweets r ON r.usr = f.flwee
+        WHERE true
+        ORDER BY f.flwer, r.tid
+        {UPSERT_LATEST};
+    ''')
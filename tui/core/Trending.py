@@ -0,0 +1,360 @@
+'''
+Trending hashtags over sliding time windows, kept in memory and updated as tweets are
+written, so the top hashtags of the last hour, day or week are read without aggregating
+the mentions table.
+
+A window is a ring of buckets, the last hour being twelve five minute buckets, the last
+day 24 hourly ones and the last week seven daily ones. Each bucket counts its mentions
+in a count-min sketch, a fixed size table of counters that may overestimate a term's
+count by a little but never underestimates it, however many distinct terms there are.
+A window also keeps the sum of its buckets' sketches, from which a bucket's counts are
+subtracted as it slides out of the window, and a bounded set of candidate terms with
+their estimated counts, which the top N are read from.
+
+Tweets are only dated by day, so mentions loaded from the mentions table when warming
+up are placed at the start of their tweet's day. Only mentions recorded while the
+process runs land in the right hour.
+
+Warming up reads a week of mentions, so writers only start it on a thread of its own and
+never wait for it. Mentions recorded meanwhile are held back until it is done, then the
+ones of tweets newer than the newest tweet it read are counted, so every mention is
+counted once whether it was committed before or during the warm-up.
+'''
+import array
+import hashlib
+import threading
+import time
+
+import tui.core.Queries as Queries
+
+# Counters per row and rows of every sketch. A term's count is overestimated by at most
+# e / width of the window's mentions with probability 1 - e ** -depth, 0.13% and 98%.
+DEFAULT_WIDTH = 2048
+DEFAULT_DEPTH = 4
+
+# Terms whose counts a window tracks, the top N are read from these
+DEFAULT_CANDIDATES = 200
+
+# Names of the windows
+HOUR = "hour"
+DAY = "day"
+WEEK = "week"
+
+# Seconds per bucket and buckets per window
+WINDOWS = {
+    HOUR: (300, 12),
+    DAY: (3600, 24),
+    WEEK: (86400, 7),
+}
+
+
+class CountMinSketch:
+    '''
+    depth rows of width counters, a term adds to one counter per row and its count is
+    estimated by the smallest of them.
+    '''
+
+    def __init__(self, width=DEFAULT_WIDTH, depth=DEFAULT_DEPTH):
+        self.width = width
+        self.depth = depth
+        self.counts = array.array("q", bytes(8 * width * depth))  # row i is counts[i * width:(i + 1) * width]
+
+    def cells(self, term):
+        '''
+        Returns the index of the counter of term in every row, to be passed to add and estimate
+        '''
+
+        digest = hashlib.blake2b(term.encode(), digest_size=4 * self.depth).digest()
+        return [row * self.width + int.from_bytes(digest[4 * row:4 * row + 4], "little") % self.width
+                for row in range(self.depth)]
+
+    def add(self, cells, count=1):
+        for cell in cells:
+            self.counts[cell] += count
+
+    def estimate(self, cells):
+        return min(self.counts[cell] for cell in cells)
+
+    def subtract(self, other):
+        '''
+        Removes the counts of another sketch of the same shape from this one
+        '''
+
+        counts = self.counts
+        for cell, count in enumerate(other.counts):
+            if count:
+                counts[cell] -= count
+
+
+class Window:
+    '''
+    Counts of the last bucket_count buckets of bucket_seconds each.
+    '''
+
+    def __init__(self, bucket_seconds, bucket_count, width, depth, candidates):
+        self.bucket_seconds = bucket_seconds
+        self.bucket_count = bucket_count
+        self.width = width
+        self.depth = depth
+        self.capacity = candidates
+
+        self.buckets = {}  # bucket number -> CountMinSketch, made when the bucket counts its first mention
+        self.total = CountMinSketch(width, depth)  # sum of every bucket in the window
+        self.candidates = {}  # term -> [cells, estimated count in the window]
+        self.floor = 0  # no candidate's estimate is lower, so lower terms need no look at the candidates
+        self.expired = None  # oldest bucket number of the last advance, buckets are only dropped once it moves
+
+    def oldest(self, now):
+        '''
+        Returns the number of the oldest bucket still in the window at now
+        '''
+
+        return int(now // self.bucket_seconds) - self.bucket_count + 1
+
+    def add(self, term, cells, when, now):
+        '''
+        Counts a mention of term made at when, if that is still in the window at now.
+        '''
+
+        self.advance(now)
+
+        number = int(when // self.bucket_seconds)
+        if number < self.expired:
+            return
+
+        if number not in self.buckets:
+            self.buckets[number] = CountMinSketch(self.width, self.depth)
+        self.buckets[number].add(cells)
+        self.total.add(cells)
+
+        estimate = self.total.estimate(cells)
+        if term in self.candidates:
+            self.candidates[term][1] = estimate
+        elif len(self.candidates) < self.capacity:
+            self.candidates[term] = [cells, estimate]
+            self.floor = min(self.floor, estimate)
+        elif estimate > self.floor:
+            # Takes the place of the least mentioned candidate
+            lowest = min(self.candidates, key=lambda candidate: self.candidates[candidate][1])
+            if estimate > self.candidates[lowest][1]:
+                del self.candidates[lowest]
+                self.candidates[term] = [cells, estimate]
+            self.floor = min(candidate[1] for candidate in self.candidates.values())
+
+    def advance(self, now):
+        '''
+        Drops the buckets that slid out of the window by now, and with them the counts
+        of the candidates.
+        '''
+
+        oldest = self.oldest(now)
+        if oldest == self.expired:
+            return
+        self.expired = oldest
+
+        expired = [number for number in self.buckets if number < oldest]
+        if not expired:
+            return
+
+        for number in expired:
+            self.total.subtract(self.buckets.pop(number))
+
+        for term, candidate in list(self.candidates.items()):
+            candidate[1] = self.total.estimate(candidate[0])
+            if candidate[1] <= 0:
+                del self.candidates[term]
+        self.floor = min((candidate[1] for candidate in self.candidates.values()), default=0)
+
+    def top(self, n):
+        '''
+        Returns the n candidates with the highest estimates as (term, count) tuples
+        '''
+
+        ranked = sorted(self.candidates.items(), key=lambda item: (-item[1][1], item[0]))
+        return [(term, candidate[1]) for term, candidate in ranked[:n]]
+
+
+class Trending:
+    '''
+    The trending windows of a database, safe to share between the Databases of many threads.
+    '''
+
+    def __init__(self, width=DEFAULT_WIDTH, depth=DEFAULT_DEPTH, candidates=DEFAULT_CANDIDATES, clock=time.time):
+        '''
+        :param width: Counters per row of every sketch
+        :param depth: Rows of every sketch
+        :param candidates: Terms whose counts each window tracks, at least the largest N asked for
+        :param clock: Function returning the current time in seconds since the epoch
+        '''
+
+        self.width = width
+        self.depth = depth
+        self.capacity = candidates
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.warmed_up = threading.Condition(self.lock)  # notified whenever a warm-up ends
+        self.warming = False
+        self.warm_up_thread = None
+        self.generation = 0  # bumped by reset, so a warm-up that began before it is thrown away
+        self.reset()
+
+    def reset(self):
+        '''
+        Forgets every count, they are loaded from the mentions table again when next needed.
+        For when the database was changed by something other than Database.
+        '''
+
+        with self.lock:
+            self.windows = self.__new_windows()
+            self.warm = False
+            self.held_back = []  # (tid, terms, when) of the mentions recorded during a warm-up
+            self.generation += 1
+
+    def __new_windows(self):
+        return {name: Window(seconds, count, self.width, self.depth, self.capacity)
+                for name, (seconds, count) in WINDOWS.items()}
+
+    def record(self, terms, tid, when=None):
+        '''
+        Counts a mention of every term, called once the tweet mentioning them committed.
+
+        :param terms: List of hashtag terms, in their lowercase form
+        :param tid: tid of the tweet mentioning them
+        :param when: Seconds since the epoch the mentions were made, now if None
+        '''
+
+        with self.lock:
+            now = self.clock()
+            when = now if when is None else when
+
+            # A warm-up under way may or may not have read the mentions, it sorts that out once it
+            # knows the newest tweet it read. Until a warm-up starts they are left to be read by it.
+            if not self.warm:
+                if self.warming:
+                    self.held_back.append((tid, terms, when))
+                return
+
+            self.__add(self.windows, terms, when, now)
+
+    @staticmethod
+    def __add(windows, terms, when, now):
+        for term in terms:
+            cells = windows[HOUR].total.cells(term)
+            for window in windows.values():
+                window.add(term, cells, when, now)
+
+    def start_warm_up(self, pool):
+        '''
+        Warms up on a thread of its own with a reader of its own, unless already warm or on
+        the way there, so the caller never waits for it.
+
+        :param pool: The ConnectionPool of the database to read the mentions from
+        '''
+
+        with self.lock:
+            if self.warm or self.warming or (self.warm_up_thread is not None and self.warm_up_thread.is_alive()):
+                return
+
+            self.warm_up_thread = threading.Thread(target=self.__warm_up_with_reader, args=(pool,), daemon=True)
+            self.warm_up_thread.start()
+
+    def __warm_up_with_reader(self, pool):
+        reader = pool.open_reader()
+        try:
+            self.warm_up(reader.cursor())
+        finally:
+            reader.close()
+
+    def warm_up(self, cursor):
+        '''
+        Counts the mentions of the tweets of the last week, unless already done. Waits for a
+        warm-up already under way on another thread instead of starting a second one.
+
+        :param cursor: A sqlite cursor
+        '''
+
+        with self.lock:
+            while self.warming:
+                self.warmed_up.wait()
+            if self.warm:
+                return
+
+            self.warming = True
+            generation = self.generation
+
+        try:
+            # The mentions are counted into windows of their own without holding the lock, so
+            # mentions recorded meanwhile are only held back rather than kept waiting
+            windows = self.__new_windows()
+            now = self.clock()
+            day_starts = {}  # tdate -> seconds since the epoch of its start
+
+            # Starts a day early, as the week's oldest bucket can begin part way through a day
+            seconds, count = WINDOWS[WEEK]
+            since = time.strftime("%Y-%m-%d", time.localtime(now - seconds * (count + 1)))
+
+            # The newest tweet and the mentions have to come from the same version of the tables
+            cursor.execute("BEGIN;")
+            try:
+                newest_tid = cursor.execute(Queries.NEWEST_TID).fetchone()[0]
+
+                for term, tdate in cursor.execute(Queries.RECENT_MENTIONS, (since,)):
+                    if tdate not in day_starts:
+                        try:
+                            day_starts[tdate] = min(now, time.mktime(time.strptime(tdate, "%Y-%m-%d")))
+                        except (TypeError, ValueError):
+                            day_starts[tdate] = None
+
+                    if day_starts[tdate] is not None:
+                        self.__add(windows, [term], day_starts[tdate], now)
+            finally:
+                cursor.execute("COMMIT;")
+
+            with self.lock:
+                # Tids are handed out in commit order by the single writer, so the held back
+                # mentions of newer tweets are exactly the ones the read above missed
+                if generation == self.generation:
+                    now = self.clock()
+                    for tid, terms, when in self.held_back:
+                        if newest_tid is None or tid > newest_tid:
+                            self.__add(windows, terms, when, now)
+
+                    self.windows = windows
+                    self.warm = True
+                self.held_back = []
+        finally:
+            with self.lock:
+                self.warming = False
+                self.warmed_up.notify_all()
+
+    def top(self, window, n, cursor):
+        '''
+        Returns the most mentioned hashtags of a window, warming up first if needed.
+
+        :param window: HOUR, DAY or WEEK
+        :param n: How many hashtags to return, at most the number of candidates
+        :param cursor: A sqlite cursor to warm up with
+
+        :return: A list of (term, estimated mentions) tuples, most mentioned first
+        '''
+
+        self.warm_up(cursor)
+
+        with self.lock:
+            self.windows[window].advance(self.clock())
+            return self.windows[window].top(n)
+
+    def stats(self):
+        '''
+        Returns the buckets, candidates and bytes of counters of every window as a dictionary
+        '''
+
+        with self.lock:
+            return {
+                name: {
+                    "buckets": len(window.buckets),
+                    "candidates": len(window.candidates),
+                    "counter_bytes": (len(window.buckets) + 1) * 8 * self.width * self.depth,
+                }
+                for name, window in self.windows.items()
+            }
@@ -1,2 +1,3 @@
+from .FrameIO import *
 from .FrameManager import *
 from .Database import *
\ No newline at end of file
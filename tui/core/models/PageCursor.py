@@ -0,0 +1,48 @@
+class PageCursor:
+    '''
+    Remembers where every page visited so far ended so that frames can seek straight
+    to the next page with a keyset (sort key, id) comparison instead of making SQLite
+    compute and throw away every earlier row with LIMIT/OFFSET.
+    '''
+
+    def __init__(self, first_key, keys=None):
+        '''
+        Initialization of the cursor
+
+        :param first_key: Sort key that comes before every row, used to seek to the first page
+        :param keys: List of the sort keys that start each page visited so far
+        '''
+
+        self.keys = keys if keys else [first_key]
+
+    @property
+    def page(self):
+        '''
+        The 1-based page number the cursor currently points at
+        '''
+
+        return len(self.keys)
+
+    @property
+    def after(self):
+        '''
+        The key that rows on the current page must sort after
+        '''
+
+        return self.keys[-1]
+
+    def next(self, last_key):
+        '''
+        Returns a cursor for the page following the current one
+
+        :param last_key: The sort key of the last row displayed on the current page
+        '''
+
+        return PageCursor(self.keys[0], self.keys + [last_key])
+
+    def prev(self):
+        '''
+        Returns a cursor for the page before the current one
+        '''
+
+        return PageCursor(self.keys[0], self.keys[:-1])
@@ -1 +1,2 @@
-from .UserCredential import *
\ No newline at end of file
+from .UserCredential import *
+from .PageCursor import *
@@ -1,6 +1,6 @@
 from tui.core.models.UserCredential import UserCredential
-import getpass
 import tui.frames as frames
+import tui.core.Queries as Queries
 
 class EntryFrame(frames.Frame):
     '''
@@ -37,7 +37,7 @@ class EntryFrame(frames.Frame):
         Displays welcome message to user and renders static options
         '''
         
-        print("\nHello and welcome to Twitter!\n")
+        self.print("\nHello and welcome to Twitter!\n")
 
         super().render()  # this call renders the static options to the user
 
@@ -48,21 +48,6 @@ class EntryFrame(frames.Frame):
         
         self.frame_mgr.shouldDisplay = False
 
-    def __instantiate_user(self, user_data):
-        '''
-        Instantiates a new user into the local database.
-
-        :param user_data: A tuple containing all necessary database-defined user attributes
-        '''
-        
-        # Create our new user
-        self.frame_mgr \
-            .db \
-            .cursor \
-            .execute('INSERT INTO users (usr, pwd, name, email, city, timezone) VALUES (?,?,?,?,?,?);', user_data) 
-        
-        self.frame_mgr.db.connection.commit()
-
     def __handle_signup(self):
         '''
         Handler for registering users. This function will prompt the user with fields
@@ -70,16 +55,16 @@ class EntryFrame(frames.Frame):
         new user is added to the database with a unique id.
         '''
 
-        city = input("Your city: ")
-        timezone = input("Your timezone: ")
-        name = input("Your name: ")
-        email = input("Your email: ")
-        password = getpass.getpass("Your password: ")  # hides the user's password from display
+        city = self.input("Your city: ")
+        timezone = self.input("Your timezone: ")
+        name = self.input("Your name: ")
+        email = self.input("Your email: ")
+        password = self.getpass("Your password: ")  # hides the user's password from display
 
         # Error check for city. It can only be [A-Z] or [a-z] and contain spaces
         city_no_space = city.replace(" ", "")
         if not city_no_space.isalpha():
-            print("\nCity can only contain the letters a-z along with spaces")
+            self.print("\nCity can only contain the letters a-z along with spaces")
             self.frame_mgr.display(frames.EntryFrame(self.frame_mgr))
             return
 
@@ -87,25 +72,14 @@ class EntryFrame(frames.Frame):
         try:
             int_time = float(timezone)
         except:
-            print("\nTimezone must be a number")
+            self.print("\nTimezone must be a number")
             self.frame_mgr.display(frames.EntryFrame(self.frame_mgr))
             return
 
-        # The next UNIQUE user id wil be the current user count
-        self.frame_mgr \
-            .db \
-            .cursor \
-            .execute("SELECT COUNT(*) FROM users;")
-        
-        # Data for our new user row
-        id_offset = 1  # What we offset our user ids by
-        user_id = self.frame_mgr.db.cursor.fetchone()[0] + id_offset
-        user_data = (user_id, password, name, email, city, timezone)
-
-        # Creates new user
-        self.__instantiate_user(user_data)
+        # Creates new user under the next UNIQUE user id
+        user_id = self.frame_mgr.db.create_user(password, name, email, city, timezone)
 
-        print(f"\nAccount successfully created with ID:{user_id}. Please login.")
+        self.print(f"\nAccount successfully created with ID:{user_id}. Please login.")
         
         self.__handle_login()  # sends our user to the login screen when done
 
@@ -123,7 +97,7 @@ class EntryFrame(frames.Frame):
         self.frame_mgr \
             .db \
             .cursor \
-            .execute("SELECT COUNT(*), * FROM users WHERE usr = ? AND pwd = ?;", login_data)
+            .execute(Queries.LOGIN, login_data)
         return self.frame_mgr.db.cursor.fetchone()
 
 
@@ -138,8 +112,8 @@ class EntryFrame(frames.Frame):
         login_result = None
 
         while continue_loop:
-            user_id = input("\nYour user id: ")
-            password = getpass.getpass("Your password: ")
+            user_id = self.input("\nYour user id: ")
+            password = self.getpass("Your password: ")
 
             login_data = (user_id, password)
 
@@ -149,7 +123,7 @@ class EntryFrame(frames.Frame):
             # [1:5] -> usr, pwd, name, email, city, timezone
 
             continue_loop = (not login_result[0])  # sets continue_loop to False if the user id and password are valid
-            if (continue_loop and input("Invalid credentials, would you like to try again (y/n)? ") != 'y'):
+            if (continue_loop and self.input("Invalid credentials, would you like to try again (y/n)? ") != 'y'):
                 self.frame_mgr.display(frames.EntryFrame(self.frame_mgr))
                 return
             
@@ -27,7 +27,7 @@ class Frame:
         
         if len(self.static_options) > 0:
             for i, option in self.static_options.items():
-                print(f'{i}) {option["text"]}')
+                self.frame_mgr.io.option(i, option["text"])
         
     def handle_event(self, response):
         '''
@@ -47,7 +47,7 @@ class Frame:
             self.handle_dynamic_event(response)
             
         else:
-             print("Sorry, invalid input. Please try again")
+             self.print("Sorry, invalid input. Please try again")
 
     def add_dynamic_render(self, option_text, id = None):
         '''
@@ -63,7 +63,7 @@ class Frame:
         if id != None:
             self.dynamic_ids[str(opt_index)] = id
 
-        print(f'{opt_index}) {option_text}')  # displays option index and corresponding descriptor text
+        self.frame_mgr.io.option(opt_index, option_text)  # displays option index and corresponding descriptor text
 
     def handle_dynamic_event(self, response):
         '''
@@ -73,4 +73,35 @@ class Frame:
         :param response: Contains user option selection
         '''
         
-        pass
\ No newline at end of file
+        pass
+
+    def print(self, text=""):
+        '''
+        Displays text through the frame manager's output sink
+
+        :param text: The text to be displayed
+        '''
+
+        self.frame_mgr.io.write(text)
+
+    def input(self, prompt=""):
+        '''
+        Prompts the user through the frame manager's input source
+
+        :param prompt: The text displayed before the user's response
+
+        :return: The user's response
+        '''
+
+        return self.frame_mgr.io.read(prompt)
+
+    def getpass(self, prompt=""):
+        '''
+        Prompts the user for a secret, such as a password, without echoing it
+
+        :param prompt: The text displayed before the user's response
+
+        :return: The user's response
+        '''
+
+        return self.frame_mgr.io.read_secret(prompt)
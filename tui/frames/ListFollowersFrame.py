@@ -1,57 +1,89 @@
 import tui.frames as frames
+from tui.core.models.PageCursor import PageCursor
 
 class ListFollowersFrame(frames.Frame):
     '''
     Frame used to display the list followers screen to the user
     '''
-    
-    def __init__(self, frame_mgr):
+
+    # Followers shown per page
+    PAGE_SIZE = 10
+
+    # Sorts before every usr since followers are listed in ascending usr order
+    FIRST_PAGE_KEY = (-1,)
+
+    def __init__(self, frame_mgr, page_cursor=None):
         '''
         Initialization of the frame
+
+        :param page_cursor: PageCursor storing where each page of followers viewed so far ended
         '''
-        
+
         super().__init__(frame_mgr)
 
-        self.user = self.frame_mgr.db.user.id # self.user is set to the user currently logged in 
+        self.user = self.frame_mgr.db.user.id # self.user is set to the user currently logged in
+        self.page_cursor = page_cursor if page_cursor else PageCursor(self.FIRST_PAGE_KEY)
+        self.followers = []
+        self.follower_options = {}  # option number -> usr of the follower it selects
 
     def render(self):
-        ''' 
-        Displays all followers for the user currently logged in
         '''
-        
-        user_parameter = (self.user,)
-        self.frame_mgr \
+        Displays a page of followers of the user currently logged in
+        '''
+
+        # Fetches the followers of the followee currently logged in, seeking past the last follower
+        # of the previous page. Only one follower more than a page is fetched, which tells us
+        # whether there is a next page, so nothing is read further than that
+        self.followers = self.frame_mgr \
             .db \
-            .cursor \
-            .execute("SELECT flwer FROM follows WHERE flwee = ?;", user_parameter) # query for fetching all followers for the followee currently logged in 
-        
-        self.followers = self.frame_mgr.db.cursor.fetchall() # stores all followers in a list (used fetchall())
-        
-        print("\nAll followers:\n")
-
-        # Iterates through the list of followers and renders each follower
-        # with an selection index so the user can select followers to interact further
-        for follower in self.followers:
-            self.add_dynamic_render(follower[0]) 
+            .followers(self.user, *self.page_cursor.after, self.PAGE_SIZE + 1)
+
+        self.print("\nAll followers:\n")
+
+        # Renders each follower with an selection index so the user can select followers to interact further,
+        # remembering which follower every option number stands for on this page
+        for flwer, name in self.followers[:self.PAGE_SIZE]:
+            self.add_dynamic_render(f"{name} ({flwer})")
+            self.follower_options[str(self._dynamic_size + len(self.static_options))] = flwer
+
+        if not self.followers:
+            self.print("You have no followers yet.")
+
+        self.print()
+
+        # If more followers than fit on a page are returned from the query, displays the next page dynamic option
+        if len(self.followers) > self.PAGE_SIZE:
+            self.add_dynamic_render("Next Page -->", "NEXT")
+
+        # If current page is not the first page, displays the previous page dynamic option
+        if self.page_cursor.page != 1:
+            self.add_dynamic_render("Prev Page <--", "PREV")
 
         self.add_dynamic_render("Back", "BACK")  # adds the back page option to the dynamic options
 
 
     def handle_dynamic_event(self, response):
         '''
-        Handles dynamic events to allow the user to interact with one of their followers and return to the LoggedIn/main page.
+        Handles dynamic events to allow the user to interact with one of their followers, move to the
+        next/previous page of followers and return to the LoggedIn/main page.
 
         :param response: Contains user option selection
         '''
-        
+
         # Selects follower and displays frame for further profile interaction
-        if response not in self.dynamic_ids:
-            selected_flwer = self.followers[int(response) - 2][0]
-            self.frame_mgr.display(frames.UserProfileFrame(self.frame_mgr, selected_flwer, None))
+        if response in self.follower_options:
+            self.frame_mgr.display(frames.UserProfileFrame(self.frame_mgr, self.follower_options[response], None))
             return
-        
+
+        # Displays next or previous page of followers if corresponding options are selected
+        if self.dynamic_ids[response] == "NEXT":
+            next_cursor = self.page_cursor.next((self.followers[self.PAGE_SIZE - 1][0],))
+            self.frame_mgr.display(frames.ListFollowersFrame(self.frame_mgr, next_cursor))
+        elif self.dynamic_ids[response] == "PREV":
+            self.frame_mgr.display(frames.ListFollowersFrame(self.frame_mgr, self.page_cursor.prev()))
+
         # Returns user to the LoggedInFrame/Home page if corresponding option is selected
-        if self.dynamic_ids[response] == "BACK":
+        elif self.dynamic_ids[response] == "BACK":
             self.frame_mgr.display(frames.LoggedInFrame(self.frame_mgr))
-        
-    
+
+
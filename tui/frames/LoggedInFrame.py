@@ -1,20 +1,24 @@
 import tui.frames as frames
+from tui.core.models.PageCursor import PageCursor
 
 class LoggedInFrame(frames.Frame):
     '''
     Frame used to display the logged in screen (referred to as the main or home page)
     '''
+
+    # Sorts before every (sort date, tid) key on the home page since results are newest first
+    FIRST_PAGE_KEY = ("9999-12-31", 2 ** 63 - 1)
     
-    def __init__(self, frame_mgr, page=1):
+    def __init__(self, frame_mgr, page_cursor=None):
         '''
         Initialization of the frame
         
-        :param page: Integer storing the page of tweets being viewed on the main page
+        :param page_cursor: PageCursor storing where each page of tweets viewed on the main page ended
         '''
         
         super().__init__(frame_mgr)
 
-        self.page = page
+        self.page_cursor = page_cursor if page_cursor else PageCursor(self.FIRST_PAGE_KEY)
         self.query_results = []
         self.result_size = 0
         
@@ -38,6 +42,16 @@ class LoggedInFrame(frames.Frame):
             "4": {
                 "text": "Display Followers",
                 "handler": self.__handle_display_followers
+            },
+
+            "5": {
+                "text": "Trending Hashtags",
+                "handler": self.__handle_trending
+            },
+
+            "6": {
+                "text": "Who to Follow",
+                "handler": self.__handle_who_to_follow
             }
           
         }
@@ -48,50 +62,46 @@ class LoggedInFrame(frames.Frame):
         Also, finds and displays the tweets and retweets from the users the logged in user is following.
         '''
         
-        print(f"\nYou are now logged in as: {self.frame_mgr.db.user.name} \n")
+        self.print(f"\nYou are now logged in as: {self.frame_mgr.db.user.name} \n")
         super().render()
         
-        # Query to find all tweets and retweets from the users the logged in user is following
-        self.frame_mgr \
+        # Finds all tweets and retweets from the users the logged in user is following, dated by
+        # their latest appearance, starting past the (date, tid) of the last tweet on the previous page
+        self.query_results = self.frame_mgr \
             .db \
-            .cursor \
-            .execute(f'''
-                    SELECT DISTINCT t.tid, t.text, t.tdate, t.writer
-                    FROM tweets t
-                    JOIN follows f on f.flwer = ?
-                    LEFT JOIN retweets r ON t.tid = r.tid
-                    WHERE t.writer = f.flwee
-                    OR f.flwee = r.usr
-                    ORDER BY COALESCE(r.rdate, t.tdate) DESC
-                    LIMIT ?, 6;
-                ''', (self.frame_mgr.db.user.id, (self.page - 1) * 5))
-        
-        self.query_results = self.frame_mgr.db.cursor.fetchall() # stores the query results 
+            .home_feed(self.frame_mgr.db.user.id, self.page_cursor.after)
+        
         self.result_len = len(self.query_results)  # finds the length of the results (the number of tweets/retweets to display)
         
         # Prints funny header if the user has no tweets in their home page
         if self.result_len == 0:
-            print("\nNo Tweets! Go make some friends!")
+            self.print("\nNo Tweets! Go make some friends!")
         
         # Renders and displays tweets and retweets
         elif self.result_len >=1:
-            print(f"\n   {'tID':^15}| {'Date':^10} | {'Writer':^16} | Tweet")
-            print()
+            self.print(f"\n   {'tID':^15}| {'Date':^10} | {'Writer':^16} | Tweet")
+            self.print()
         
+        # Retweets say who retweeted them
         for result in self.query_results[:5]:
-            self.add_dynamic_render(f"{result[0]:^15}| {result[2]:10} | {result[3]:^16} | {result[1]}")
+            retweeted_by = f"  (retweeted by {result[5]})" if result[5] is not None else ""
+            self.add_dynamic_render(f"{result[0]:^15}| {result[2]:10} | {result[3]:^16} | {result[1]}{retweeted_by}")
         
-        print()  # buffer for output cleanliness
+        self.print()  # buffer for output cleanliness
 
         # If more than 5 tweets are returned from the query, displays the next page dynamic option to view additional tweets
+        # and fetches that page in the background while the user reads this one
         if self.result_len > 5:
             self.add_dynamic_render(f"Next Page -->", "NEXT")
+
+            last_result = self.query_results[4]
+            self.frame_mgr.db.prefetch_home_feed(self.frame_mgr.db.user.id, (last_result[4], last_result[0]))
         
         # If current page is not the first page, displays the previous page dynamic option
-        if self.page != 1:
+        if self.page_cursor.page != 1:
             self.add_dynamic_render(f"Prev Page <--", "PREV")
         
-        print()
+        self.print()
 
         # Displays log out dynamic option
         self.add_dynamic_render(f"Log out", "LOGOUT")
@@ -113,9 +123,11 @@ class LoggedInFrame(frames.Frame):
         
         # Displays next or previous set of home page tweets if corresponding options are selected
         if self.dynamic_ids[response] == "NEXT":
-            self.frame_mgr.display(frames.LoggedInFrame(self.frame_mgr, self.page + 1))
+            last_result = self.query_results[4]
+            next_cursor = self.page_cursor.next((last_result[4], last_result[0]))
+            self.frame_mgr.display(frames.LoggedInFrame(self.frame_mgr, next_cursor))
         elif self.dynamic_ids[response] == "PREV": 
-            self.frame_mgr.display(frames.LoggedInFrame(self.frame_mgr, self.page - 1))
+            self.frame_mgr.display(frames.LoggedInFrame(self.frame_mgr, self.page_cursor.prev()))
         
         # Returns user to the login/register page if corresponding option is selected
         elif self.dynamic_ids[response] == "LOGOUT": 
@@ -135,7 +147,7 @@ class LoggedInFrame(frames.Frame):
         Intakes user search keyword and displays corresponding frame
         '''
         
-        keyword = input("What user would you like to search for? ")
+        keyword = self.input("What user would you like to search for? ")
         self.frame_mgr.display(frames.UserSearchFrame(self.frame_mgr, keyword))
         
     def __handle_tweet(self):
@@ -143,7 +155,7 @@ class LoggedInFrame(frames.Frame):
         Intakes desired tweet text and displays corresponding frame
         '''
         
-        tweet_text = input("Please input the text for your tweet: ")
+        tweet_text = self.input("Please input the text for your tweet: ")
         self.frame_mgr.display(frames.ComposeTweetFrame(self.frame_mgr, tweet_text))
     
     def __handle_searchtweet(self):
@@ -156,12 +168,12 @@ class LoggedInFrame(frames.Frame):
         
         while not valid_keywords:
             
-            searchtweet_keywords = input("Please input the keywords you would like to search for: ")
+            searchtweet_keywords = self.input("Please input the keywords you would like to search for: ")
             
             if searchtweet_keywords:
                 valid_keywords = True
             else:
-                print("\nPlease enter a valid search!\n")
+                self.print("\nPlease enter a valid search!\n")
         
         self.frame_mgr.display(frames.SearchForTweetFrame(self.frame_mgr, searchtweet_keywords))  # displays tweet search results frame for further interaction
 
@@ -172,4 +184,18 @@ class LoggedInFrame(frames.Frame):
 
         self.frame_mgr.display(frames.ListFollowersFrame(self.frame_mgr))
 
+    def __handle_trending(self):
+        '''
+        Displays the trending hashtags frame
+        '''
+
+        self.frame_mgr.display(frames.TrendingFrame(self.frame_mgr))
+
+    def __handle_who_to_follow(self):
+        '''
+        Displays the who to follow suggestions frame
+        '''
+
+        self.frame_mgr.display(frames.WhoToFollowFrame(self.frame_mgr))
+
        
\ No newline at end of file
@@ -1,23 +1,27 @@
 import tui.frames as frames
-import tui.utils.StringUtils as StringUtils
+import tui.core.Queries as Queries
+from tui.core.models.PageCursor import PageCursor
 
 class SearchForTweetFrame(frames.Frame):
     '''
     Frame used to display tweet search results to the user
     '''
+
+    # Sorts before every (tdate, tid) key since results are newest first
+    FIRST_PAGE_KEY = ("9999-12-31", 2 ** 63 - 1)
     
-    def __init__(self, frame_mgr, keyword, page=1):
+    def __init__(self, frame_mgr, keyword, page_cursor=None):
         '''
         Initialization of the frame
 
         :param keyword: String of keywords to search for 
-        :param page: Integer representing page of search results to display
+        :param page_cursor: PageCursor storing where each page of search results viewed so far ended
         '''
         
         super().__init__(frame_mgr)
 
         self.keyword = keyword
-        self.page = page
+        self.page_cursor = page_cursor if page_cursor else PageCursor(self.FIRST_PAGE_KEY)
         self.search_results = []
         self.result_size = 0
 
@@ -26,55 +30,30 @@ class SearchForTweetFrame(frames.Frame):
         Renders and displays tweet keyword search results and dynamic options
         '''
         
-        print(f"\nTweet search results for: {self.keyword} \n")
+        self.print(f"\nTweet search results for: {self.keyword} \n")
         
 
         listKeyword = str(self.keyword).split()
-        
-        keyword_query = ''  # variable to hold the WHERE clause of the query for dynamic SQL query generation
 
-        # Checking if the first keyword is a hashtag and assigning WHERE clause accordingly
-        if listKeyword[0].startswith("#"):
-            keyword_query = "WHERE (t.tid = m.tid AND (UPPER(m.term) = ?)) "
-        else:
-            keyword_query = "WHERE (UPPER(t.text) LIKE '%' || ? || '%') "
+        # Every kind of keyword is packed into a single parameter of the one search statement,
+        # kinds without keywords match nothing
+        search, search_params = Queries.tweet_search(listKeyword, self.frame_mgr.db.tweet_fts, self.page_cursor.after)
 
-        # Traversing listkeyword and assigning OR statements for each keyword after first dependent on presence of hashtag
-        if len(listKeyword) > 1:
-            for i in range(1, len(listKeyword)):
-                if listKeyword[i].startswith("#"):
-                    keyword_query += "OR (t.tid = m.tid AND (UPPER(m.term) = ?)) "
-                else:
-                    keyword_query += "OR (UPPER(t.text) LIKE '%' || ? || '%' ) "
-        
-        # Turns hashtag keywords into alphanumeric only terms ready for query use
-        for i in range(len(listKeyword)):
-            if listKeyword[i].startswith("#"):
-                listKeyword[i] = StringUtils.get_hashtags(listKeyword[i])[0]
-        
-        # Turns all keyword elements to UPPER to negate any case-sensitivity
-        for i in range(len(listKeyword)):
-            listKeyword[i] = listKeyword[i].upper()
-        
-        # Query to acquire all tweets related to search terms ordered by tweet date in an latest to oldest format
-        self.frame_mgr \
-            .db \
-            .cursor \
-            .execute(f'''
-                    SELECT DISTINCT t.tid, t.text, t.tdate, t.writer
-                    FROM tweets t LEFT JOIN mentions m on t.tid = m.tid
-                    {keyword_query}
-                    ORDER BY t.tdate DESC
-                    LIMIT ?, 6;
-                ''', (*listKeyword, (self.page - 1) * 5))
-    
+        self.search_results = []
+
+        # Query to acquire all tweets related to search terms ordered by tweet date in an latest to oldest format,
+        # seeking past the last tweet of the previous page
+        if listKeyword:
+            # Taken from memory if the previous page prefetched this one
+            self.search_results = self.frame_mgr \
+                .db \
+                .fetchall_prefetched(search, search_params)
 
-        self.search_results = self.frame_mgr.db.cursor.fetchall()  # stores the query results
         self.result_len = len(self.search_results)  # finds the length of the results (the number of tweets/retweets to display)
         
         # Displays output headers for tweets
-        print(f"   {'tID':^15}| {'Date':^10} | {'Writer':^16} | Tweet")
-        print("  ------------------------------------------")
+        self.print(f"   {'tID':^15}| {'Date':^10} | {'Writer':^16} | Tweet")
+        self.print("  ------------------------------------------")
 
         # Displays every queried tweet
         for result in self.search_results[:5]:
@@ -82,16 +61,20 @@ class SearchForTweetFrame(frames.Frame):
 
         # If no tweets are found, notifies the user
         if self.result_len == 0:
-            print("No results found.")
+            self.print("No results found.")
         
-        print()  # buffer for output cleanliness
+        self.print()  # buffer for output cleanliness
         
         # If more than 5 tweets are returned from the query, displays the next page dynamic option to view additional tweets
+        # and fetches that page in the background while the user reads this one
         if self.result_len > 5:
             self.add_dynamic_render(f"Next Page -->", "NEXT")
 
+            last_result = self.search_results[4]
+            self.frame_mgr.db.prefetch(*Queries.tweet_search(listKeyword, self.frame_mgr.db.tweet_fts, (last_result[2], last_result[0])))
+
         # If current page is not the first page, displays the previous page dynamic option
-        if self.page != 1:
+        if self.page_cursor.page != 1:
             self.add_dynamic_render(f"Prev Page <--", "PREV")
         
         # Displays the back to previous page option
@@ -114,9 +97,11 @@ class SearchForTweetFrame(frames.Frame):
         
         # Displays next or previous set of search results if corresponding options are selected
         if self.dynamic_ids[response] == "NEXT":
-            self.frame_mgr.display(frames.SearchForTweetFrame(self.frame_mgr, self.keyword, self.page + 1))
+            last_result = self.search_results[4]
+            next_cursor = self.page_cursor.next((last_result[2], last_result[0]))
+            self.frame_mgr.display(frames.SearchForTweetFrame(self.frame_mgr, self.keyword, next_cursor))
         elif self.dynamic_ids[response] == "PREV": 
-            self.frame_mgr.display(frames.SearchForTweetFrame(self.frame_mgr, self.keyword, self.page - 1))
+            self.frame_mgr.display(frames.SearchForTweetFrame(self.frame_mgr, self.keyword, self.page_cursor.prev()))
         
         # Returns user to the home page if corresponding option is selected
         elif self.dynamic_ids[response] == "BACK": 
@@ -0,0 +1,132 @@
+import tui.frames as frames
+import tui.core.Queries as Queries
+from tui.core.models.PageCursor import PageCursor
+
+class ThreadFrame(frames.Frame):
+    '''
+    Frame used to display the conversation a tweet is part of: the tweets it replies to
+    and a page of the replies below it
+    '''
+
+    # Direct replies of the tweet shown per page
+    PAGE_SIZE = 5
+
+    # Replies shown below each reply, and how many levels of them
+    FANOUT = 3
+    MAX_DEPTH = 3
+
+    # Tweets shown above the tweet, the ones further up are reached by selecting the topmost
+    MAX_ANCESTORS = 10
+
+    # Sorts before every (tdate, tid) since replies are listed oldest first
+    FIRST_PAGE_KEY = ("", -1)
+
+    def __init__(self, frame_mgr, tweet_id, keyword=None, page_cursor=None):
+        '''
+        Initialization of the frame
+
+        :param tweet_id: The ID of the tweet the thread is shown around
+        :param keyword: Passed back to ViewTweetFrame so it can return to the frame that called it
+        :param page_cursor: PageCursor storing where each page of direct replies viewed so far ended
+        '''
+
+        super().__init__(frame_mgr)
+
+        self.tid = tweet_id
+        self.keyword = keyword
+        self.page_cursor = page_cursor if page_cursor else PageCursor(self.FIRST_PAGE_KEY)
+        self.rows = []
+        self.tweet_options = {}  # option number -> tid of the tweet it refocuses the thread on
+
+    def render(self):
+        '''
+        Displays the tweets above the tweet, the tweet itself and a page of the replies below it
+        '''
+
+        tdate, after_tid = self.page_cursor.after
+
+        # Fetches the whole page in one statement, however long the chain above the tweet or
+        # however many replies it has, see Queries.THREAD
+        self.rows = self.frame_mgr \
+            .db \
+            .cursor \
+            .execute(Queries.THREAD, {
+                "tid": self.tid,
+                "ancestors": self.MAX_ANCESTORS,
+                "tdate": tdate,
+                "after_tid": after_tid,
+                "page": self.PAGE_SIZE,
+                "fanout": self.FANOUT,
+                "depth": self.MAX_DEPTH,
+            }) \
+            .fetchall()
+
+        focus = next((row for row in self.rows if row[0] == 0), None)
+        if focus is None:
+            self.print("\nThis tweet could not be found.\n")
+            self.add_dynamic_render("Back", "BACK")
+            return
+
+        # Counts the replies of every tweet that made it onto the page, so the ones left out can be mentioned
+        shown = {}
+        for depth, tid, replyto, writer, tdate, text, replies in self.rows:
+            if depth > 0:
+                shown[replyto] = shown.get(replyto, 0) + 1
+
+        self.print("\nConversation thread:\n")
+
+        # Renders every tweet above and below with an selection index so the user can move the thread onto it,
+        # indenting replies by how far below the tweet they are
+        for depth, tid, replyto, writer, tdate, text, replies in self.rows:
+            if depth == 0:
+                self.print(f"\n   >> Tweet ID: {tid} | Date: {tdate} | Writer: {writer} | {text}")
+                self.print(f"   >> {replies} replies\n")
+                continue
+
+            indent = "    " * (depth - 1)
+            more = replies - shown.get(tid, 0)
+            suffix = f" (+{more} more replies)" if depth > 0 and more > 0 else ""
+            self.add_dynamic_render(f"{indent}Tweet ID: {tid} | Date: {tdate} | Writer: {writer} | {text}{suffix}")
+            self.tweet_options[str(self._dynamic_size + len(self.static_options))] = tid
+
+        if focus[6] == 0:
+            self.print("No replies yet.")
+
+        self.print()
+
+        # If the tweet has more direct replies than the pages shown so far, displays the next page dynamic option
+        if self.page_cursor.page * self.PAGE_SIZE < focus[6]:
+            self.add_dynamic_render("Next Page -->", "NEXT")
+
+        # If current page is not the first page, displays the previous page dynamic option
+        if self.page_cursor.page != 1:
+            self.add_dynamic_render("Prev Page <--", "PREV")
+
+        self.add_dynamic_render("Back", "BACK")  # adds the back page option to the dynamic options
+
+
+    def handle_dynamic_event(self, response):
+        '''
+        Handles dynamic events to allow the user to move the thread onto another tweet, move to the
+        next/previous page of replies and return to the tweet.
+
+        :param response: Contains user option selection
+        '''
+
+        # Shows the thread around the selected tweet instead
+        if response in self.tweet_options:
+            self.frame_mgr.display(frames.ThreadFrame(self.frame_mgr, self.tweet_options[response], self.keyword))
+            return
+
+        # Displays next or previous page of replies if corresponding options are selected, the next
+        # page starting after the last direct reply of this one
+        if self.dynamic_ids.get(response) == "NEXT":
+            last = [row for row in self.rows if row[0] == 1][-1]
+            next_cursor = self.page_cursor.next((last[4], last[1]))
+            self.frame_mgr.display(frames.ThreadFrame(self.frame_mgr, self.tid, self.keyword, next_cursor))
+        elif self.dynamic_ids.get(response) == "PREV":
+            self.frame_mgr.display(frames.ThreadFrame(self.frame_mgr, self.tid, self.keyword, self.page_cursor.prev()))
+
+        # Returns user to the tweet, from which they can reply to or retweet it
+        elif self.dynamic_ids.get(response) == "BACK":
+            self.frame_mgr.display(frames.ViewTweetFrame(self.frame_mgr, self.tid, self.keyword))
@@ -0,0 +1,78 @@
+import tui.frames as frames
+import tui.core.Trending as Trending
+
+class TrendingFrame(frames.Frame):
+    '''
+    Frame used to display the most mentioned hashtags of the last hour, day or week
+    '''
+
+    # Hashtags shown per window
+    TOP_N = 10
+
+    # Label of every window, in the order their options are listed
+    WINDOW_LABELS = {
+        Trending.HOUR: "Last hour",
+        Trending.DAY: "Last day",
+        Trending.WEEK: "Last week",
+    }
+
+    def __init__(self, frame_mgr, window=Trending.DAY):
+        '''
+        Initialization of the frame
+
+        :param window: The window whose hashtags are shown, Trending.HOUR, Trending.DAY or Trending.WEEK
+        '''
+
+        super().__init__(frame_mgr)
+
+        self.window = window
+        self.trends = []
+
+    def render(self):
+        '''
+        Displays the top hashtags of the window along with options to switch windows
+        '''
+
+        self.print(f"\nTrending hashtags, {self.WINDOW_LABELS[self.window].lower()}:\n")
+
+        # Counts are kept up to date in memory as tweets are written, so nothing is aggregated here
+        self.trends = self.frame_mgr.db.trending_hashtags(self.window, self.TOP_N)
+
+        # Renders each hashtag with an selection index so the user can search for its tweets
+        for term, mentions in self.trends:
+            self.add_dynamic_render(f"#{term:<24} {mentions} mention(s)")
+
+        if not self.trends:
+            self.print("Nothing is trending yet.")
+
+        self.print()
+
+        # Displays an option for every other window
+        for window, label in self.WINDOW_LABELS.items():
+            if window != self.window:
+                self.add_dynamic_render(label, window)
+
+        self.add_dynamic_render("Back", "BACK")  # adds the back page option to the dynamic options
+
+
+    def handle_dynamic_event(self, response):
+        '''
+        Handles dynamic events to allow the user to search for a trending hashtag, switch
+        windows and return to the LoggedIn/main page.
+
+        :param response: Contains user option selection
+        '''
+
+        # Selects hashtag and displays the tweets mentioning it
+        if response not in self.dynamic_ids:
+            term = self.trends[int(response) - 1][0]
+            self.frame_mgr.display(frames.SearchForTweetFrame(self.frame_mgr, f"#{term}"))
+            return
+
+        # Returns user to the LoggedInFrame/Home page if corresponding option is selected
+        if self.dynamic_ids[response] == "BACK":
+            self.frame_mgr.display(frames.LoggedInFrame(self.frame_mgr))
+
+        # Displays the selected window otherwise
+        else:
+            self.frame_mgr.display(frames.TrendingFrame(self.frame_mgr, self.dynamic_ids[response]))
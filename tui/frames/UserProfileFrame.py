@@ -1,25 +1,33 @@
 import tui.frames as frames
+import tui.core.Queries as Queries
 import datetime
+from tui.core.models.PageCursor import PageCursor
 
 class UserProfileFrame(frames.Frame):
     '''
     Frame to display user profiles to the viewer
     '''
+
+    # Sorts before every (tdate, tid) key since tweets are shown newest first
+    FIRST_PAGE_KEY = ("9999-12-31", 2 ** 63 - 1)
     
-    def __init__(self, frame_mgr, user_id, last_keyword=None, page=1):
+    def __init__(self, frame_mgr, user_id, last_keyword=None, page_cursor=None, back=None):
         '''
         Initialization of the frame
 
         :param user_id: ID of user whose profile is to be displayed
         :param last_keyword: Used to distinguish which frame called UserProfileFrame so we can return to it later
-        :param page: Used to scroll through recent tweets of user whose profile is displayed
+        :param page_cursor: PageCursor used to scroll through recent tweets of user whose profile is displayed
+        :param back: Frame class taking only the frame manager that Back returns to when there is no last_keyword,
+        ListFollowersFrame if None
         '''
         
         super().__init__(frame_mgr)
         
         self.user_id = user_id
         self.last_keyword = last_keyword
-        self.page = page
+        self.back = back if back else frames.ListFollowersFrame
+        self.page_cursor = page_cursor if page_cursor else PageCursor(self.FIRST_PAGE_KEY)
     
     def render(self):
         '''
@@ -28,77 +36,50 @@ class UserProfileFrame(frames.Frame):
         '''
 
         # Query used to find user name of the specified user
-        self.frame_mgr \
+        user_name = self.frame_mgr \
             .db \
-            .cursor \
-            .execute("SELECT DISTINCT usr, name FROM users WHERE usr = ?", (self.user_id,))
-        
-        user_name = self.frame_mgr.db.cursor.fetchone()[1]
+            .fetchone_cached(Queries.USER_NAME, (self.user_id,))[1]
         
-        print(f"\nViewing the profile of {user_name}")
+        self.print(f"\nViewing the profile of {user_name}")
 
 
-        # Query used to find the number of total tweets the user has
-        self.frame_mgr \
+        # Query used to find the number of tweets, followed users and followers the user has,
+        # kept up to date by triggers so there is nothing to count here
+        num_tweets, following_count, follower_count = self.frame_mgr \
             .db \
-            .cursor \
-            .execute("SELECT COUNT(DISTINCT tid) FROM tweets WHERE writer = ?", (self.user_id,))
-
-        num_tweets = self.frame_mgr.db.cursor.fetchone()[0]
-        
-        print(f"Total tweets: {num_tweets}")
-
-
-        # Query used to find the number of users the user is following
-        self.frame_mgr \
-            .db \
-            .cursor \
-            .execute("SELECT COUNT(DISTINCT flwee) FROM follows WHERE flwer = ?", (self.user_id,))
-                
-        following_count = self.frame_mgr.db.cursor.fetchone()[0]
+            .fetchone_cached(Queries.USER_STATS, (self.user_id,)) or (0, 0, 0)
         
-        print(f"Following: {following_count} user(s)")
+        self.print(f"Total tweets: {num_tweets}")
+        self.print(f"Following: {following_count} user(s)")
+        self.print(f"Followers: {follower_count} user(s)")
 
 
-        # Query used to find the number of followers the user has
+        # Query used to find the users tweets, seeking past the last tweet of the previous page
         self.frame_mgr \
             .db \
             .cursor \
-            .execute("SELECT COUNT(DISTINCT flwer) FROM follows WHERE flwee = ?", (self.user_id,))
-                
-        follower_count = self.frame_mgr.db.cursor.fetchone()[0]
-        
-        print(f"Followers: {follower_count} user(s)")
-
-
-        # Query used to find the users tweets
-        self.frame_mgr \
-            .db \
-            .cursor \
-            .execute("SELECT DISTINCT tid, text FROM tweets WHERE writer = ? ORDER BY tdate DESC LIMIT ?, 4", (self.user_id, (self.page-1) * 3))
+            .execute(Queries.USER_TWEETS, (self.user_id, *self.page_cursor.after))
         
         tweets = self.frame_mgr.db.cursor.fetchall()
+        self.tweets = tweets
         tweets_len = len(tweets)   # finds the length of the results (the number of tweets to display)
 
         
-        print("\nUsers tweets:")
+        self.print("\nUsers tweets:")
         
         # Displays users tweets
         for tweet in tweets[:3]:
-            print(f"{tweet[1]}")
+            self.print(f"{tweet[1]}")
         
         # Notifies viewer if user has no tweets
         if tweets_len == 0:
-            print("User has no tweets.")
-        print()
+            self.print("User has no tweets.")
+        self.print()
 
         # Query for checking if the user can follow the user he is viewing
-        self.frame_mgr \
+        can_follow = not self.frame_mgr \
             .db \
-            .cursor \
-            .execute("SELECT COUNT(DISTINCT flwer) FROM follows WHERE flwer = ? AND flwee = ?", (self.frame_mgr.db.user.id, self.user_id))
-        
-        can_follow = self.frame_mgr.db.cursor.fetchone()[0] == 0
+            .is_following(self.frame_mgr.db.user.id, self.user_id)
 
         # Shows follow option only if the viewer is not viewing their own profile
         # and if the viewer does not follow the user already
@@ -111,7 +92,7 @@ class UserProfileFrame(frames.Frame):
             self.add_dynamic_render(f"Next Page -->", "NEXT")
         
         # If current page is not the first page, displays the previous page dynamic option
-        if self.page != 1:
+        if self.page_cursor.page != 1:
             self.add_dynamic_render(f"Prev Page <--", "PREV")
 
         # Displays the back to previous page option
@@ -135,28 +116,24 @@ class UserProfileFrame(frames.Frame):
             if self.last_keyword:
                 self.frame_mgr.display(frames.UserSearchFrame(self.frame_mgr, self.last_keyword))
             else:
-                self.frame_mgr.display(frames.ListFollowersFrame(self.frame_mgr)) 
+                self.frame_mgr.display(self.back(self.frame_mgr))
         
         # Displays next or previous set of search results if corresponding options are selected
         elif self.dynamic_ids[response] == "NEXT":
-            self.frame_mgr.display(frames.UserProfileFrame(self.frame_mgr, self.user_id, self.last_keyword, self.page + 1))
+            last_tweet = self.tweets[2]
+            next_cursor = self.page_cursor.next((last_tweet[2], last_tweet[0]))
+            self.frame_mgr.display(frames.UserProfileFrame(self.frame_mgr, self.user_id, self.last_keyword, next_cursor, self.back))
         elif self.dynamic_ids[response] == "PREV":
-            self.frame_mgr.display(frames.UserProfileFrame(self.frame_mgr, self.user_id, self.last_keyword, self.page - 1))
+            self.frame_mgr.display(frames.UserProfileFrame(self.frame_mgr, self.user_id, self.last_keyword, self.page_cursor.prev(), self.back))
         
         # Handles following of user and refreshes user profile page
         elif self.dynamic_ids[response] == "FOLLOW":
 
             date_now = datetime.datetime.now()  # gets and stores the present date
             follow_date = date_now.strftime("%Y-%m-%d")  # converts present date into a string and stores it to ready for insertion query
-            follow_data = (self.user_id, self.frame_mgr.db.user.id, follow_date)  # tuple to hold parameters for insertion query
-
-            # Creates and inserts the user into the database
-            self.frame_mgr \
-            .db \
-            .cursor \
-            .execute('INSERT INTO follows (flwee, flwer, start_date) VALUES (?,?,?);', follow_data)
 
-            self.frame_mgr.db.connection.commit()
-            self.frame_mgr.display(frames.UserProfileFrame(self.frame_mgr, self.user_id, self.last_keyword, self.page))  # Refreshes page
+            # Inserts the follow into the database through the writer connection
+            self.frame_mgr.db.follow(self.frame_mgr.db.user.id, self.user_id, follow_date)
+            self.frame_mgr.display(frames.UserProfileFrame(self.frame_mgr, self.user_id, self.last_keyword, self.page_cursor, self.back))  # Refreshes page
 
-            print("\nUser successfully followed!")
+            self.print("\nUser successfully followed!")
@@ -1,21 +1,27 @@
 import tui.frames as frames
+import tui.core.TextSearch as TextSearch
+import tui.core.Queries as Queries
+from tui.core.models.PageCursor import PageCursor
 
 class UserSearchFrame(frames.Frame):
     '''
     Frame to display user search results to the viewer
     '''
+
+    # Sorts before every (match rank, match length, usr) key since results are in ascending order
+    FIRST_PAGE_KEY = (0, -1, -1)
     
-    def __init__(self, frame_mgr, keyword, page = 1):
+    def __init__(self, frame_mgr, keyword, page_cursor = None):
         '''
         Initializaton to the frame
 
         :param keyword: Used to search for users
-        :param page: Used to scroll through sets of users displayed
+        :param page_cursor: PageCursor used to scroll through sets of users displayed
         '''
         
         super().__init__(frame_mgr)
         self.keyword = keyword
-        self.page = page
+        self.page_cursor = page_cursor if page_cursor else PageCursor(self.FIRST_PAGE_KEY)
 
         self.search_results = []
         self.result_size = 0
@@ -25,33 +31,33 @@ class UserSearchFrame(frames.Frame):
         Renders and displays user keyword search results and dynamic options
         '''
         
-        print(f"\nUser search results for: {self.keyword} \n")
+        self.print(f"\nUser search results for: {self.keyword} \n")
 
         upper_keyword = self.keyword.upper()
 
+        # The trigram index narrows the search down to users whose name or city contains the keyword,
+        # keywords too short for trigrams (or databases without the index) scan every user instead
+        search = Queries.USER_SEARCH_SCAN
+        search_params = {
+            "keyword": upper_keyword,
+            "match": None,
+            "rank": self.page_cursor.after[0],
+            "length": self.page_cursor.after[1],
+            "usr": self.page_cursor.after[2],
+        }
+
+        if self.frame_mgr.db.user_fts and len(self.keyword) >= TextSearch.MIN_KEYWORD_LENGTH:
+            search = Queries.USER_SEARCH
+            search_params["match"] = TextSearch.match_expression([self.keyword])
+
         # We choose 6 rows here instead of 5 so we know when we have another page
-        # The ORDER BY case statements will respectively:
-        #   1. Give priority to matched names over matched cities
-        #   2. Order matched cities by their length, and do the same for matched cities
+        # Each candidate is matched once, then names are given priority over cities and
+        # shorter matches come first, each page seeking past the (rank, length, usr) of the
+        # last user on the previous page
         self.frame_mgr \
             .db \
             .cursor \
-            .execute('''
-                    SELECT DISTINCT u.usr, u.name, u.city 
-                    FROM users u 
-                    WHERE UPPER(u.name) LIKE '%' || ? || '%'
-                    OR UPPER(u.city) LIKE '%' || ? || '%'
-                    ORDER BY 
-                    CASE WHEN UPPER(u.name) LIKE '%' || ? || '%' 
-                        THEN 1
-                        ELSE 2
-                    END,
-                    CASE WHEN UPPER(u.name) LIKE '%' || ? || '%' 
-                        THEN LENGTH(u.name)
-                        ELSE LENGTH(u.city)
-                    END
-                    LIMIT ?, 6;
-                ''', (upper_keyword, upper_keyword, upper_keyword, upper_keyword, (self.page - 1) * 5))
+            .execute(search, search_params)
         
         
         self.search_results = self.frame_mgr.db.cursor.fetchall()
@@ -62,16 +68,16 @@ class UserSearchFrame(frames.Frame):
             self.add_dynamic_render(f"{result[1]} (from {result[2]})")
 
         if self.result_len == 0:
-            print("No results found")
+            self.print("No results found")
 
-        print()
+        self.print()
         
         # If more than 5 tweets are returned from the query, displays the next page dynamic option to view additional tweets
         if self.result_len > 5:
             self.add_dynamic_render(f"Next Page -->", "NEXT")
         
         # If current page is not the first page, displays the previous page dynamic option
-        if self.page != 1:
+        if self.page_cursor.page != 1:
             self.add_dynamic_render(f"Prev Page <--", "PREV")
         
         # Displays the back to previous page option
@@ -93,9 +99,11 @@ class UserSearchFrame(frames.Frame):
 
         # Displays next or previous set of search results if corresponding options are selected
         if self.dynamic_ids[response] == "NEXT":
-            self.frame_mgr.display(frames.UserSearchFrame(self.frame_mgr, self.keyword, self.page + 1))
+            last_result = self.search_results[4]
+            next_cursor = self.page_cursor.next((last_result[3], last_result[4], last_result[0]))
+            self.frame_mgr.display(frames.UserSearchFrame(self.frame_mgr, self.keyword, next_cursor))
         elif self.dynamic_ids[response] == "PREV": 
-            self.frame_mgr.display(frames.UserSearchFrame(self.frame_mgr, self.keyword, self.page - 1))
+            self.frame_mgr.display(frames.UserSearchFrame(self.frame_mgr, self.keyword, self.page_cursor.prev()))
 
         # Returns user to the home page if corresponding option is selected
         elif self.dynamic_ids[response] == "BACK": 
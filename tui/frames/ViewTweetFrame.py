@@ -1,4 +1,5 @@
 import tui.frames as frames
+import tui.core.Queries as Queries
 import datetime
 
 class ViewTweetFrame(frames.Frame):
@@ -27,59 +28,29 @@ class ViewTweetFrame(frames.Frame):
         '''
         
         # Query to find tweet details of a given tweet
-        self.frame_mgr \
+        self.tweetdetails = self.frame_mgr \
             .db \
-            .cursor \
-            .execute(f'''
-                    SELECT DISTINCT t.tid, t.text, t.tdate, t.writer
-                    FROM tweets t
-                    WHERE t.tid = ?
-                ''', (self.tid,))
-        
-        self.tweetdetails = self.frame_mgr.db.cursor.fetchone()
+            .fetchone_cached(Queries.TWEET, (self.tid,))
 
-        # Query to find number of replies this tweet has
-        self.frame_mgr \
+        # Query to find number of replies and retweets this tweet has, kept up to date by triggers
+        self.tweetstats = self.frame_mgr \
             .db \
-            .cursor \
-            .execute(f'''
-                    SELECT COUNT(DISTINCT t.tid)
-                    FROM tweets t
-                    WHERE t.replyto = ?
-                ''', (self.tid,))
-        
-        self.tweetreplycount = self.frame_mgr.db.cursor.fetchone()
-
-        # Query to find number of retweets this tweet has
-        self.frame_mgr \
-            .db \
-            .cursor \
-            .execute(f'''
-                    SELECT COUNT(DISTINCT r.usr)
-                    FROM retweets r
-                    WHERE r.tid = ?
-                ''', (self.tid,))
-        
-        self.tweetrtcount = self.frame_mgr.db.cursor.fetchone()
+            .fetchone_cached(Queries.TWEET_STATS, (self.tid,)) or (0, 0)
 
         # Displays tweet information and details
-        print(f"\n   Tweet ID: {self.tweetdetails[0]} | Date: {self.tweetdetails[2]} | Writer: {self.tweetdetails[3]} | {self.tweetdetails[1]}\n")
-        print(f"   This tweet has {self.tweetreplycount[0]} replies and {self.tweetrtcount[0]} retweets!\n")
+        self.print(f"\n   Tweet ID: {self.tweetdetails[0]} | Date: {self.tweetdetails[2]} | Writer: {self.tweetdetails[3]} | {self.tweetdetails[1]}\n")
+        self.print(f"   This tweet has {self.tweetstats[0]} replies and {self.tweetstats[1]} retweets!\n")
 
         # Displays reply option
         self.add_dynamic_render(f"Compose a reply", "REPLY")
 
+        # Displays the option to read the conversation the tweet is part of
+        self.add_dynamic_render(f"View conversation thread", "THREAD")
+
         # Query to check if the user has retweeted this tweet already
-        self.frame_mgr \
+        self.tweetrtcheck = self.frame_mgr \
             .db \
-            .cursor \
-            .execute(f'''
-                    SELECT COUNT(DISTINCT r.usr)
-                    FROM retweets r
-                    WHERE r.tid = ? AND r.usr = ?
-                ''', (self.tid, self.frame_mgr.db.user.id))
-        
-        self.tweetrtcheck = self.frame_mgr.db.cursor.fetchone()
+            .fetchone_cached(Queries.HAS_RETWEETED, (self.tid, self.frame_mgr.db.user.id))
 
         # Shows retweet option only if the viewer has not retweeted this tweet already
         if self.tweetrtcheck[0] == 0:
@@ -107,25 +78,23 @@ class ViewTweetFrame(frames.Frame):
         
         # Prompts user for reply tweet text and displays frame for further tweet posting
         if self.dynamic_ids[response] == "REPLY": 
-            reply_text = input("Please input the text for your reply: ")
+            reply_text = self.input("Please input the text for your reply: ")
             self.frame_mgr.display(frames.ComposeTweetFrame(self.frame_mgr, reply_text, self.tid))
+
+        # Displays the tweets this tweet replies to and the replies below it
+        elif self.dynamic_ids[response] == "THREAD":
+            self.frame_mgr.display(frames.ThreadFrame(self.frame_mgr, self.tid, self.keyword))
         
         # Handles following of user and refreshes view tweet page
         elif self.dynamic_ids[response] == "RETWEET":
 
             date_now = datetime.datetime.now()  # gets and stores the present date
             retweet_date = date_now.strftime("%Y-%m-%d")  # converts present date into a string and stores it to ready for insertion query
-            retweet = (self.frame_mgr.db.user.id, self.tid, retweet_date)  # tuple to hold parameters for insertion query
-            
-            # Creates and inserts the retweet into the database
-            self.frame_mgr \
-            .db \
-            .cursor \
-            .execute("INSERT INTO retweets (usr,tid,rdate) VALUES (?,?,?);", retweet)
 
-            self.frame_mgr.db.connection.commit()
+            # Inserts the retweet into the database through the writer connection
+            self.frame_mgr.db.retweet(self.frame_mgr.db.user.id, self.tid, retweet_date)
 
-            print("\nThis tweet has been retweeted!")
+            self.print("\nThis tweet has been retweeted!")
             self.frame_mgr.display(frames.ViewTweetFrame(self.frame_mgr, self.tid, self.keyword))  # refreshes page
             
 
@@ -0,0 +1,61 @@
+import tui.frames as frames
+import tui.core.Queries as Queries
+
+class WhoToFollowFrame(frames.Frame):
+    '''
+    Frame used to suggest accounts to follow, by how many followees they have in common with the user
+    '''
+
+    def __init__(self, frame_mgr):
+        '''
+        Initialization of the frame
+        '''
+
+        super().__init__(frame_mgr)
+
+        self.suggestion_options = {}  # option number -> usr of the suggested account
+
+    def render(self):
+        '''
+        Displays the suggestions worked out for the user currently logged in
+        '''
+
+        # Suggestions are worked out ahead of time by manage.py recommend, so this is a single
+        # read of the user's rows in the recommendations table
+        suggestions = self.frame_mgr \
+            .db \
+            .cursor \
+            .execute(Queries.RECOMMENDATIONS, (self.frame_mgr.db.user.id,)) \
+            .fetchall()
+
+        self.print("\nWho to follow:\n")
+
+        # Renders each suggestion with an selection index so the user can view their profile and follow them
+        for candidate, name, shared in suggestions:
+            self.add_dynamic_render(f"{name} ({candidate}), {shared} followee(s) in common")
+            self.suggestion_options[str(self._dynamic_size + len(self.static_options))] = candidate
+
+        if not suggestions:
+            self.print("No suggestions yet, follow a few accounts and check back later.")
+
+        self.print()
+
+        self.add_dynamic_render("Back", "BACK")  # adds the back page option to the dynamic options
+
+
+    def handle_dynamic_event(self, response):
+        '''
+        Handles dynamic events to allow the user to view a suggested account's profile, from which
+        they can follow it, and return to the LoggedIn/main page.
+
+        :param response: Contains user option selection
+        '''
+
+        # Displays the profile of the selected account, whose Back option returns here
+        if response in self.suggestion_options:
+            self.frame_mgr.display(frames.UserProfileFrame(self.frame_mgr, self.suggestion_options[response],
+                                                           back=frames.WhoToFollowFrame))
+
+        # Returns user to the LoggedInFrame/Home page if corresponding option is selected
+        elif self.dynamic_ids.get(response) == "BACK":
+            self.frame_mgr.display(frames.LoggedInFrame(self.frame_mgr))
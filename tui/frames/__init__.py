@@ -6,4 +6,7 @@ from .UserSearchFrame import *
 from .UserProfileFrame import *
 from .ComposeTweetFrame import *
 from .SearchForTweetFrame import *
-from .ViewTweetFrame import *
\ No newline at end of file
+from .ViewTweetFrame import *
+from .TrendingFrame import *
+from .WhoToFollowFrame import *
+from .ThreadFrame import *
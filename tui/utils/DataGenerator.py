@@ -0,0 +1,181 @@
+'''
+Deterministic synthetic social graph for load testing and benchmarks.
+
+The generated data follows the shapes that make real timelines expensive: follower counts
+are power-law distributed (a few accounts are followed by a large share of users), writing
+activity and retweet counts are skewed the same way, some tweets reply to recent tweets and
+form chains, and hashtag and word frequencies follow Zipf's law. The same seed and sizes
+always produce the same rows.
+'''
+import bisect
+import datetime
+import itertools
+import random
+
+FIRST_NAMES = ["Emma", "Noah", "Olivia", "Liam", "Ava", "Connor", "Leon", "Mia", "Ella", "Jack",
+               "Sophia", "Lucas", "Amelia", "Ethan", "Zoe", "Mason", "Chloe", "Logan", "Nora", "Owen"]
+LAST_NAMES = ["Smith", "Lee", "Brown", "Wilson", "Chen", "Singh", "Martin", "Roy", "Tremblay", "Gagnon",
+              "Baker", "King", "Green", "Lewis", "Young", "Hall", "Wright", "Scott", "Adams", "Clark"]
+CITIES = ["Edmonton", "Calgary", "Vancouver", "Toronto", "Montreal", "Winnipeg", "Boston", "Denver",
+          "Miami", "Chicago", "Seattle", "Austin", "Halifax", "Regina", "Victoria", "Ottawa"]
+
+START_DATE = datetime.date(2020, 1, 1)
+DAYS = 4 * 365
+
+
+def zipf_weights(n, exponent):
+    '''
+    Returns cumulative weights of ranks 1..n under Zipf's law, for random.choices(cum_weights=...)
+    '''
+
+    return list(itertools.accumulate(1 / rank ** exponent for rank in range(1, n + 1)))
+
+
+class ZipfSampler:
+    '''
+    Draws items with probability proportional to 1 / rank ** exponent.
+    '''
+
+    def __init__(self, items, exponent, rng):
+        self.items = items
+        self.cum_weights = zipf_weights(len(items), exponent)
+        self.total = self.cum_weights[-1]
+        self.rng = rng
+
+    def sample(self):
+        return self.items[bisect.bisect(self.cum_weights, self.rng.random() * self.total)]
+
+
+class DataGenerator:
+    '''
+    Streams users, follows, tweets and retweets rows in the column order of the schema.
+    Each table has its own random stream, so tables can be generated independently and in
+    any order while staying consistent with each other.
+    '''
+
+    def __init__(self, tweets, users=None, seed=291, avg_following=20, reply_rate=0.15,
+                 retweet_rate=0.1, words=20000, hashtags=5000):
+        '''
+        Initialization of the generator
+
+        :param tweets: Number of tweets to generate
+        :param users: Number of users, a tenth of the tweets by default
+        :param seed: Seed making the output reproducible
+        :param avg_following: Average number of accounts each user follows
+        :param reply_rate: Fraction of tweets that reply to an earlier tweet
+        :param retweet_rate: Average number of retweets per tweet
+        :param words: Size of the vocabulary tweet text is drawn from
+        :param hashtags: Number of distinct hashtags
+        '''
+
+        self.tweet_count = tweets
+        self.user_count = users if users else max(10, tweets // 10)
+        self.seed = seed
+        self.avg_following = min(avg_following, self.user_count - 1)
+        self.reply_rate = reply_rate
+        self.retweet_rate = retweet_rate
+        self.vocabulary = [f"w{i}" for i in range(words)]
+        self.hashtags = [f"tag{i}" for i in range(hashtags)]
+
+    def rng(self, stream):
+        '''
+        Returns the random stream of one table
+        '''
+
+        return random.Random(f"{self.seed}:{stream}")
+
+    def tweet_date(self, tid):
+        '''
+        Tweets are written in tid order, spread evenly over DAYS days
+        '''
+
+        return START_DATE + datetime.timedelta(days=tid * DAYS // max(1, self.tweet_count))
+
+    def users(self):
+        rng = self.rng("users")
+        for usr in range(1, self.user_count + 1):
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            yield (usr, f"pwd{usr}", name, f"user{usr}@example.com", rng.choice(CITIES), rng.choice([-8, -7, -6, -5, -4]))
+
+    def follows(self):
+        '''
+        Every user follows a heavy-tailed number of accounts, picked by popularity so that
+        followers per account follow a power law (low usr ids are the celebrities)
+        '''
+
+        rng = self.rng("follows")
+        popularity = ZipfSampler(range(1, self.user_count + 1), 1.0, rng)
+
+        for flwer in range(1, self.user_count + 1):
+            # Pareto with alpha 2 has mean 2 * xm, so xm = avg / 2 keeps the requested average
+            following = min(self.user_count - 1, int(rng.paretovariate(2) * self.avg_following / 2))
+            followees = set()
+
+            # Give up on a user once it is mostly redrawing accounts it already follows
+            attempts = 0
+            while len(followees) < following and attempts < following * 4:
+                flwee = popularity.sample()
+                if flwee != flwer:
+                    followees.add(flwee)
+                attempts += 1
+
+            start_date = (START_DATE + datetime.timedelta(days=rng.randrange(DAYS))).isoformat()
+            for flwee in sorted(followees):
+                yield (flwer, flwee, start_date)
+
+    def tweets(self):
+        '''
+        Writers are picked by Zipf activity, some tweets reply to a recent tweet (which builds
+        reply chains), and hashtags and words are drawn from Zipf distributions
+        '''
+
+        rng = self.rng("tweets")
+
+        # How much someone writes is unrelated to how popular they are
+        writer_ranks = list(range(1, self.user_count + 1))
+        rng.shuffle(writer_ranks)
+        writers = ZipfSampler(writer_ranks, 0.8, rng)
+        words = ZipfSampler(self.vocabulary, 1.1, rng)
+        hashtags = ZipfSampler(self.hashtags, 1.0, rng)
+
+        for tid in range(self.tweet_count):
+            text = [words.sample() for _ in range(rng.randint(3, 12))]
+            for _ in range(min(4, int(rng.expovariate(1.5)))):
+                text.insert(rng.randrange(len(text) + 1), "#" + hashtags.sample())
+
+            replyto = None
+            if tid > 0 and rng.random() < self.reply_rate:
+                # Replies mostly go to the last few hundred tweets
+                replyto = max(0, tid - 1 - int(rng.expovariate(1 / 200)))
+
+            yield (tid, writers.sample(), self.tweet_date(tid).isoformat(), " ".join(text), replyto)
+
+    def retweets(self):
+        '''
+        The number of retweets per tweet is heavy-tailed, retweets happen shortly after the tweet
+        '''
+
+        rng = self.rng("retweets")
+        retweeters = ZipfSampler(range(1, self.user_count + 1), 0.6, rng)
+
+        for tid in range(self.tweet_count):
+            if rng.random() >= self.retweet_rate:
+                continue
+
+            # Pareto with alpha 1.5 has mean 3, so on average retweet_rate * 3 retweets per tweet
+            count = min(self.user_count, int(rng.paretovariate(1.5)))
+            usrs = set()
+            while len(usrs) < count:
+                usrs.add(retweeters.sample())
+
+            rdate = min(self.tweet_date(tid) + datetime.timedelta(days=int(rng.expovariate(0.5))),
+                        START_DATE + datetime.timedelta(days=DAYS))
+            for usr in sorted(usrs):
+                yield (usr, tid, rdate.isoformat())
+
+    def tables(self):
+        '''
+        Returns (table, rows) pairs in the order they must be loaded
+        '''
+
+        return [("users", self.users()), ("follows", self.follows()), ("tweets", self.tweets()), ("retweets", self.retweets())]
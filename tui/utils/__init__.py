@@ -1 +1,2 @@
-from .StringUtils import *
\ No newline at end of file
+from .StringUtils import *
+from .DataGenerator import *